@@ -0,0 +1,312 @@
+import time
+import asyncio
+import requests
+import requests.exceptions
+from requests import Response
+from denue import DenueInegiClient
+from utils import build_url, NoDataResponse, RecordsResult
+from decoders import get_decoder
+from tiling import Area, RecordIndex, hex_cover, split, MAX_DISTANCIA
+from ratelimit import RateLimiter, RetryPolicy
+from cache import ResponseCache
+from metrics import Instrumentation
+from coalesce import RequestCoalescer
+from catalog import Catalog
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp es opcional: solo se necesita para el cliente asíncrono
+    aiohttp = None
+
+
+class AsyncDenueInegiClient(DenueInegiClient):
+    """
+    Versión asíncrona de DenueInegiClient. Expone los mismos métodos (Buscar, Ficha, Nombre,
+    BuscarEntidad, BuscarAreaAct, BuscarAreaActEstr y Cuantificar) con los mismos parámetros,
+    pero cada llamada devuelve un objeto que se debe esperar con await.
+
+    Requiere aiohttp (pip install aiohttp).
+
+    Ejemplo:
+        async with AsyncDenueInegiClient(token) as denue_inegi:
+            consulta = await denue_inegi.BuscarEntidad(condicion="Taller mecanico", entidad_federativa="09")
+            async for pagina in aiter_pages(consulta, per=250):
+                ...
+    """
+
+    def __init__(
+            self,
+            token,
+            pool_maxsize: int = 100,
+            max_retries: int | RetryPolicy = 3,
+            timeout: float | tuple = (10, 60),
+            rate_limiter: RateLimiter | None = None,
+            cache: ResponseCache | None = None,
+            decoder: str | None = None,
+            instrumentation: Instrumentation | None = None,
+            coalescer: RequestCoalescer | None = None,
+            catalog: Catalog | None = None
+    ):
+        """
+        Parámetros:
+            token (str): Token de acceso a la API del INEGI.
+            pool_maxsize (int, optional): Número máximo de conexiones abiertas simultáneamente.
+                Valor por defecto es 100.
+            max_retries (int | RetryPolicy, optional): Reintentos ante errores de conexión, timeouts y
+                respuestas 429/5xx. Valor por defecto es 3.
+            timeout (float | tuple, optional): Tiempo máximo de espera en segundos, o una tupla
+                (conexión, lectura). Valor por defecto es (10, 60).
+            rate_limiter (RateLimiter, optional): Limitador de tasa que se aplica a todas las solicitudes.
+                Puede ser el mismo que usa un DenueInegiClient síncrono. Valor por defecto es None.
+            cache (ResponseCache, optional): Caché persistente de respuestas. Valor por defecto es None.
+            decoder (str, optional): Decodificador JSON: "orjson", "msgspec" o "json". Por defecto se usa
+                el más rápido que esté instalado.
+            instrumentation (Instrumentation, optional): Recibe los eventos de cada solicitud (inicio, fin,
+                reintentos, aciertos de caché, respuestas sin datos y errores). Valor por defecto es None.
+            coalescer (RequestCoalescer, optional): Agrupa las consultas idénticas que se hacen al mismo
+                tiempo desde varias tareas en una sola solicitud. Valor por defecto es None.
+            catalog (Catalog, optional): Valida las claves de los parámetros antes de hacer la solicitud.
+                Valor por defecto es None.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncDenueInegiClient requiere aiohttp: pip install aiohttp")
+        super().__init__(token, pool_maxsize=pool_maxsize, max_retries=max_retries, timeout=timeout,
+                         rate_limiter=rate_limiter, cache=cache, decoder=decoder, instrumentation=instrumentation,
+                         coalescer=coalescer, catalog=catalog)
+
+    def _open_session(self):
+        return None  # La sesión de aiohttp se crea en _get_session, dentro del event loop
+
+    def __enter__(self):
+        raise TypeError("Utiliza 'async with' con AsyncDenueInegiClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """Cierra las conexiones abiertas del pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def close(self):
+        await self.aclose()
+
+    def _client_timeout(self):
+        if isinstance(self._timeout, tuple):
+            connect, read = self._timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=self._timeout)
+
+    def _get_session(self):
+        # La sesión se crea dentro del event loop que la va a utilizar
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._client_timeout())
+        return self._session
+
+    async def _request(self, endpoint, parametros, **kwargs):
+        url = build_url(self.URL_BASE, endpoint, parametros, self._token, kwargs.pop('query', None))
+        if self._cache is not None:
+            # La caché usa SQLite (bloqueante): se consulta en un hilo para no detener el event loop
+            cached = await asyncio.to_thread(self._cache.lookup, url)
+            if cached is not None:
+                if self._instrumentation is not None:
+                    self._instrumentation.emit("cache_hit", endpoint, url, status=cached.status_code,
+                                               bytes=len(cached.content))
+                return cached
+        response = await async_make_request(self._get_session(), url, rate_limiter=self._rate_limiter, retry=self._retry,
+                                            instrumentation=self._instrumentation, endpoint=endpoint)
+        if self._cache is not None:
+            await asyncio.to_thread(self._cache.store, url, response)
+        return response
+
+    def _call(self, endpoint, parametros, method=None, params=None, decoder=None):
+        return self._acall(endpoint, parametros, method, params, decoder)
+
+    async def Buscar_area(self, area, condicion: str = "todos", match_type: str = "any",
+                          radius: float = MAX_DISTANCIA, workers: int = 8, max_results: int = 1000,
+                          max_depth: int = 3, clip: bool = True) -> RecordsResult:
+        """Versión asíncrona de DenueInegiClient.Buscar_area."""
+        area = Area(area)
+        index = RecordIndex(area if clip else None)
+        tiles = hex_cover(area, min(radius, MAX_DISTANCIA))
+        failures = {}
+        while tiles:
+            results = await gather((self.Buscar(condicion, tile.coordenadas, tile.distancia, match_type) for tile in tiles),
+                                   limit=workers, return_exceptions=True)
+            next_tiles = []
+            for tile, result in zip(tiles, results):
+                if isinstance(result, Exception):
+                    failures[tile] = result
+                    continue
+                if len(result.data) >= max_results and tile.depth < max_depth:
+                    next_tiles.extend(child for child in split(tile) if area.intersects(child))
+                index.add(result.data)
+            tiles = next_tiles
+        return RecordsResult(index.values(), "Buscar", failures)
+
+    async def Ficha_many(self, ids, workers: int = 100, store=None) -> RecordsResult:
+        """Versión asíncrona de DenueInegiClient.Ficha_many; `workers` es el número de consultas simultáneas."""
+        ids = list(dict.fromkeys(str(id_establecimiento) for id_establecimiento in ids))
+        store = store if store is not None else {}
+        decode = get_decoder(self._decoder)
+
+        async def ficha(id_establecimiento):
+            response = await self._request("Ficha", [id_establecimiento])
+            return decode(response.content, 'utf-8')
+
+        pending = [id_establecimiento for id_establecimiento in ids if id_establecimiento not in store]
+        results = await gather((ficha(id_establecimiento) for id_establecimiento in pending),
+                               limit=workers, return_exceptions=True)
+        failures = {}
+        for id_establecimiento, result in zip(pending, results):
+            if isinstance(result, Exception):
+                failures[id_establecimiento] = result
+            else:
+                store[id_establecimiento] = result
+
+        records = []
+        for id_establecimiento in ids:
+            if id_establecimiento not in failures:
+                records.extend(store.get(id_establecimiento) or [])
+        return RecordsResult(records, "Ficha", failures)
+
+    async def _acall(self, endpoint, parametros, method=None, params=None, decoder=None):
+        if self._coalescer is not None:
+            async def call():
+                return self._wrap(await self._request(endpoint, parametros), method, params, decoder)
+            return await self._coalescer.acall(self._coalesce_key(endpoint, parametros, decoder), call)
+        response = await self._request(endpoint, parametros)
+        return self._wrap(response, method, params, decoder)
+
+
+def _is_no_data_error(error):
+    # La API responde "HTTP/1.1 000" y cierra la conexión cuando la consulta no tiene datos
+    message = getattr(error, 'message', None)
+    return getattr(message, 'code', None) == 0 or "HTTP/1.1 000" in str(error)
+
+
+async def async_make_request(session, url, rate_limiter=None, retry=None, instrumentation=None, endpoint=None):
+    """
+    Equivalente asíncrono de make_request. Devuelve un requests.Response (o NoDataResponse) para
+    que Result y PaginatedResult funcionen igual que con el cliente síncrono.
+    """
+    def emit(event, **fields):
+        if instrumentation is not None:
+            instrumentation.emit(event, endpoint, url, **fields)
+
+    def record(start, error=False):
+        latency = time.monotonic() - start
+        if rate_limiter is not None:
+            rate_limiter.record(latency, error)
+        return latency
+
+    async def backoff(attempt, latency, response=None, error=None):
+        if retry is None or not retry.should_retry(attempt):
+            return False
+        wait = retry.delay(attempt, response)
+        emit("retry", attempt=attempt, status=getattr(response, 'status_code', None), latency=latency,
+             wait=wait, error=error)
+        if rate_limiter is not None and response is not None and response.status_code == 429:
+            rate_limiter.pause(wait)
+        await asyncio.sleep(wait)
+        return True
+
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+        emit("start", attempt=attempt)
+        start = time.monotonic()
+        latency = None  # se registra una sola vez por intento
+        try:
+            async with session.get(url) as raw:
+                content = await raw.read()
+                response = Response()
+                response.status_code = raw.status
+                response.reason = raw.reason
+                response.url = str(raw.url)
+                response.headers.update(raw.headers)
+                response._content = content
+                response.encoding = raw.charset
+            if retry is not None and response.status_code in retry.statuses:
+                latency = record(start, error=True)
+                if await backoff(attempt, latency, response):
+                    attempt += 1
+                    continue
+            response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
+        except asyncio.TimeoutError as e:
+            latency = record(start, error=True)
+            if await backoff(attempt, latency, error=e):
+                attempt += 1
+                continue
+            emit("error", attempt=attempt, latency=latency, error=e)
+            print(f'The request timed out: {url}')
+            raise requests.exceptions.Timeout(f'The request timed out: {url}') from e
+        except aiohttp.ClientError as e:
+            if _is_no_data_error(e):
+                latency = record(start)
+                response = NoDataResponse(url)
+                emit("no_data", attempt=attempt, status=response.status_code, latency=latency)
+                emit("end", attempt=attempt, status=response.status_code, latency=latency, bytes=len(response.content))
+                return response
+            latency = record(start, error=True)
+            if await backoff(attempt, latency, error=e):
+                attempt += 1
+                continue
+            emit("error", attempt=attempt, latency=latency, error=e)
+            print(f'An error occurred: {e}')
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except requests.exceptions.HTTPError as e:
+            if latency is None:
+                latency = record(start, error=True)
+            emit("error", attempt=attempt, status=response.status_code, latency=latency, error=e)
+            raise
+        latency = record(start)
+        emit("end", attempt=attempt, status=response.status_code, latency=latency, bytes=len(response.content))
+        return response
+
+
+async def aiter_pages(first_call, per=250):
+    """
+    Iterador asíncrono sobre las páginas no vacías de una consulta paginada del cliente asíncrono,
+    empezando por first_call.
+
+    Parámetros:
+        first_call (PaginatedResult): Primera página de la consulta.
+        per (int, optional): Tamaño de cada página. Valor por defecto es 250.
+    """
+    result = first_call
+    registro_inicial = first_call.params['registro_final'] + 1
+    while not result.is_empty():
+        yield result
+        result = await first_call.page(registro_inicial, registro_inicial + per)
+        registro_inicial += per + 1
+
+
+async def gather(aws, limit=50, return_exceptions=False):
+    """
+    Igual que asyncio.gather pero con a lo más `limit` llamadas en curso al mismo tiempo.
+
+    Ejemplo:
+        fichas = await gather((denue_inegi.Ficha(id_) for id_ in ids), limit=100)
+
+    Parámetros:
+        aws (iterable): Objetos esperables (por ejemplo, llamadas a Ficha).
+        limit (int, optional): Número máximo de llamadas simultáneas. Valor por defecto es 50.
+        return_exceptions (bool, optional): Igual que en asyncio.gather. Valor por defecto es False.
+
+    Returns:
+        results (list): Resultados en el mismo orden que aws.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=return_exceptions)
@@ -0,0 +1,75 @@
+"""
+Mide la decodificación de una respuesta grande del DENUE y la construcción del DataFrame,
+comparando json contra orjson/msgspec (si están instalados) y la construcción fila por fila
+(lista de dicts) contra la columnar de Result.to_pandas.
+
+La respuesta se genera con el mismo esquema que devuelve la API y se guarda en
+benchmarks/fixtures/ para reutilizarla entre corridas.
+
+Uso:
+    python benchmarks/bench_decode.py [--records 20000] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+from decoders import DECODERS
+from utils import NoDataResponse, Result
+from stub_server import make_record
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def fixture(records):
+    path = FIXTURES / f"buscar_entidad_{records}.json"
+    if not path.exists():
+        FIXTURES.mkdir(exist_ok=True)
+        path.write_bytes(json.dumps([make_record(i) for i in range(1, records + 1)]).encode("utf-8"))
+    return path.read_bytes()
+
+
+def timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    content = fixture(args.records)
+    response = NoDataResponse("http://localhost/consulta/BuscarEntidad/todos/09/1/10/token")
+    response._content = content
+    print(f"Respuesta de {args.records} registros ({len(content) / 1024 ** 2:.1f} MB)")
+
+    for name, (decode, available) in DECODERS.items():
+        if available() and name != "raw":
+            print(f"decode {name:<10} {timeit(lambda: decode(content), args.repeat) * 1000:8.1f} ms")
+
+    result = Result(response)
+
+    def by_rows():
+        df = pd.DataFrame(result.data)
+        df[["Latitud", "Longitud"]] = df[["Latitud", "Longitud"]].apply(pd.to_numeric, errors="coerce")
+        return df
+
+    rows = timeit(by_rows, args.repeat)
+    columnar = timeit(result.to_pandas, args.repeat)
+    print(f"DataFrame por filas    {rows * 1000:8.1f} ms (+ pd.to_numeric en coordenadas)")
+    print(f"to_pandas columnar     {columnar * 1000:8.1f} ms (coordenadas float64)")
+    print(f"records() __slots__    {timeit(result.records, args.repeat) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
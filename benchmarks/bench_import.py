@@ -0,0 +1,71 @@
+"""
+Tiempo de importación de los módulos del cliente, medido con `python -X importtime` en un
+proceso nuevo. Además verifica que la ruta básica (denue, utils) no cargue pandas, numpy,
+pyarrow ni los decodificadores opcionales: solo se deben importar al usar to_pandas, to_csv,
+to_parquet, etc.
+
+Uso:
+    python benchmarks/bench_import.py                    # denue, mejor de 5 corridas
+    python benchmarks/bench_import.py --module async_denue --threshold 250
+    python benchmarks/bench_import.py --top 20           # módulos que más tardan
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "orjson", "msgspec")
+
+
+def importtime(module):
+    """Tiempos de `-X importtime` de un proceso nuevo: [(módulo, propio_us, acumulado_us)]."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    times = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(own), int(cumulative)))
+    return times
+
+
+def heavy_modules(module):
+    """Módulos pesados que quedan cargados después de importar `module`."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in output.stdout.strip().split(",") if name]
+
+
+def measure(module="denue", repeat=5):
+    best = min((importtime(module) for _ in range(repeat)), key=lambda times: times[-1][2])
+    return {"metric": "import_ms", "import_ms": best[-1][2] / 1000, "module": module,
+            "heavy_modules": heavy_modules(module), "times": best}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="denue")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=300.0, help="Tiempo máximo permitido en ms")
+    parser.add_argument("--top", type=int, default=10, help="Módulos más lentos que se muestran")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    print(f"import {args.module}: {result['import_ms']:.1f} ms (mejor de {args.repeat})")
+    for name, own, cumulative in sorted(result["times"], key=lambda t: t[2], reverse=True)[:args.top]:
+        print(f"  {name.strip():<40} {cumulative / 1000:8.1f} ms  (propio {own / 1000:.1f} ms)")
+
+    failed = False
+    if result["heavy_modules"]:
+        print(f"REGRESIÓN: import {args.module} carga {', '.join(result['heavy_modules'])}")
+        failed = True
+    if result["import_ms"] > args.threshold:
+        print(f"REGRESIÓN: {result['import_ms']:.1f} ms > {args.threshold:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compara la memoria máxima (RSS) de una descarga completa escrita página por página
+(download_all_to_csv) contra el método anterior: guardar cada página en un CSV temporal,
+volver a leerlas todas con pd.read_csv y unirlas con pd.concat.
+
+Cada modo corre en un proceso aparte para que la medición de RSS sea independiente.
+
+Uso:
+    python benchmarks/bench_memory.py [--total 200000] [--per 999]
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def legacy(first, per, outfile):
+    # Descarga como se hacía antes de escribir las páginas directamente al archivo final
+    import pandas as pd
+    from utils import fetch_pages
+    with TemporaryDirectory() as td:
+        files = [Path(result.to_csv(folder=td, echo=False)) for result in fetch_pages(first, per=per, delay=0)]
+        files.sort(key=lambda f: int(f.stem.split("-")[-2]))
+        df = pd.concat([pd.read_csv(f) for f in files], axis="rows")
+        df.to_csv(outfile, index=False)
+
+
+def streaming(first, per, outfile):
+    from utils import download_all_to_csv
+    download_all_to_csv(first, outfile, per=per, delay=0, resume=False)
+
+
+def child(mode, total, per):
+    from denue import DenueInegiClient
+    from stub_server import StubDenueServer
+    with StubDenueServer(total=total) as stub, DenueInegiClient("token") as client, TemporaryDirectory() as td:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=per + 1)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            {"legacy": legacy, "streaming": streaming}[mode](first, per, Path(td) / "out.csv")
+        elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<10} RSS máximo {peak_mb:8.1f} MB  tiempo {elapsed:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--total", type=int, default=200_000)
+    parser.add_argument("--per", type=int, default=999)
+    parser.add_argument("--mode", choices=["legacy", "streaming"])
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args.mode, args.total, args.per)
+        return
+    for mode in ("legacy", "streaming"):
+        subprocess.run([sys.executable, __file__, "--mode", mode, "--total", str(args.total), "--per", str(args.per)],
+                       check=True, env=dict(os.environ, PYTHONPATH=str(Path(__file__).parent)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Mide el tiempo de construcción de LocalIndex y la latencia de las consultas de OfflineDenueClient
+sobre establecimientos sintéticos repartidos en las 32 entidades, con varias clases SCIAN y estratos.
+
+Uso:
+    python benchmarks/bench_offline.py [--records 200000] [--repeat 20]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from offline import LocalIndex, OfflineDenueClient
+from stub_server import make_record
+
+CLASES = ["811111", "461110", "722511", "464111", "541110"]
+ESTRATOS = ["0 a 5 personas", "6 a 10 personas", "11 a 30 personas", "251 y más personas"]
+
+
+def make_records(n):
+    random.seed(0)
+    records = []
+    for i in range(1, n + 1):
+        record = make_record(i)
+        entidad, municipio = f"{random.randint(1, 32):02d}", f"{random.randint(1, 50):03d}"
+        record["CLEE"] = f"{entidad}{municipio}{random.choice(CLASES)}{i:06d}000000U6"
+        record["Estrato"] = random.choice(ESTRATOS)
+        if i % 7 == 0:
+            record["Nombre"] = f"TALLER MECÁNICO {i}"
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    start = time.perf_counter()
+    client = OfflineDenueClient(LocalIndex(records))
+    print(f"LocalIndex de {args.records} registros: {time.perf_counter() - start:.2f} s")
+
+    queries = {
+        "Ficha": lambda: client.Ficha("777"),
+        "Nombre": lambda: client.Nombre("taller mecanico", "09", 1, 100),
+        "BuscarAreaAct all": lambda: client.BuscarAreaAct("taller mecanico", "09", 1, 100, "all"),
+        "BuscarAreaActEstr": lambda: client.BuscarAreaActEstr("09", "005", sector="46", estrato="1",
+                                                              registro_inicial=1, registro_final=100),
+        "Buscar 500 m": lambda: client.Buscar("taller", (19.45, -99.11), 500),
+        "Cuantificar": lambda: client.Cuantificar("46,81", "09,14,15", "0"),
+    }
+    for label, query in queries.items():
+        latencies = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = query()
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"{label:<20} mediana {latencies[len(latencies) // 2] * 1000:7.2f} ms  registros {len(result.data)}")
+
+
+if __name__ == "__main__":
+    main()
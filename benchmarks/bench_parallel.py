@@ -0,0 +1,55 @@
+"""
+Mide una descarga completa (download_all_to_csv) contra un servidor local con latencia
+artificial, comparando la descarga secuencial con la descarga concurrente por ventanas.
+
+Uso:
+    python benchmarks/bench_parallel.py [--total 5000] [--per 99] [--latency 0.1] [--workers 8]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+from denue import DenueInegiClient
+from stub_server import StubDenueServer
+
+
+def run(stub, total, per, workers, delay):
+    with DenueInegiClient("token", pool_maxsize=max(workers, 1)) as client, TemporaryDirectory() as td:
+        client.URL_BASE = stub.url_base
+        start = time.perf_counter()
+        first = client.BuscarEntidad(entidad_federativa="09", registro_inicial=1, registro_final=per + 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            outfile = first.to_csv(outfile=Path(td) / "out.csv", download_all=True,
+                                   per=per, workers=workers, delay=delay)
+        elapsed = time.perf_counter() - start
+        rows = len(pd.read_csv(outfile))
+    assert rows == total, f"se esperaban {total} registros, se obtuvieron {rows}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--total", type=int, default=5000)
+    parser.add_argument("--per", type=int, default=99)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with StubDenueServer(total=args.total, latency=args.latency) as stub:
+        sequential = run(stub, args.total, args.per, workers=1, delay=0)
+        parallel = run(stub, args.total, args.per, workers=args.workers, delay=0)
+
+    print(f"secuencial              {sequential:6.2f} s")
+    print(f"{args.workers} workers               {parallel:6.2f} s")
+    print(f"Aceleración: {sequential / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compara la latencia por página de un recorrido de 200 páginas usando requests.get por llamada
+(una conexión nueva por página) contra la sesión con pool de conexiones de DenueInegiClient.
+
+En localhost abrir una conexión no cuesta casi nada, así que el servidor simula el costo de
+conectarse a www.inegi.org.mx: --handshake-delay espera al abrir cada conexión (los RTT del
+handshake TCP + TLS) y --tls sirve HTTPS con un certificado autofirmado (requiere openssl), para
+que cada conexión nueva pague también el handshake TLS real.
+
+Uso:
+    python benchmarks/bench_session.py [--pages 200] [--per 50] [--handshake-delay 0.03] [--tls]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from denue import DenueInegiClient
+from utils import make_request
+from stub_server import StubDenueServer
+
+
+@contextmanager
+def self_signed_cert():
+    """Certificado y llave autofirmados para 127.0.0.1 en una carpeta temporal."""
+    with TemporaryDirectory() as folder:
+        certfile, keyfile = f"{folder}/cert.pem", f"{folder}/key.pem"
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+                        "-keyout", keyfile, "-out", certfile], check=True, capture_output=True)
+        yield certfile, keyfile
+
+
+@contextmanager
+def nullcert():
+    yield None, None
+
+
+def crawl(fetch, pages, per):
+    latencies = []
+    for page in range(pages):
+        inicio = page * per + 1
+        start = time.perf_counter()
+        fetch(inicio, inicio + per - 1)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies, connections):
+    latencies = sorted(latencies)
+    mean = sum(latencies) / len(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} media {mean * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  conexiones {connections}")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--per", type=int, default=50)
+    parser.add_argument("--handshake-delay", type=float, default=0.03,
+                        help="Segundos que tarda en abrirse cada conexión (0 para localhost puro)")
+    parser.add_argument("--tls", action="store_true", help="Servir HTTPS con un certificado autofirmado")
+    args = parser.parse_args()
+    total = args.pages * args.per
+
+    with (self_signed_cert() if args.tls else nullcert()) as (certfile, keyfile):
+        verify = certfile or True  # el certificado autofirmado es su propia CA
+        stub_args = dict(total=total, handshake_delay=args.handshake_delay, certfile=certfile, keyfile=keyfile)
+        print(f"{'HTTPS' if args.tls else 'HTTP'}, handshake_delay {args.handshake_delay * 1000:.0f} ms")
+
+        with StubDenueServer(**stub_args) as stub:
+            def per_call(inicio, fin):
+                params = ["todos", "09", str(inicio), str(fin)]
+                return make_request(stub.url_base, "BuscarEntidad", params, "token", timeout=10, verify=verify)
+            baseline = report("requests.get", crawl(per_call, args.pages, args.per), stub.connections)
+
+        with StubDenueServer(**stub_args) as stub:
+            with DenueInegiClient("token") as client:
+                client.URL_BASE = stub.url_base
+                client._session.verify = verify
+                client._session.trust_env = False  # REQUESTS_CA_BUNDLE tendría prioridad sobre verify
+                def pooled(inicio, fin):
+                    return client.BuscarEntidad(entidad_federativa="09", registro_inicial=inicio, registro_final=fin)
+                pooled_mean = report("DenueInegiClient pool", crawl(pooled, args.pages, args.per), stub.connections)
+
+    print(f"Latencia por página: {baseline * 1000:.2f} ms -> {pooled_mean * 1000:.2f} ms "
+          f"({(1 - pooled_mean / baseline) * 100:.1f}% menos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Suite de benchmarks de las rutas críticas del cliente contra el servidor local (stub_server):
+llamadas individuales, descarga completa con download_all_to_csv y con download_pipeline
+(procesos), decodificación de páginas grandes, Result.to_pandas, escritura de CSV y apertura de
+un extracto guardado con pd.read_csv y con open_feather (memory map) y el tiempo de importación
+del cliente (que no debe cargar pandas ni otros módulos pesados). Cada
+escenario corre en un proceso aparte para medir su RSS máximo de forma independiente.
+
+Los resultados se comparan contra una línea base guardada; un escenario es una regresión si su
+métrica principal empeora más que la tolerancia.
+
+Uso:
+    python benchmarks/run_all.py                      # corre y compara contra la línea base
+    python benchmarks/run_all.py --save-baseline      # corre y guarda la línea base
+    python benchmarks/run_all.py --scenario crawl --total 50000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+RESULTS = Path(__file__).parent / "results"
+BASELINE = RESULTS / "baseline.json"
+
+
+def percentiles(latencies):
+    import numpy as np
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"p50_ms": p50 * 1000, "p95_ms": p95 * 1000, "p99_ms": p99 * 1000}
+
+
+def big_response(records):
+    from utils import NoDataResponse
+    from stub_server import make_record
+    response = NoDataResponse("http://localhost/consulta/BuscarEntidad/todos/09/1/10/token")
+    response._content = json.dumps([make_record(i) for i in range(1, records + 1)]).encode("utf-8")
+    return response
+
+
+def single_call(args):
+    from denue import DenueInegiClient
+    from stub_server import StubDenueServer
+    latencies = []
+    with StubDenueServer(total=args.total, latency=args.latency) as stub, DenueInegiClient("token") as client:
+        client.URL_BASE = stub.url_base
+        start = time.perf_counter()
+        for i in range(args.calls):
+            t = time.perf_counter()
+            client.Ficha(str(i + 1))
+            latencies.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - start
+    return {"metric": "p50_ms", "calls": args.calls, "throughput_rps": args.calls / elapsed, **percentiles(latencies)}
+
+
+def crawl(args):
+    from denue import DenueInegiClient
+    from stub_server import StubDenueServer
+    with StubDenueServer(total=args.total, latency=args.latency) as stub, \
+            DenueInegiClient("token", pool_maxsize=max(args.workers, 1)) as client, TemporaryDirectory() as td:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=args.per + 1)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            first.to_csv(outfile=Path(td) / "out.csv", download_all=True, per=args.per,
+                         workers=args.workers, delay=0, resume=False)
+        elapsed = time.perf_counter() - start
+        requests = stub.requests
+    return {"metric": "seconds", "seconds": elapsed, "records": args.total, "requests": requests,
+            "throughput_records_s": args.total / elapsed}
+
+
+def pipeline(args):
+    from denue import DenueInegiClient
+    from pipeline import download_pipeline
+    from stub_server import StubDenueServer
+    with StubDenueServer(total=args.total, latency=args.latency) as stub, \
+            DenueInegiClient("token", pool_maxsize=max(args.workers, 1)) as client, TemporaryDirectory() as td:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=args.per + 1)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            download_pipeline(first, td, per=args.per, workers=args.workers, delay=0, processes=args.processes)
+        elapsed = time.perf_counter() - start
+    return {"metric": "seconds", "seconds": elapsed, "records": args.total, "processes": args.processes,
+            "throughput_records_s": args.total / elapsed}
+
+
+def decode(args):
+    from decoders import get_decoder
+    content = big_response(args.records).content
+    decoder = get_decoder()
+    elapsed = best_of(lambda: decoder(content), args.repeat)
+    return {"metric": "seconds", "seconds": elapsed, "records": args.records,
+            "throughput_mb_s": len(content) / 1024 ** 2 / elapsed}
+
+
+def to_pandas(args):
+    from utils import Result
+    result = Result(big_response(args.records))
+    elapsed = best_of(result.to_pandas, args.repeat)
+    return {"metric": "seconds", "seconds": elapsed, "records": args.records,
+            "throughput_records_s": args.records / elapsed}
+
+
+def to_csv(args):
+    from utils import Result
+    result = Result(big_response(args.records))
+    with TemporaryDirectory() as td:
+        elapsed = best_of(lambda: result.to_csv(Path(td) / "out.csv", echo=False), args.repeat)
+    return {"metric": "seconds", "seconds": elapsed, "records": args.records,
+            "throughput_records_s": args.records / elapsed}
+
+
+def load(args):
+    from utils import Result
+    import pandas as pd
+    from storage import open_feather, save_feather
+    result = Result(big_response(args.records))
+    with TemporaryDirectory() as td:
+        csv_path = result.to_csv(Path(td) / "out.csv", echo=False)
+        feather_path = save_feather(csv_path, Path(td) / "out.feather")
+        read_csv = best_of(lambda: pd.read_csv(csv_path), args.repeat)
+        elapsed = best_of(lambda: len(open_feather(feather_path).filter(Estrato="0 a 5 personas")), args.repeat)
+    return {"metric": "seconds", "seconds": elapsed, "read_csv_seconds": read_csv, "records": args.records}
+
+
+def import_time(args):
+    from bench_import import measure
+    result = measure("denue", max(args.repeat, 3))
+    del result["times"]
+    return result
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+SCENARIOS = {
+    "single_call": single_call,
+    "crawl": crawl,
+    "pipeline": pipeline,
+    "decode": decode,
+    "to_pandas": to_pandas,
+    "to_csv": to_csv,
+    "load": load,
+    "import_time": import_time,
+}
+
+
+def child(args):
+    result = SCENARIOS[args.scenario](args)
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'escenario':<12} {'métrica':<8} {'actual':>10} {'base':>10} {'cambio':>8}  RSS MB")
+    for name, result in results.items():
+        metric = result["metric"]
+        current = result[metric]
+        base = baseline.get(name, {}).get(metric)
+        if result.get("heavy_modules"):
+            regressions.append(name)
+            print(f"{name:<12} carga {', '.join(result['heavy_modules'])} al importar  REGRESIÓN")
+        elif base:
+            change = current / base - 1
+            flag = "  REGRESIÓN" if change > tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<12} {metric:<8} {current:10.4f} {base:10.4f} {change:+8.1%}  {result['peak_rss_mb']:6.1f}{flag}")
+        else:
+            print(f"{name:<12} {metric:<8} {current:10.4f} {'-':>10} {'-':>8}  {result['peak_rss_mb']:6.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="Escenario a correr (se puede repetir). Por defecto todos.")
+    parser.add_argument("--total", type=int, default=20_000, help="Registros de la descarga completa")
+    parser.add_argument("--per", type=int, default=999)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Procesos del escenario pipeline")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia artificial del servidor en segundos")
+    parser.add_argument("--calls", type=int, default=300, help="Llamadas del escenario single_call")
+    parser.add_argument("--records", type=int, default=20_000, help="Registros de la página grande")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Empeoramiento tolerado (0.15 = 15%%)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.scenario = args.scenario[0]
+        child(args)
+        return
+
+    options = [f"--{name}={getattr(args, name)}" for name in ("total", "per", "workers", "processes", "latency", "calls",
+                                                               "records", "repeat")]
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        print(f"Corriendo {name}..")
+        output = subprocess.run([sys.executable, __file__, "--child", "--scenario", name, *options], check=True,
+                                capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH=str(Path(__file__).parent)))
+        results[name] = json.loads(output.stdout.strip().splitlines()[-1])
+        print(json.dumps(results[name]))
+
+    RESULTS.mkdir(exist_ok=True)
+    report = {"python": platform.python_version(), "machine": platform.machine(), "options": options,
+              "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    (RESULTS / f"run-{time.strftime('%Y%m%d-%H%M%S')}.json").write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nLínea base guardada en {args.baseline}")
+    elif regressions:
+        print(f"\nRegresiones: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
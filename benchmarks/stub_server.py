@@ -0,0 +1,246 @@
+"""
+Servidor local que imita el esquema de URLs de la API del DENUE
+(/app/api/denue/v1/consulta/<Endpoint>/<parametros>/<token>) para medir el cliente sin
+consumir la cuota del INEGI.
+
+Ejemplo:
+    with StubDenueServer(total=10_000, latency=0.01) as stub:
+        client = DenueInegiClient("token")
+        client.URL_BASE = stub.url_base
+        client.BuscarEntidad(registro_inicial=1, registro_final=250)
+
+También se puede correr como proceso independiente:
+    python benchmarks/stub_server.py --port 8000 --total 100000 --latency 0.05
+
+Para medir el costo de abrir conexiones como contra www.inegi.org.mx, handshake_delay agrega una
+espera a cada conexión nueva (los RTT del handshake TCP + TLS) y certfile/keyfile sirven HTTPS.
+"""
+import argparse
+import json
+import ssl
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Posición de registro_inicial y registro_final en los parámetros de cada endpoint paginado
+PAGINATED_ENDPOINTS = {"Nombre": 2, "BuscarEntidad": 2, "BuscarAreaAct": 2, "BuscarAreaActEstr": 10}
+
+
+def make_record(i):
+    return {
+        "Id": str(i),
+        "Nombre": f"ESTABLECIMIENTO {i}",
+        "Razon_social": f"RAZON SOCIAL {i} SA DE CV",
+        "Clase_actividad": "Reparación mecánica en general de automóviles y camiones",
+        "Estrato": "0 a 5 personas",
+        "Tipo_vialidad": "CALLE",
+        "Calle": "REFORMA",
+        "Num_Exterior": str(i % 500),
+        "Num_Interior": "",
+        "Colonia": "CENTRO",
+        "CP": "06000",
+        "Ubicacion": "CUAUHTÉMOC, Cuauhtémoc, CIUDAD DE MÉXICO",
+        "Telefono": "",
+        "Correo_e": "",
+        "Sitio_internet": "",
+        "Tipo": "Fijo",
+        "Longitud": f"{-99.13 + (i % 1000) * 1e-4:.7f}",
+        "Latitud": f"{19.43 + (i % 1000) * 1e-4:.7f}",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        # Se ejecuta una vez por conexión, antes de la primera solicitud
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+        super().setup()
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = [unquote(p) for p in self.path.split("?")[0].split("/consulta/")[-1].split("/")]
+        endpoint, params = parts[0], parts[1:-1]
+
+        status = None
+        if endpoint in PAGINATED_ENDPOINTS:
+            position = PAGINATED_ENDPOINTS[endpoint]
+            inicio, fin = int(params[position]), min(int(params[position + 1]), server.size())
+            with server.lock:
+                status = server.failures.pop(inicio, None)
+            if server.max_per:
+                fin = min(fin, inicio + server.max_per - 1)  # la API recorta las páginas demasiado grandes
+            if server.records is not None:
+                records = server.records[inicio - 1:fin]
+            else:
+                records = [make_record(i) for i in range(inicio, fin + 1)]
+            if server.record_latency:
+                time.sleep(server.record_latency * len(records))  # las páginas grandes tardan más
+        elif endpoint == "Ficha":
+            id_establecimiento = int(params[0])
+            with server.lock:
+                status = server.failures.pop(id_establecimiento, None)
+            records = [make_record(id_establecimiento)] if id_establecimiento <= server.size() else []
+        elif endpoint == "Cuantificar":
+            records = [{"AE": params[0], "AG": params[1], "Total": str(server.size())}]
+        else:
+            records = [make_record(1)]
+
+        if status:
+            self.send_error(status)
+            return
+
+        if not records or status == 0:
+            # Respuesta no estándar que la API del DENUE envía cuando no hay datos
+            self.wfile.write(b"HTTP/1.1 000 \r\n")
+            self.close_connection = True
+            return
+
+        body = json.dumps(records).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, total, latency, max_per=None, record_latency=0.0, handshake_delay=0.0):
+        super().__init__(address, _Handler)
+        self.total = total
+        self.latency = latency
+        self.max_per = max_per
+        self.record_latency = record_latency
+        self.handshake_delay = handshake_delay
+        self.records = None
+        self.failures = {}  # registro_inicial (o Id en Ficha) -> status de la próxima respuesta (0: sin datos)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def handle_error(self, request, client_address):
+        # El cliente cerró la conexión antes de recibir la respuesta (p. ej. por un timeout)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def size(self):
+        return len(self.records) if self.records is not None else self.total
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubDenueServer:
+    """
+    Servidor HTTP de prueba en un hilo de fondo.
+
+    Parámetros:
+        total (int, optional): Número total de establecimientos que devuelven los endpoints paginados.
+            Valor por defecto es 10000.
+        latency (float, optional): Segundos de latencia artificial por solicitud. Valor por defecto es 0.
+        max_per (int, optional): Máximo de registros por página; los rangos más grandes se recortan.
+            Valor por defecto es None (sin límite).
+        record_latency (float, optional): Segundos adicionales por cada registro de una página, para
+            simular que las páginas grandes tardan más (y provocar timeouts). Valor por defecto es 0.
+        handshake_delay (float, optional): Segundos de espera al abrir cada conexión, para simular el
+            handshake TCP + TLS con un servidor remoto. Valor por defecto es 0.
+        certfile (str, optional): Certificado (PEM) para servir HTTPS. Valor por defecto es None (HTTP).
+        keyfile (str, optional): Llave privada del certificado. Valor por defecto es None.
+    """
+
+    def __init__(self, total=10_000, latency=0.0, host="127.0.0.1", port=0, max_per=None, record_latency=0.0,
+                 handshake_delay=0.0, certfile=None, keyfile=None):
+        self._server = _Server((host, port), total, latency, max_per, record_latency, handshake_delay)
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url_base(self):
+        host, port = self._server.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/app/api/denue/v1/consulta/"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def records(self):
+        """Establecimientos que se sirven en lugar de los generados (None para generarlos)."""
+        return self._server.records
+
+    @records.setter
+    def records(self, records):
+        self._server.records = records
+
+    def fail(self, registro_inicial, status=0):
+        """
+        La próxima página que empiece en registro_inicial responde con `status` (0 para la
+        respuesta "sin datos" de la API, como cuando falla una página profunda). En Ficha, la consulta
+        del establecimiento con ese Id. Solo falla una vez.
+        """
+        with self._server.lock:
+            self._server.failures[registro_inicial] = status
+
+    @property
+    def connections(self):
+        return self._server.connections
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--total", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--max-per", type=int, default=None)
+    parser.add_argument("--record-latency", type=float, default=0.0)
+    parser.add_argument("--handshake-delay", type=float, default=0.0)
+    parser.add_argument("--certfile", default=None)
+    parser.add_argument("--keyfile", default=None)
+    args = parser.parse_args()
+    stub = StubDenueServer(args.total, args.latency, args.host, args.port, args.max_per, args.record_latency,
+                           args.handshake_delay, args.certfile, args.keyfile)
+    print(f"Sirviendo {args.total} establecimientos en {stub.url_base}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import time
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests.exceptions
+from requests import Response
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """La consulta no está en la caché y la caché está en modo "cache-only"."""
+
+
+def cache_key(url):
+    """
+    Clave de caché de una URL de la API: el endpoint y sus parámetros, sin el token.
+    Ej. ".../consulta/Cuantificar/46/09/0/<token>" -> "Cuantificar/46/09/0"
+    """
+    parts = urlsplit(url)
+    # remove token
+    path = "/".join(parts.path.split("/")[:-1])
+    key = path.split("consulta/")[1]
+    if parts.query:
+        key += "?" + urlencode(sorted(parse_qsl(parts.query)))
+    return key
+
+
+class ResponseCache:
+    """
+    Caché persistente de respuestas de la API en un archivo SQLite, con el contenido comprimido.
+
+    Ejemplo:
+        cache = ResponseCache("denue_cache.sqlite", ttl=24 * 3600)
+        denue_inegi = DenueInegiClient(token, cache=cache)
+        ...
+        print(cache.stats())
+
+    Parámetros:
+        path (str | Path, optional): Archivo SQLite de la caché. Valor por defecto es "denue_cache.sqlite".
+        ttl (float, optional): Segundos que una respuesta se considera vigente. None para no expirar.
+            Valor por defecto es 86400 (un día).
+        max_size (int, optional): Tamaño máximo en bytes (comprimidos). Al excederse se eliminan las
+            respuestas usadas menos recientemente. Valor por defecto es 500 MB.
+        mode (str, optional): "normal" usa la caché y descarga lo que falte; "cache-only" nunca usa la red
+            y lanza CacheMissError si falta una respuesta; "refresh" siempre descarga y actualiza la caché.
+            Valor por defecto es "normal".
+    """
+    MODES = ("normal", "cache-only", "refresh")
+
+    def __init__(self, path="denue_cache.sqlite", ttl=86400, max_size=500 * 1024 ** 2, mode="normal"):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid cache mode: {mode}. Valid modes: {self.MODES}")
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, status INTEGER, content BLOB, size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Devuelve (status, content) de una respuesta vigente, o None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT status, content, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            status, content, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._delete(key)
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return status, zlib.decompress(content)
+
+    def set(self, key, status, content):
+        blob = zlib.compress(content)
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO responses (key, status, content, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, blob, len(blob), now, now)
+            )
+            self._size += len(blob)
+            self._evict()
+            self._conn.commit()
+
+    def _delete(self, key):
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= row[0]
+
+    def _evict(self):
+        # Elimina las respuestas usadas menos recientemente hasta quedar bajo max_size
+        while self._size > self.max_size:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                if self._size <= self.max_size:
+                    break
+
+    def lookup(self, url):
+        """
+        Busca la respuesta de `url` según el modo de la caché y actualiza los contadores.
+        Devuelve un CachedResponse, o None si se debe consultar la API.
+        """
+        if self.mode == "refresh":
+            return None
+        cached = self.get(cache_key(url))
+        if cached is None:
+            with self._lock:
+                self.misses += 1
+            if self.mode == "cache-only":
+                raise CacheMissError(f"Consulta no encontrada en la caché: {cache_key(url)}")
+            return None
+        with self._lock:
+            self.hits += 1
+        status, content = cached
+        return CachedResponse(url, status, content)
+
+    def store(self, url, response):
+        self.set(cache_key(url), response.status_code, response.content)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        self._conn.close()
+
+    def stats(self):
+        """Contadores de la caché: aciertos, fallos, tasa de aciertos, entradas y tamaño en bytes."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            hits, misses, size = self.hits, self.misses, self._size
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+            "size": size,
+        }
+
+
+class CachedResponse(Response):
+    def __init__(self, url, status_code, content):
+        super().__init__()
+        self.status_code = status_code
+        self.url = url
+        self.headers['Content-Type'] = 'application/json; charset=utf-8'
+        self._content = content
+        self.from_cache = True
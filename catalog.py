@@ -0,0 +1,370 @@
+import csv
+from enum import Enum
+from pathlib import Path
+from models import Entidad
+
+# Niveles del área geográfica (dígitos de la clave) y de la actividad económica
+AREA_LEVELS = {"entidad": 2, "municipio": 5, "localidad": 9}
+SCIAN_LEVELS = {"sector": 2, "subsector": 3, "rama": 4, "subrama": 5, "clase": 6}
+
+ENTIDADES = {
+    "01": "Aguascalientes", "02": "Baja California", "03": "Baja California Sur", "04": "Campeche",
+    "05": "Coahuila de Zaragoza", "06": "Colima", "07": "Chiapas", "08": "Chihuahua", "09": "Ciudad de México",
+    "10": "Durango", "11": "Guanajuato", "12": "Guerrero", "13": "Hidalgo", "14": "Jalisco", "15": "México",
+    "16": "Michoacán de Ocampo", "17": "Morelos", "18": "Nayarit", "19": "Nuevo León", "20": "Oaxaca",
+    "21": "Puebla", "22": "Querétaro", "23": "Quintana Roo", "24": "San Luis Potosí", "25": "Sinaloa",
+    "26": "Sonora", "27": "Tabasco", "28": "Tamaulipas", "29": "Tlaxcala", "30": "Veracruz de Ignacio de la Llave",
+    "31": "Yucatán", "32": "Zacatecas",
+}
+# Claves que acepta la API, incluida 33 (entidad federativa no especificada)
+CLAVES_ENTIDAD = frozenset(entidad.code for entidad in Entidad)
+
+# Clave de municipio más alta de cada entidad. Sin un catálogo completo (Catalog.from_csv) un
+# municipio se valida por rango, 001 a este máximo, sin las claves de MUNICIPIOS_FALTANTES. La
+# verificación solo descarta claves imposibles: una clave que pasa puede no existir en el DENUE.
+MUNICIPIO_MAX = {
+    "01": 11, "02": 7, "03": 9, "04": 13, "05": 38, "06": 10, "07": 125, "08": 67, "09": 17, "10": 39,
+    "11": 46, "12": 86, "13": 84, "14": 125, "15": 125, "16": 113, "17": 36, "18": 20, "19": 51, "20": 570,
+    "21": 217, "22": 18, "23": 11, "24": 58, "25": 20, "26": 72, "27": 17, "28": 43, "29": 60, "30": 212,
+    "31": 106, "32": 58,
+}
+
+# Claves dentro del rango que no corresponden a ningún municipio (huecos en la numeración)
+MUNICIPIOS_FALTANTES = {
+    "03": ("004", "005", "006", "007"),
+    "07": ("095",),
+    "09": ("001",),  # las alcaldías de la Ciudad de México van de 002 a 017
+}
+
+# Claves de 5 dígitos que acepta la verificación por rango
+MUNICIPIOS_POR_RANGO = frozenset(
+    entidad + municipio
+    for entidad, maximum in MUNICIPIO_MAX.items()
+    for municipio in (f"{n:03d}" for n in range(1, maximum + 1))
+    if municipio not in MUNICIPIOS_FALTANTES.get(entidad, ())
+)
+
+# Sectores del SCIAN México (31-33 y 48-49 son un solo sector con varias claves)
+SECTORES = {
+    "11": "Agricultura, cría y explotación de animales, aprovechamiento forestal, pesca y caza",
+    "21": "Minería",
+    "22": "Generación, transmisión, distribución y comercialización de energía eléctrica, suministro de agua y "
+          "de gas natural por ductos al consumidor final",
+    "23": "Construcción",
+    "31": "Industrias manufactureras",
+    "32": "Industrias manufactureras",
+    "33": "Industrias manufactureras",
+    "43": "Comercio al por mayor",
+    "46": "Comercio al por menor",
+    "48": "Transportes, correos y almacenamiento",
+    "49": "Transportes, correos y almacenamiento",
+    "51": "Información en medios masivos",
+    "52": "Servicios financieros y de seguros",
+    "53": "Servicios inmobiliarios y de alquiler de bienes muebles e intangibles",
+    "54": "Servicios profesionales, científicos y técnicos",
+    "55": "Corporativos",
+    "56": "Servicios de apoyo a los negocios y manejo de residuos, y servicios de remediación",
+    "61": "Servicios educativos",
+    "62": "Servicios de salud y de asistencia social",
+    "71": "Servicios de esparcimiento culturales y deportivos, y otros servicios recreativos",
+    "72": "Servicios de alojamiento temporal y de preparación de alimentos y bebidas",
+    "81": "Otros servicios excepto actividades gubernamentales",
+    "93": "Actividades legislativas, gubernamentales, de impartición de justicia y de organismos "
+          "internacionales y extraterritoriales",
+}
+
+SUBSECTORES = frozenset("""
+    111 112 113 114 115 211 212 213 221 222 236 237 238
+    311 312 313 314 315 316 321 322 323 324 325 326 327 331 332 333 334 335 336 337 339
+    431 432 433 434 435 436 437 461 462 463 464 465 466 467 468 469
+    481 482 483 484 485 486 487 488 491 492 493 511 512 515 517 518 519 521 522 523 524 525
+    531 532 533 541 551 561 562 611 621 622 623 624 711 712 713 721 722 811 812 813 814 931 932
+""".split())
+
+
+def normalize_code(value, width=None):
+    """
+    Normaliza una clave: acepta str, int o Entidad, quita espacios y, si se indica `width`,
+    completa con ceros a la izquierda ("9" -> "09", 1 -> "001").
+    """
+    if isinstance(value, Enum):
+        value = value.value
+    elif isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise ValueError(f"Invalid type for code: {type(value)}")
+    code = str(value).replace(" ", "")
+    return code.zfill(width) if width else code
+
+
+def normalize_area(value):
+    """Clave de área de Cuantificar: 0, o 2, 5 o 9 dígitos con los ceros a la izquierda que falten."""
+    code = normalize_code(value)
+    if code in ("0", "00"):
+        return "0"
+    for width in AREA_LEVELS.values():
+        if len(code) == width - 1:
+            return code.zfill(width)
+    return code
+
+
+def split_codes(values, normalize=normalize_code):
+    """Lista de claves separadas por coma (o una lista) a una cadena "a,b,c" normalizada y sin espacios."""
+    if isinstance(values, (str, int, Enum)):
+        values = str(getattr(values, "value", values)).split(",")
+    return ",".join(normalize(value) for value in values if str(getattr(value, "value", value)).strip())
+
+
+def _text(value):
+    if value is None or value != value:  # None o NaN
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(getattr(value, "value", value))
+
+
+def _series(values, width=None):
+    # Columna de claves a pd.Series de texto normalizada (las columnas leídas como números pierden
+    # los ceros a la izquierda; los nulos quedan como "")
+    import pandas as pd
+    series = values if isinstance(values, pd.Series) else pd.Series(values if hasattr(values, "__len__") else list(values))
+    if series.dtype.kind in "iu":
+        series = series.astype(str)
+    else:
+        series = series.astype(object).map(_text)
+    series = series.str.replace(" ", "", regex=False)
+    if width:
+        series = series.str.zfill(width).where(series != "", "")
+    return series.reset_index(drop=True)
+
+
+def normalize_codes(values, width=None):
+    """
+    Versión vectorizada de normalize_code para una columna completa (lista, arreglo de NumPy o
+    pd.Series, incluso leída como números).
+
+    Returns:
+        codes (np.ndarray): Claves normalizadas como texto.
+    """
+    return _series(values, width).to_numpy(dtype=object)
+
+
+class Catalog:
+    """
+    Catálogo de claves del DENUE para normalizar y validar parámetros antes de hacer solicitudes.
+    Incluye las entidades, el rango de claves de municipio de cada entidad y los sectores y
+    subsectores del SCIAN. Sin tablas exactas los municipios se verifican solo por rango
+    (MUNICIPIO_MAX), así que una clave que pasa puede no existir. Con Catalog.from_csv o Catalog.from_records se construyen además las
+    tablas exactas de municipios y clases SCIAN a partir de un extracto del DENUE (de la descarga
+    masiva o de download_all_to_csv), que se pueden guardar con save() y cargar con load().
+
+    Todas las validaciones tienen una versión escalar (is_valid_*) y una vectorizada (validate_*)
+    que procesa columnas completas de una vez.
+
+    Ejemplo:
+        catalog = Catalog.load("data/catalogo.npz")
+        combos = catalog.combinations(catalog.expand_actividad("46", "subsector"), catalog.expand_area("09", "municipio"))
+        combos[combos.valid]
+
+    Parámetros:
+        municipios (iterable, optional): Claves de municipio de 5 dígitos (entidad + municipio).
+            Por defecto se verifica solo el rango (MUNICIPIOS_POR_RANGO).
+        clases (iterable, optional): Clases SCIAN de 6 dígitos. Por defecto se validan solo el
+            sector y el subsector.
+    """
+
+    def __init__(self, municipios=None, clases=None):
+        self.municipios = frozenset(municipios) if municipios is not None else None
+        self.clases = frozenset(clases) if clases is not None else None
+        self._prefixes = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Construye las tablas exactas con las claves de los establecimientos (CLEE o cve_ent/cve_mun/codigo_act)."""
+        municipios, clases = set(), set()
+        for record in records:
+            clee = str(record.get("CLEE") or record.get("clee") or "")
+            if record.get("cve_ent") and record.get("cve_mun"):
+                municipios.add(str(record["cve_ent"]).zfill(2) + str(record["cve_mun"]).zfill(3))
+            elif len(clee) >= 5:
+                municipios.add(clee[:5])
+            if record.get("codigo_act"):
+                clases.add(str(record["codigo_act"]).zfill(6))
+            elif len(clee) >= 11:
+                clases.add(clee[5:11])
+        return cls(municipios or None, clases or None)
+
+    @classmethod
+    def from_csv(cls, *paths, encoding="utf-8"):
+        def records():
+            for path in paths:
+                with open(path, newline="", encoding=encoding) as f:
+                    yield from csv.DictReader(f)
+        return cls.from_records(records())
+
+    def save(self, path):
+        """Guarda las tablas exactas en un .npz comprimido."""
+        import numpy as np
+        np.savez_compressed(path, municipios=np.array(sorted(self.municipios or ()), dtype="U5"),
+                            clases=np.array(sorted(self.clases or ()), dtype="U6"))
+        return Path(path).resolve()
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+        with np.load(path) as tables:
+            municipios, clases = tables["municipios"].tolist(), tables["clases"].tolist()
+        return cls(municipios or None, clases or None)
+
+    def _actividad_prefixes(self, width):
+        if width not in self._prefixes:
+            self._prefixes[width] = frozenset(clase[:width] for clase in self.clases)
+        return self._prefixes[width]
+
+    # Validación escalar
+
+    def _municipios(self):
+        return self.municipios if self.municipios is not None else MUNICIPIOS_POR_RANGO
+
+    def is_valid_entidad(self, value):
+        """Igual que models.Entidad: 01 a 32 y 33 (no especificada)."""
+        return normalize_code(value, 2) in CLAVES_ENTIDAD
+
+    def is_valid_municipio(self, entidad, municipio=None):
+        """
+        Acepta la clave de 5 dígitos o la entidad y el municipio por separado. Sin la tabla exacta de
+        municipios es solo una verificación por rango (ver MUNICIPIO_MAX).
+        """
+        code = normalize_code(entidad) if municipio is None else normalize_code(entidad, 2) + normalize_code(municipio, 3)
+        return code in self._municipios()
+
+    def is_valid_actividad(self, value):
+        code = normalize_code(value)
+        if len(code) not in SCIAN_LEVELS.values() or not code.isdigit() or code[:2] not in SECTORES:
+            return False
+        if self.clases is not None:
+            return code in self._actividad_prefixes(len(code))
+        return len(code) == 2 or code[:3] in SUBSECTORES
+
+    def is_valid_area(self, value):
+        code = normalize_area(value)
+        if code == "0":
+            return True
+        if len(code) not in AREA_LEVELS.values() or not code.isdigit():
+            return False
+        return self.is_valid_entidad(code[:2]) if len(code) == 2 else self.is_valid_municipio(code[:5])
+
+    def check(self, entidad=None, municipio=None, actividad=None, area=None):
+        """
+        Lanza ValueError si alguna de las claves indicadas no existe. "0" (todas) siempre es válida.
+        actividad y area aceptan varias claves separadas por coma, como en Cuantificar.
+        """
+        errors = []
+        if entidad is not None and normalize_code(entidad, 2) != "00" and not self.is_valid_entidad(entidad):
+            errors.append(f"entidad {entidad!r}")
+        if municipio is not None and normalize_code(municipio) != "0" and normalize_code(municipio, 3) != "000":
+            if not self.is_valid_municipio(entidad if entidad is not None else "00", municipio):
+                errors.append(f"municipio {municipio!r} de la entidad {entidad!r}")
+        for code in (split_codes(actividad).split(",") if actividad is not None else []):
+            if code not in ("0", "00", "000", "0000", "000000") and not self.is_valid_actividad(code):
+                errors.append(f"actividad {code!r}")
+        for code in (split_codes(area).split(",") if area is not None else []):
+            if not self.is_valid_area(code):
+                errors.append(f"area {code!r}")
+        if errors:
+            raise ValueError(f"Invalid codes: {', '.join(errors)}")
+
+    # Validación vectorizada
+
+    def validate_entidades(self, values):
+        """Arreglo booleano: True para las claves de entidad válidas."""
+        return _series(values, 2).isin(CLAVES_ENTIDAD).to_numpy()
+
+    def validate_municipios(self, values, municipios=None):
+        """
+        Arreglo booleano de validez de claves de municipio: `values` son claves de 5 dígitos, o
+        claves de entidad si se pasa también la columna `municipios`. Sin la tabla exacta de
+        municipios es solo una verificación por rango.
+        """
+        codes = _series(values, 5) if municipios is None else _series(values, 2) + _series(municipios, 3)
+        return codes.isin(self._municipios()).to_numpy()
+
+    def validate_actividades(self, values):
+        """Arreglo booleano de validez de claves SCIAN de 2 a 6 dígitos."""
+        codes = _series(values)
+        lengths = codes.str.len()
+        valid = lengths.isin(list(SCIAN_LEVELS.values())) & codes.str.isdigit() & codes.str[:2].isin(list(SECTORES))
+        if self.clases is not None:
+            known = codes.isin([])
+            for width in SCIAN_LEVELS.values():
+                known |= lengths.eq(width) & codes.isin(self._actividad_prefixes(width))
+            return (valid & known).to_numpy()
+        return (valid & (lengths.eq(2) | codes.str[:3].isin(SUBSECTORES))).to_numpy()
+
+    def validate_areas(self, values):
+        """Arreglo booleano de validez de claves de área de Cuantificar (0, 2, 5 o 9 dígitos)."""
+        codes = _series(values).map(normalize_area)
+        lengths = codes.str.len()
+        valid = codes.eq("0").to_numpy().copy()
+        entidad = lengths.eq(2).to_numpy()
+        valid[entidad] = self.validate_entidades(codes[entidad])
+        municipio = (lengths.isin([5, 9]) & codes.str.isdigit()).to_numpy()
+        valid[municipio] = self.validate_municipios(codes[municipio].str[:5])
+        return valid
+
+    # Expansión por prefijo
+
+    def expand_area(self, prefix="0", level="entidad"):
+        """
+        Claves del nivel `level` ("entidad" o "municipio") que empiezan con `prefix`.
+        Ej. expand_area("09", "municipio") -> ["09002", ..., "09017"].
+        """
+        prefix = normalize_area(prefix)
+        prefix = "" if prefix == "0" else prefix
+        if level == "entidad":
+            return [entidad for entidad in ENTIDADES if entidad.startswith(prefix)]
+        if level != "municipio":
+            raise ValueError(f"Invalid level: {level}. Valid levels: ('entidad', 'municipio')")
+        return sorted(code for code in self._municipios() if code.startswith(prefix))
+
+    def expand_actividad(self, prefix="0", level="subsector"):
+        """
+        Claves SCIAN del nivel `level` que empiezan con `prefix`. Los niveles rama, subrama y clase
+        requieren el catálogo exacto de clases (from_csv o load).
+        Ej. expand_actividad("46", "subsector") -> ["461", ..., "469"].
+        """
+        if level not in SCIAN_LEVELS:
+            raise ValueError(f"Invalid level: {level}. Valid levels: {tuple(SCIAN_LEVELS)}")
+        prefix = normalize_code(prefix)
+        prefix = "" if set(prefix) <= {"0"} else prefix
+        width = SCIAN_LEVELS[level]
+        if self.clases is not None:
+            codes = self._actividad_prefixes(width)
+        elif level == "sector":
+            codes = SECTORES
+        elif level == "subsector":
+            codes = SUBSECTORES
+        else:
+            raise ValueError(f"Para expandir al nivel {level} se requiere el catálogo de clases (Catalog.from_csv)")
+        return sorted(code for code in codes if code.startswith(prefix))
+
+    def combinations(self, actividades, areas, estratos=("0",)):
+        """
+        Todas las combinaciones actividad × área × estrato normalizadas y validadas de una vez,
+        para revisar un plan de consultas antes de enviarlo.
+
+        Returns:
+            df (pd.DataFrame): Columnas actividad, area, estrato y valid.
+        """
+        import pandas as pd
+        actividades = _series(split_codes(actividades).split(",") if isinstance(actividades, str) else actividades)
+        areas = _series(split_codes(areas, normalize_area).split(",") if isinstance(areas, str) else areas).map(normalize_area)
+        estratos = _series(estratos)
+        valid_actividad = pd.Series(self.validate_actividades(actividades) | actividades.eq("0").to_numpy(),
+                                    index=actividades)
+        valid_area = pd.Series(self.validate_areas(areas), index=areas)
+        valid_estrato = pd.Series(estratos.isin([str(n) for n in range(8)]).to_numpy(), index=estratos)
+        index = pd.MultiIndex.from_product([actividades, areas, estratos], names=["actividad", "area", "estrato"])
+        df = index.to_frame(index=False)
+        df["valid"] = (valid_actividad.groupby(level=0).first().reindex(df["actividad"]).to_numpy()
+                       & valid_area.groupby(level=0).first().reindex(df["area"]).to_numpy()
+                       & valid_estrato.groupby(level=0).first().reindex(df["estrato"]).to_numpy())
+        return df
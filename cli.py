@@ -0,0 +1,381 @@
+"""
+Extractor masivo del DENUE desde la línea de comandos. Recibe una especificación YAML o JSON con
+varias consultas y las corre como un solo lote: todas comparten el límite de tasa, la caché y un
+máximo global de solicitudes simultáneas. Cada consulta se descarga con download_all (reanudable
+en CSV) y el avance se muestra en vivo con registros por segundo y tiempo restante estimado. Al
+terminar se escribe un resumen en JSON en la carpeta de salida.
+
+Uso:
+    python cli.py extraccion.yaml
+    python denue.py extraccion.yaml --concurrency 8 --rate 4
+    python cli.py extraccion.yaml --dry-run          # solo muestra las consultas y sus totales
+
+Ejemplo de especificación:
+    folder: extractos
+    format: csv                 # csv, parquet o feather
+    per: 1000                   # o auto: ajusta el tamaño con la latencia (ver pager.py)
+    concurrency: 6              # solicitudes simultáneas en total
+    parallel: 2                 # consultas que se descargan al mismo tiempo
+    rate: 4                     # solicitudes por segundo, compartidas
+    cache: denue_cache.sqlite   # opcional
+    queries:
+      - name: talleres
+        endpoint: BuscarEntidad
+        params: {condicion: "Taller mecanico"}
+        entidades: ["09", "15"]   # una consulta por entidad; "todas" para las 32
+      - name: comercio
+        endpoint: BuscarAreaActEstr
+        params: {sector: "46", estrato: "1"}
+        entidades: todas
+        per: 500
+
+El token se toma de --token, de la clave `token` de la especificación o de la variable de
+entorno INEGI_TOKEN.
+"""
+import argparse
+import contextlib
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from cache import ResponseCache
+from denue import DenueInegiClient
+from metrics import Instrumentation, RequestStats
+from pager import PageSizer
+from planner import ENTIDADES, count
+from ratelimit import RateLimiter
+from utils import DownloadCheckpoint, download_all
+from writers import WRITERS
+
+try:
+    import yaml
+except ImportError:  # PyYAML es opcional: sin él solo se aceptan especificaciones JSON
+    yaml = None
+
+PAGINATED_ENDPOINTS = ("Nombre", "BuscarEntidad", "BuscarAreaAct", "BuscarAreaActEstr")
+STATE_FILE = "denue-run-state.json"
+
+
+@dataclass
+class Job:
+    """Una consulta de la especificación, ya expandida por entidad."""
+    name: str
+    endpoint: str
+    params: dict
+    per: int | str = 1000
+    format: str = "csv"
+    total: int | None = None
+    records: int = 0
+    status: str = "pendiente"
+    seconds: float = 0.0
+    outfile: str | None = None
+    error: str | None = None
+    skip: set = field(default_factory=set, repr=False)
+
+
+def load_spec(path):
+    """Lee una especificación YAML (requiere PyYAML) o JSON."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError("Para leer especificaciones YAML se requiere PyYAML: pip install pyyaml")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def expand_jobs(spec):
+    """
+    Convierte las consultas de la especificación en Jobs. Una consulta con `entidades` se divide
+    en una por entidad, con entidad_federativa fijada y el nombre terminado en la clave.
+    """
+    jobs = []
+    for number, query in enumerate(spec.get("queries", []), start=1):
+        endpoint = query.get("endpoint")
+        if endpoint not in PAGINATED_ENDPOINTS:
+            raise ValueError(f"Invalid endpoint in query {number}: {endpoint}. Valid endpoints: {PAGINATED_ENDPOINTS}")
+        name = query.get("name") or f"{endpoint}-{number}"
+        params = dict(query.get("params") or {})
+        per = query.get("per", spec.get("per", 1000))
+        per = per if per == "auto" else int(per)
+        format = query.get("format", spec.get("format", "csv"))
+        if format not in WRITERS:
+            raise ValueError(f"Invalid format in query {number}: {format}. Valid formats: {tuple(WRITERS)}")
+        entidades = query.get("entidades")
+        if entidades is None:
+            jobs.append(Job(name, endpoint, params, per, format))
+            continue
+        if entidades == "todas":
+            entidades = ENTIDADES
+        for entidad in entidades:
+            entidad = str(entidad).zfill(2)
+            jobs.append(Job(f"{name}-{entidad}", endpoint, dict(params, entidad_federativa=entidad), per, format))
+    names = [job.name for job in jobs]
+    duplicated = {name for name in names if names.count(name) > 1}
+    if duplicated:
+        raise ValueError(f"Duplicated query names: {sorted(duplicated)}")
+    return jobs
+
+
+def expected_total(client, job):
+    """
+    Total de registros de la consulta según Cuantificar, cuando la consulta equivale a un conteo
+    (todos los establecimientos de un área, actividad y estrato). None si no se puede saber.
+    """
+    params = job.params
+    entidad = str(params.get("entidad_federativa", "00")).zfill(2)
+    area = "0" if entidad == "00" else entidad
+    if job.endpoint == "BuscarEntidad" and params.get("condicion", "todos") == "todos":
+        return count(client, ["0"], [area]).get(("0", area))
+    if job.endpoint != "BuscarAreaActEstr":
+        return None
+    if any(str(params.get(key, "0")) != "0" for key in ("ageb", "manzana", "nombre_del_establecimiento",
+                                                          "id_establecimiento")):
+        return None
+    municipio, localidad = str(params.get("municipio", "0")), str(params.get("localidad", "0"))
+    if area != "0" and municipio != "0":
+        area += municipio.zfill(3)
+        if localidad != "0":
+            area += localidad.zfill(4)
+    actividad = "0"
+    for key in ("clase", "rama", "subsector", "sector"):
+        if str(params.get(key, "0")) != "0":
+            actividad = str(params[key])
+            break
+    return count(client, [actividad], [area], str(params.get("estrato", "0"))).get((actividad, area))
+
+
+class Progress:
+    """Avance global del lote: registros, registros por segundo y tiempo restante estimado."""
+
+    def __init__(self, jobs, stream=sys.stderr, interval=1.0):
+        self.jobs = jobs
+        self.stream = stream
+        self.interval = interval
+        self.started = time.monotonic()
+        self.records = 0
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def add(self, job, records):
+        with self._lock:
+            job.records += records
+            self.records += records
+        self.show()
+
+    def eta(self, rate):
+        """Segundos restantes; las consultas sin total usan el promedio de las terminadas."""
+        finished = [job.records for job in self.jobs if job.status not in ("pendiente", "descargando")]
+        average = sum(finished) / len(finished) if finished else None
+        remaining = 0
+        for job in self.jobs:
+            if job.status not in ("pendiente", "descargando"):
+                continue
+            expected = job.total if job.total is not None else average
+            if expected is None:
+                return None
+            remaining += max(expected - job.records, 0)
+        return remaining / rate if rate else None
+
+    def show(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.records / elapsed
+        done = sum(job.status not in ("pendiente", "descargando") for job in self.jobs)
+        eta = self.eta(rate)
+        eta = "-" if eta is None else time.strftime("%H:%M:%S", time.gmtime(eta))
+        print(f"\r{self.records} registros | {rate:,.0f} reg/s | consultas {done}/{len(self.jobs)} | ETA {eta}   ",
+              end="", file=self.stream, flush=True)
+
+
+class BatchClient(DenueInegiClient):
+    """
+    Cliente del lote: limita las solicitudes simultáneas de todas las consultas con un semáforo
+    y cuenta los registros de cada página en el Job al que pertenece la copia del cliente.
+    """
+
+    def __init__(self, token, concurrency=4, progress=None, **kwargs):
+        super().__init__(token, pool_maxsize=concurrency, **kwargs)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._progress = progress
+        self._job = None
+
+    def for_job(self, job):
+        client = copy.copy(self)  # comparte la sesión, el semáforo, el limitador y la caché
+        client._job = job
+        return client
+
+    def _request(self, endpoint, parametros, **kwargs):
+        with self._slots:
+            return super()._request(endpoint, parametros, **kwargs)
+
+    def _wrap(self, response, method=None, params=None, decoder=None):
+        result = super()._wrap(response, method, params, decoder)
+        job = self._job
+        if job is not None and method is not None and self._progress is not None:
+            if (params['registro_inicial'], params['registro_final']) not in job.skip:
+                self._progress.add(job, len(result.data))
+        return result
+
+
+def run_job(client, job, folder, workers, resume):
+    start = time.monotonic()
+    job.status = "descargando"
+    outfile = folder / f"{job.name}.{job.format}"
+    try:
+        method = getattr(client, job.endpoint)
+        first_end = PageSizer().per if job.per == "auto" else 1 + job.per
+        first = method(**job.params, registro_inicial=1, registro_final=first_end)
+        checkpoint = DownloadCheckpoint.path_for(first, job.per, folder, job.format)
+        if resume and checkpoint.exists():
+            previous = DownloadCheckpoint(first, job.per, folder, job.format)
+            job.skip = previous.completed()
+            job.records = previous.records()
+        outfile = download_all(first, outfile, folder, per=job.per, workers=workers, delay=0, resume=resume,
+                               format=job.format)
+        job.outfile = str(outfile) if outfile else None
+        if checkpoint.exists():
+            job.status = "incompleto"
+        elif job.total is not None and job.records != job.total:
+            job.status = "incompleto"
+            job.error = f"Se descargaron {job.records} de {job.total} registros"
+        else:
+            job.status = "completo"
+    except Exception as e:
+        job.status = "error"
+        job.error = f"{type(e).__name__}: {e}"
+    finally:
+        job.seconds = time.monotonic() - start
+    return job
+
+
+def run(spec, token, folder=None, concurrency=None, parallel=None, rate=None, resume=True, count_totals=True,
+        dry_run=False, url_base=None):
+    """
+    Corre todas las consultas de una especificación. `url_base` reemplaza la URL de la API solo en
+    el cliente de esta corrida (por ejemplo, para probar contra benchmarks/stub_server.py).
+
+    Returns:
+        summary (dict): Resumen de la corrida (también se guarda en <folder>/denue-run-*.json).
+    """
+    folder = Path(folder or spec.get("folder", "."))
+    folder.mkdir(parents=True, exist_ok=True)
+    concurrency = int(concurrency or spec.get("concurrency", 4))
+    parallel = int(parallel or spec.get("parallel", 2))
+    rate = rate or spec.get("rate")
+    jobs = expand_jobs(spec)
+
+    state_path = folder / STATE_FILE
+    state = json.loads(state_path.read_text(encoding="utf-8")) if resume and state_path.exists() else {}
+    stats = RequestStats()
+    progress = Progress(jobs)
+    limiter = RateLimiter(rate=float(rate), burst=max(1, concurrency), adaptive=True) if rate else None
+    cache = ResponseCache(spec["cache"]) if spec.get("cache") else None
+    client = BatchClient(token, concurrency=concurrency, progress=progress, rate_limiter=limiter, cache=cache,
+                         max_retries=int(spec.get("max_retries", 5)), instrumentation=Instrumentation(stats))
+    if url_base:
+        client.URL_BASE = url_base
+
+    pending = []
+    for job in jobs:
+        previous = state.get(job.name)
+        if previous and previous["status"] == "completo" and previous.get("outfile") and Path(previous["outfile"]).exists():
+            job.status, job.records, job.outfile, job.total = "completo", previous["records"], previous["outfile"], previous["total"]
+        else:
+            pending.append(job)
+    if count_totals:
+        for job in pending:
+            try:
+                job.total = expected_total(client, job)
+            except Exception:
+                job.total = None
+
+    if dry_run:
+        for job in jobs:
+            total = "?" if job.total is None else job.total
+            print(f"{job.name:<30} {job.endpoint:<18} {job.status:<10} {total:>10} {job.params}")
+        client.close()
+        return None
+
+    started = time.time()
+    print(f"{len(pending)} consultas por descargar ({len(jobs) - len(pending)} ya completas) en {folder.resolve()}",
+          file=sys.stderr)
+    lock = threading.Lock()
+    workers = max(1, concurrency // max(1, min(parallel, len(pending) or 1)))
+
+    def work(job):
+        run_job(client.for_job(job), job, folder, workers, resume)
+        with lock:
+            state[job.name] = {key: value for key, value in asdict(job).items() if key != "skip"}
+            tmp = state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, state_path)
+        progress.show(force=True)
+
+    # Los mensajes de download_all de cada consulta van a un log; en la terminal queda el avance global
+    with open(folder / "denue-run.log", "a", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            list(executor.map(work, sorted(pending, key=lambda job: job.total or 0, reverse=True)))
+    client.close()
+    progress.show(force=True)
+    print(file=sys.stderr)
+
+    elapsed = time.time() - started
+    summary = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "seconds": elapsed,
+        "records": progress.records,
+        "records_per_second": progress.records / elapsed if elapsed else 0.0,
+        "concurrency": concurrency,
+        "parallel": parallel,
+        "rate": rate,
+        "jobs": [{key: value for key, value in asdict(job).items() if key != "skip"} for job in jobs],
+        "requests": stats.summary(),
+    }
+    path = folder / f"denue-run-{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}.json"
+    path.write_text(json.dumps(summary, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+
+    failed = [job for job in jobs if job.status != "completo"]
+    print(f"Terminado: {len(jobs) - len(failed)}/{len(jobs)} consultas completas, {progress.records} registros "
+          f"en {elapsed:.1f} s. Resumen en {path.resolve()}", file=sys.stderr)
+    for job in failed:
+        print(f"  {job.name}: {job.status}. {job.error or ''}", file=sys.stderr)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="denue", description="Extractor masivo del DENUE a partir de una "
+                                                               "especificación YAML o JSON.")
+    parser.add_argument("spec", type=Path, help="Especificación de las consultas (.yaml, .yml o .json)")
+    parser.add_argument("--token", help="Token de la API. Por defecto el de la especificación o INEGI_TOKEN")
+    parser.add_argument("--folder", help="Carpeta de salida. Por defecto la de la especificación")
+    parser.add_argument("--concurrency", type=int, help="Solicitudes simultáneas en total")
+    parser.add_argument("--parallel", type=int, help="Consultas que se descargan al mismo tiempo")
+    parser.add_argument("--rate", type=float, help="Solicitudes por segundo, compartidas por todas las consultas")
+    parser.add_argument("--no-resume", action="store_true", help="Descarga todo de nuevo, sin puntos de control")
+    parser.add_argument("--no-count", action="store_true", help="No consulta los totales con Cuantificar (sin ETA exacto)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo muestra las consultas y sus totales")
+    parser.add_argument("--url-base", help=argparse.SUPPRESS)  # para probar contra benchmarks/stub_server.py
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    token = args.token or spec.get("token") or os.environ.get("INEGI_TOKEN")
+    if not token:
+        parser.error("Se requiere un token: --token, `token` en la especificación o INEGI_TOKEN")
+    summary = run(spec, token, folder=args.folder, concurrency=args.concurrency, parallel=args.parallel,
+                  rate=args.rate, resume=not args.no_resume, count_totals=not args.no_count, dry_run=args.dry_run,
+                  url_base=args.url_base)
+    if summary and any(job["status"] != "completo" for job in summary["jobs"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
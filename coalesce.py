@@ -0,0 +1,151 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+
+_MISSING = object()
+
+
+class RequestCoalescer:
+    """
+    Agrupa las consultas idénticas que están en curso al mismo tiempo (single-flight): la primera
+    hace la solicitud a la API y las demás esperan y reciben el mismo Result, sin otra solicitud.
+    Los Result terminados se guardan además en un LRU en memoria durante `ttl` segundos, para las
+    consultas que se repiten muchas veces en poco tiempo. Funciona entre hilos (DenueInegiClient) y
+    entre tareas de asyncio (AsyncDenueInegiClient).
+
+    Como el Result se comparte entre todos los que hicieron la misma consulta, no se debe modificar
+    su `data`.
+
+    Ejemplo:
+        coalescer = RequestCoalescer(ttl=5)
+        denue_inegi = DenueInegiClient(token, coalescer=coalescer)
+        ...
+        print(coalescer.stats())  # {'requests': ..., 'coalesced': ..., 'hit_rate': ..., ...}
+
+    Parámetros:
+        ttl (float, optional): Segundos que un Result se sigue devolviendo desde memoria. 0 para solo
+            agrupar las consultas en curso. Valor por defecto es 5.
+        max_entries (int, optional): Número máximo de Result en memoria. Valor por defecto es 1024.
+    """
+
+    def __init__(self, ttl=5.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.requests = 0
+        self.coalesced = 0
+        self.memory_hits = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (expira, Result)
+        self._inflight = {}  # clave -> Future
+        self._async_inflight = {}  # (event loop, clave) -> asyncio.Task
+
+    def _lookup(self, key):
+        # Se llama con self._lock tomado
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires, result = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key, result):
+        # Se llama con self._lock tomado
+        if not self.ttl or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def call(self, key, func):
+        """
+        Devuelve func() para la clave, ejecutándolo solo si no hay un resultado vigente en memoria
+        ni otra llamada en curso con la misma clave. Si func() falla, todas las llamadas que lo
+        esperaban reciben la misma excepción y no se guarda nada.
+        """
+        with self._lock:
+            self.requests += 1
+            result = self._lookup(key)
+            if result is not _MISSING:
+                self.memory_hits += 1
+                return result
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._store(key, result)
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    async def acall(self, key, func):
+        """
+        Versión asíncrona de call: `func` es una función que devuelve una corrutina. La corrutina
+        corre en su propia tarea, así que si se cancela una de las llamadas que la esperan, las
+        demás no se ven afectadas.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.requests += 1
+            result = self._lookup(key)
+            if result is not _MISSING:
+                self.memory_hits += 1
+                return result
+            task = self._async_inflight.get((loop, key))
+            if task is None:
+                task = self._async_inflight[(loop, key)] = loop.create_task(func())
+                task.add_done_callback(partial(self._async_done, loop, key))
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _async_done(self, loop, key, task):
+        with self._lock:
+            self._async_inflight.pop((loop, key), None)
+            # task.exception() también marca la excepción como recibida si nadie esperaba la tarea
+            if not task.cancelled() and task.exception() is None:
+                self._store(key, task.result())
+
+    def clear(self):
+        """Elimina los Result guardados en memoria (no afecta las consultas en curso)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+            stats (dict): {"requests", "coalesced", "memory_hits", "network", "coalesce_rate",
+                "hit_rate", "inflight", "entries"}. coalesce_rate es la fracción de consultas que se
+                unieron a una solicitud en curso y hit_rate la que no usó la red (agrupadas o en memoria).
+        """
+        with self._lock:
+            requests = self.requests
+            saved = self.coalesced + self.memory_hits
+            return {
+                "requests": requests,
+                "coalesced": self.coalesced,
+                "memory_hits": self.memory_hits,
+                "network": requests - saved,
+                "coalesce_rate": self.coalesced / requests if requests else 0.0,
+                "hit_rate": saved / requests if requests else 0.0,
+                "inflight": len(self._inflight) + len(self._async_inflight),
+                "entries": len(self._entries),
+            }
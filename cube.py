@@ -0,0 +1,111 @@
+import csv
+import pandas as pd
+from offline import _keys
+from utils import RecordsResult
+from catalog import AREA_LEVELS, SCIAN_LEVELS
+
+
+def _split(claves):
+    # Igual que Cuantificar: claves separadas por coma, sin espacios
+    if isinstance(claves, str):
+        claves = claves.replace(" ", "").split(",")
+    return [str(clave) for clave in claves]
+
+
+class CuantificarCube:
+    """
+    Conteos precalculados de establecimientos para todas las combinaciones de prefijo del área
+    geográfica (0, 2, 5 y 9 dígitos), prefijo SCIAN (0 y 2 a 6 dígitos) y estrato, construidos con
+    group-bys de pandas sobre un conjunto de datos local. Responde consultas con la forma de
+    Cuantificar sin usar la API, incluyendo miles de combinaciones en una sola llamada.
+
+    Ejemplo:
+        cube = CuantificarCube(LocalIndex.from_snapshot(store).records)
+        cube.Cuantificar("46,81", "09,15")
+        cube.drill_down(actividad="46", area="09")  # subsectores del 46 × municipios de la CDMX
+
+    Parámetros:
+        records (iterable): Establecimientos (dicts) como los acepta LocalIndex.
+    """
+
+    def __init__(self, records):
+        rows = []
+        for record in records:
+            geo, clase, estrato = _keys(record)
+            geo = geo + [""] * (3 - len(geo))
+            rows.append((geo[0], geo[1], geo[2] if len(geo[2]) == 9 else "", clase, estrato))
+        frame = pd.DataFrame(rows, columns=["entidad", "municipio", "localidad", "clase", "estrato"])
+        # Primero se agrupa al nivel más detallado; los demás niveles se calculan sobre ese resultado
+        base = frame.groupby(list(frame.columns), sort=False).size().rename("n").reset_index()
+        self.total = len(frame)
+
+        levels = []
+        for area in [None, *AREA_LEVELS]:
+            ag = pd.Series("0", index=base.index) if area is None else base[area]
+            for width in [0, *SCIAN_LEVELS.values()]:
+                ae = pd.Series("0", index=base.index) if width == 0 else base["clase"].str[:width]
+                valid = (ag != "") & (ae.str.len() == (width or 1))
+                for estrato in (None, base["estrato"]):
+                    es = pd.Series("0", index=base.index) if estrato is None else estrato
+                    keys = pd.DataFrame({"AE": ae, "AG": ag, "estrato": es})[valid]
+                    levels.append(base["n"][valid].groupby([keys["AE"], keys["AG"], keys["estrato"]]).sum())
+        self.counts = pd.concat(levels).sort_index()
+
+    @classmethod
+    def from_csv(cls, *paths, encoding="utf-8"):
+        """Construye el cubo a partir de uno o varios CSV (de download_all_to_csv o de la descarga masiva)."""
+        def records():
+            for path in paths:
+                with open(path, newline="", encoding=encoding) as f:
+                    yield from csv.DictReader(f)
+        return cls(records())
+
+    def lookup(self, keys):
+        """
+        Conteos de una lista de tuplas (actividad, area, estrato) con una sola búsqueda vectorizada.
+        Las combinaciones sin establecimientos valen 0.
+        """
+        index = pd.MultiIndex.from_tuples([tuple(str(k) for k in key) for key in keys], names=["AE", "AG", "estrato"])
+        return self.counts.reindex(index, fill_value=0).to_numpy()
+
+    def Cuantificar(self, actividad_economica="0", area_geografica="0", estrato="0") -> RecordsResult:
+        """
+        Igual que DenueInegiClient.Cuantificar, pero desde el cubo: un registro {"AE", "AG", "Total"}
+        por cada combinación de las claves separadas por coma.
+        """
+        keys = [(actividad, area, str(estrato))
+                for actividad in _split(actividad_economica) for area in _split(area_geografica)]
+        totals = self.lookup(keys)
+        return RecordsResult([{"AE": actividad, "AG": area, "Total": int(total)}
+                              for (actividad, area, _), total in zip(keys, totals)], "Cuantificar")
+
+    def matrix(self, actividades, areas, estrato="0"):
+        """
+        Matriz de conteos actividades × áreas en una sola llamada.
+
+        Returns:
+            df (pd.DataFrame): Índice con las actividades y columnas con las áreas.
+        """
+        actividades, areas = _split(actividades), _split(areas)
+        totals = self.lookup([(actividad, area, estrato) for actividad in actividades for area in areas])
+        return pd.DataFrame(totals.reshape(len(actividades), len(areas)), index=actividades, columns=areas)
+
+    def children(self, clave, kind="area"):
+        """Claves del siguiente nivel (área o actividad) con al menos un establecimiento."""
+        widths = list(AREA_LEVELS.values()) if kind == "area" else list(SCIAN_LEVELS.values())
+        clave = str(clave)
+        level = 0 if clave in ("0", "00") else len(clave)
+        following = [width for width in widths if width > level]
+        if not following:
+            return []
+        values = self.counts.index.get_level_values("AG" if kind == "area" else "AE").unique()
+        prefix = "" if level == 0 else clave
+        return sorted(value for value in values if len(value) == following[0] and value.startswith(prefix))
+
+    def drill_down(self, actividad="0", area="0", estrato="0"):
+        """
+        Baja un nivel en ambas jerarquías a la vez: matriz de las actividades hijas de `actividad`
+        (sector, subsector, ...) por las áreas hijas de `area` (entidades, municipios, localidades).
+        """
+        return self.matrix(self.children(actividad, "actividad") or [actividad],
+                           self.children(area, "area") or [area], estrato)
@@ -0,0 +1,84 @@
+import json
+import importlib
+import importlib.util
+
+# orjson y msgspec son opcionales (aceleran la decodificación de respuestas grandes). Para no
+# alargar el arranque solo se verifica si están instalados y se importan con la primera respuesta.
+orjson = None
+msgspec = None
+
+
+def _installed(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def _load(name):
+    module = globals()[name]
+    if module is None:
+        module = globals()[name] = importlib.import_module(name)
+    return module
+
+
+def _is_utf8(encoding):
+    return encoding.lower().replace('-', '').replace('_', '') == 'utf8'
+
+
+def json_decode(content, encoding='utf-8'):
+    return json.loads(content.decode(encoding))
+
+
+def orjson_decode(content, encoding='utf-8'):
+    # orjson solo acepta UTF-8; cualquier otra codificación se convierte primero
+    if not _is_utf8(encoding):
+        content = content.decode(encoding).encode('utf-8')
+    return _load("orjson").loads(content)
+
+
+def msgspec_decode(content, encoding='utf-8'):
+    if not _is_utf8(encoding):
+        content = content.decode(encoding).encode('utf-8')
+    return _load("msgspec").json.decode(content)
+
+
+def raw_decode(content, encoding='utf-8'):
+    # No decodifica: conserva los bytes para procesarlos después (por ejemplo en otro proceso).
+    # Una respuesta sin registros queda como b"" para que Result.is_empty() la reconozca.
+    return b"" if content.strip() == b"[]" else content
+
+
+DECODERS = {
+    "orjson": (orjson_decode, lambda: _installed("orjson")),
+    "msgspec": (msgspec_decode, lambda: _installed("msgspec")),
+    "json": (json_decode, lambda: True),
+    "raw": (raw_decode, lambda: True),
+}
+
+_default = None
+
+
+def get_decoder(name=None):
+    """
+    Devuelve la función que convierte el contenido (bytes) de una respuesta en objetos de Python.
+
+    Parámetros:
+        name (str, optional): "orjson", "msgspec" o "json". Si no se especifica se usa el decoder
+            por defecto: el primero instalado en ese orden, o el definido con set_default_decoder.
+            "raw" no decodifica y deja los bytes de la respuesta en Result.data.
+    """
+    if name is None:
+        return _default
+    if name not in DECODERS:
+        raise ValueError(f"Invalid decoder: {name}. Valid decoders: {tuple(DECODERS)}")
+    decode, available = DECODERS[name]
+    if not available():
+        raise ImportError(f"El decoder {name} no está instalado: pip install {name}")
+    return decode
+
+
+def set_default_decoder(name):
+    """Define el decoder que usan todos los Result creados a partir de ahora."""
+    global _default
+    _default = get_decoder(name)
+
+
+_default = next(decode for decode, available in DECODERS.values() if available())
@@ -1,13 +1,108 @@
-import requests
 from models import Entidad
-from utils import Result, PaginatedResult
-from utils import make_request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import Result, PaginatedResult, RecordsResult
+from decoders import get_decoder
+from tiling import Area, RecordIndex, hex_cover, split, MAX_DISTANCIA
+from utils import make_request, make_session
+from ratelimit import RateLimiter, RetryPolicy
+from cache import ResponseCache
+from metrics import Instrumentation
+from coalesce import RequestCoalescer
+from catalog import Catalog, normalize_code, normalize_area, split_codes
 
 class DenueInegiClient:
     URL_BASE = "https://www.inegi.org.mx/app/api/denue/v1/consulta/"
 
-    def __init__(self, token):
+    def __init__(
+            self,
+            token,
+            pool_maxsize: int = 10,
+            max_retries: int | RetryPolicy = 3,
+            timeout: float | tuple = (10, 60),
+            rate_limiter: RateLimiter | None = None,
+            cache: ResponseCache | None = None,
+            decoder: str | None = None,
+            instrumentation: Instrumentation | None = None,
+            coalescer: RequestCoalescer | None = None,
+            catalog: Catalog | None = None
+    ):
+        """
+        Cliente de la API del DENUE. Todas las consultas comparten una sesión HTTP con un pool de
+        conexiones persistentes, por lo que las páginas consecutivas reutilizan la misma conexión TLS.
+
+        Parámetros:
+            token (str): Token de acceso a la API del INEGI.
+            pool_maxsize (int, optional): Número máximo de conexiones abiertas simultáneamente.
+                Valor por defecto es 10.
+            max_retries (int | RetryPolicy, optional): Reintentos ante errores de conexión, timeouts y
+                respuestas 429/5xx, con espera exponencial con jitter que respeta Retry-After.
+                Valor por defecto es 3.
+            timeout (float | tuple, optional): Tiempo máximo de espera en segundos, o una tupla
+                (conexión, lectura). Valor por defecto es (10, 60).
+            rate_limiter (RateLimiter, optional): Limitador de tasa que se aplica a todas las solicitudes.
+                Se puede compartir entre varios clientes, hilos y tareas. Valor por defecto es None.
+            cache (ResponseCache, optional): Caché persistente de respuestas. Valor por defecto es None.
+            decoder (str, optional): Decodificador JSON: "orjson", "msgspec" o "json". Por defecto se usa
+                el más rápido que esté instalado.
+            instrumentation (Instrumentation, optional): Recibe los eventos de cada solicitud (inicio, fin,
+                reintentos, aciertos de caché, respuestas sin datos y errores). Valor por defecto es None.
+            coalescer (RequestCoalescer, optional): Agrupa las consultas idénticas que se hacen al mismo
+                tiempo desde varios hilos en una sola solicitud y guarda los resultados recientes en
+                memoria. Valor por defecto es None.
+            catalog (Catalog, optional): Valida las claves de entidad, municipio, actividad y área antes de
+                hacer la solicitud y lanza ValueError si alguna no existe. Valor por defecto es None.
+        """
         self._token = token
+        self._timeout = timeout
+        self._retry = max_retries if isinstance(max_retries, RetryPolicy) else RetryPolicy(max_retries)
+        self._rate_limiter = rate_limiter
+        self._cache = cache
+        self._decoder = decoder
+        self._instrumentation = instrumentation
+        self._coalescer = coalescer
+        self._catalog = catalog
+        self._pool_maxsize = pool_maxsize
+        self._session = self._open_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra las conexiones abiertas del pool."""
+        if self._session is not None:
+            self._session.close()
+
+    def _open_session(self):
+        # Los reintentos los maneja make_request con self._retry, no el adaptador de la sesión
+        return make_session(pool_maxsize=self._pool_maxsize, max_retries=0)
+
+    def _request(self, endpoint, parametros, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        return make_request(self.URL_BASE, endpoint, parametros, self._token, session=self._session,
+                            rate_limiter=self._rate_limiter, retry=self._retry, cache=self._cache,
+                            instrumentation=self._instrumentation, **kwargs)
+
+    def _coalesce_key(self, endpoint, parametros, decoder=None):
+        # Los parámetros ya están normalizados (claves con ceros, separadores); el token no importa
+        return self.URL_BASE, endpoint, tuple(parametros), decoder or self._decoder
+
+    def _call(self, endpoint, parametros, method=None, params=None, decoder=None):
+        if self._coalescer is not None:
+            key = self._coalesce_key(endpoint, parametros, decoder)
+            return self._coalescer.call(key, lambda: self._wrap(self._request(endpoint, parametros), method, params,
+                                                                decoder))
+        response = self._request(endpoint, parametros)
+        return self._wrap(response, method, params, decoder)
+
+    def _wrap(self, response, method=None, params=None, decoder=None):
+        # `decoder` reemplaza al del cliente solo en esta consulta; como queda en params, las páginas
+        # siguientes también lo usan
+        if method is None:
+            return Result(response, decoder=decoder or self._decoder)
+        return PaginatedResult(method, params, response, decoder=decoder or self._decoder)
 
     def Buscar(
             self,
@@ -50,9 +145,7 @@ class DenueInegiClient:
             str(distancia)
         ]
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
-
-        return Result(response)
+        return self._call(endpoint, parametros)
 
     def Ficha(
             self,
@@ -74,9 +167,110 @@ class DenueInegiClient:
             str(id_establecimiento)  # Asegurando que el id_establecimiento sea una cadena
         ]
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
+        return self._call(endpoint, parametros)
+
+    def Ficha_many(
+            self,
+            ids,
+            workers: int = 10,
+            store=None
+    ) -> RecordsResult:
+        """
+        Obtiene la información de muchos establecimientos en paralelo. Los ids repetidos se consultan
+        una sola vez y los que ya están en `store` no se vuelven a consultar.
+
+        Parámetros:
+            ids (iterable): Claves únicas de los establecimientos.
+            workers (int, optional): Número de consultas simultáneas. Conviene que no sea mayor que
+                pool_maxsize del cliente. Valor por defecto es 10.
+            store (MutableMapping, optional): Almacén local {id: registros} (por ejemplo un dict o un
+                shelve). Los ids que ya contiene se toman de ahí y los nuevos se agregan.
+                Valor por defecto es None.
+
+        Returns:
+            result (RecordsResult): Todos los registros en el orden de `ids`; `result.failures`
+                contiene {id: excepción} de las consultas que fallaron.
+        """
+        ids = list(dict.fromkeys(str(id_establecimiento) for id_establecimiento in ids))
+        store = store if store is not None else {}
+        decode = get_decoder(self._decoder)
+
+        def ficha(id_establecimiento):
+            # Se decodifica directamente, sin crear un Result por cada establecimiento
+            response = self._request("Ficha", [id_establecimiento])
+            return decode(response.content, 'utf-8')
+
+        found, failures = {}, {}
+        pending = [id_establecimiento for id_establecimiento in ids if id_establecimiento not in store]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(ficha, id_establecimiento): id_establecimiento for id_establecimiento in pending}
+            for future in as_completed(futures):
+                id_establecimiento = futures[future]
+                try:
+                    found[id_establecimiento] = future.result()
+                except Exception as e:
+                    failures[id_establecimiento] = e
+                else:
+                    store[id_establecimiento] = found[id_establecimiento]
+
+        records = []
+        for id_establecimiento in ids:
+            records.extend(found.get(id_establecimiento) or store.get(id_establecimiento) or [])
+        return RecordsResult(records, "Ficha", failures)
+
+    def Buscar_area(
+            self,
+            area,
+            condicion: str = "todos",
+            match_type: str = "any",
+            radius: float = MAX_DISTANCIA,
+            workers: int = 8,
+            max_results: int = 1000,
+            max_depth: int = 3,
+            clip: bool = True
+    ) -> RecordsResult:
+        """
+        Realiza una consulta Buscar sobre un área de cualquier tamaño. El área se cubre con círculos
+        en una malla hexagonal que se consultan en paralelo; los círculos que devuelven max_results
+        registros o más se consideran truncados y se dividen en 7 círculos de la mitad del radio.
+        Los establecimientos repetidos entre círculos se eliminan por Id.
+
+        Parámetros:
+            area (tuple | list): Caja (lat_min, lon_min, lat_max, lon_max) o polígono [(lat, lon), ...].
+            condicion (str, optional): Igual que en Buscar. Valor por defecto es "todos".
+            match_type (str, optional): Igual que en Buscar. Valor por defecto es "any".
+            radius (float, optional): Radio de los círculos en metros (máximo 5000). Valor por defecto es 5000.
+            workers (int, optional): Número de consultas simultáneas. Valor por defecto es 8.
+            max_results (int, optional): Número de registros a partir del cual se asume que la respuesta
+                de un círculo está truncada. Valor por defecto es 1000.
+            max_depth (int, optional): Número máximo de subdivisiones de un círculo. Valor por defecto es 3.
+            clip (bool, optional): Descartar los establecimientos fuera del área. Valor por defecto es True.
 
-        return Result(response)
+        Returns:
+            result (RecordsResult): Establecimientos del área; `result.failures` contiene {Tile: excepción}.
+        """
+        area = Area(area)
+        index = RecordIndex(area if clip else None)
+        tiles = hex_cover(area, min(radius, MAX_DISTANCIA))
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            while tiles:
+                futures = {
+                    executor.submit(self.Buscar, condicion, tile.coordenadas, tile.distancia, match_type): tile
+                    for tile in tiles
+                }
+                tiles = []
+                for future in as_completed(futures):
+                    tile = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failures[tile] = e
+                        continue
+                    if len(result.data) >= max_results and tile.depth < max_depth:
+                        tiles.extend(child for child in split(tile) if area.intersects(child))
+                    index.add(result.data)
+        return RecordsResult(index.values(), "Buscar", failures)
 
     def Nombre(
             self,
@@ -84,7 +278,8 @@ class DenueInegiClient:
             entidad_federativa: str | Entidad = "00",
             registro_inicial: int = 1,
             registro_final: int = 10,
-            match_type: str = "all"
+            match_type: str = "all",
+            decoder: str | None = None
     ) -> PaginatedResult:
         """
         Realiza una consulta de todos los establecimientos por nombre o razón social y
@@ -100,6 +295,8 @@ class DenueInegiClient:
                 los resultados de la búsqueda. Valor por defecto es 1.
             registro_final (int, optional): Número de registro final que se mostrará en los
                 resultados de la búsqueda. Valor por defecto es 10.
+            decoder (str, optional): Decoder de esta página y de las siguientes, en lugar del decoder del
+                cliente (ver decoders.get_decoder). Valor por defecto es None.
 
         Returns:
             response (requests.Response): Respuesta de la solicitud a la API.
@@ -115,9 +312,7 @@ class DenueInegiClient:
             str(registro_final)
         ]
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
-
-        return PaginatedResult(self.Nombre, params, response)
+        return self._call(endpoint, parametros, self.Nombre, params, decoder)
 
     def BuscarEntidad(
             self,
@@ -125,7 +320,8 @@ class DenueInegiClient:
             entidad_federativa: str | Entidad = "00",
             registro_inicial: int = 1,
             registro_final: int = 10,
-            match_type: str = "default"
+            match_type: str = "default",
+            decoder: str | None = None
     ) -> PaginatedResult:
         """
         Realiza una consulta de todos los establecimientos y puede ser acotada por entidad federativa.
@@ -150,6 +346,8 @@ class DenueInegiClient:
                 Si "all" entonces devuelve todos los registros en los que coincidan todas las palabras en condicion.
                 Cualquier valor no reconocido en match_type se considera "default".
                 Valor por defecto es "default".
+            decoder (str, optional): Decoder de esta página y de las siguientes, en lugar del decoder del
+                cliente (ver decoders.get_decoder). Valor por defecto es None.
 
         Returns:
             response (requests.Response): Respuesta de la solicitud a la API.
@@ -165,15 +363,10 @@ class DenueInegiClient:
             str(registro_inicial),
             str(registro_final)
         ]
+        if self._catalog is not None:
+            self._catalog.check(entidad=parametros[1])
 
-        try:
-            response = make_request(self.URL_BASE, endpoint, parametros, self._token)
-        except requests.exceptions.Timeout as e:
-            raise requests.exceptions.Timeout
-        except requests.exceptions.RequestException as e:
-            raise requests.exceptions.RequestException
-
-        return PaginatedResult(self.BuscarEntidad, params, response)
+        return self._call(endpoint, parametros, self.BuscarEntidad, params, decoder)
 
     def BuscarAreaAct(
             self,
@@ -181,7 +374,8 @@ class DenueInegiClient:
             entidad_federativa: str | Entidad = "00",
             registro_inicial: int = 1,
             registro_final: int = 10,
-            match_type: str = "any"
+            match_type: str = "any",
+            decoder: str | None = None
     ) -> PaginatedResult:
         """
         Realiza una consulta de todos los establecimientos con la opción de acotar la búsqueda
@@ -206,6 +400,8 @@ class DenueInegiClient:
                 devuelve todos los registros en los que coincidan todas las palabras en condicion. Cualquier match_type
                 no reconocido se considera "any".
                 Valor por defecto es "any".
+            decoder (str, optional): Decoder de esta página y de las siguientes, en lugar del decoder del
+                cliente (ver decoders.get_decoder). Valor por defecto es None.
 
         Returns:
             response (requests.Response): Respuesta de la solicitud a la API.
@@ -222,9 +418,7 @@ class DenueInegiClient:
             str(registro_final)
         ]
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
-
-        return PaginatedResult(self.BuscarAreaAct, params, response)
+        return self._call(endpoint, parametros, self.BuscarAreaAct, params, decoder)
 
     def BuscarAreaActEstr(
             self,
@@ -241,7 +435,8 @@ class DenueInegiClient:
             registro_inicial: int = 1,
             registro_final: int = 10,
             id_establecimiento: str = "0",
-            estrato: str = "0"
+            estrato: str = "0",
+            decoder: str | None = None
     ) -> PaginatedResult:
         """
         Realiza una consulta de todos los establecimientos con la opción de acotar la búsqueda por
@@ -284,6 +479,8 @@ class DenueInegiClient:
                 6. Para incluir de 101 a 250 personas.
                 7. Para incluir de 251 y más personas.
                 Valor por defecto es "0".
+            decoder (str, optional): Decoder de esta página y de las siguientes, en lugar del decoder del
+                cliente (ver decoders.get_decoder). Valor por defecto es None.
 
         Returns:
             response (requests.Response): Respuesta de la solicitud a la API.
@@ -294,24 +491,26 @@ class DenueInegiClient:
         # Aplicando las transformaciones necesarias a los parámetros
         parametros = [
             Entidad.normalize(entidad_federativa),
-            municipio.zfill(3),
-            localidad.zfill(4),
-            ageb.zfill(4),
-            manzana.zfill(3),
-            sector.zfill(2),
-            subsector.zfill(3),
-            rama.zfill(4),
-            clase.zfill(6),
+            normalize_code(municipio, 3),
+            normalize_code(localidad, 4),
+            normalize_code(ageb, 4),
+            normalize_code(manzana, 3),
+            normalize_code(sector, 2),
+            normalize_code(subsector, 3),
+            normalize_code(rama, 4),
+            normalize_code(clase, 6),
             nombre_del_establecimiento,
             str(registro_inicial),
             str(registro_final),
             id_establecimiento,
             estrato
         ]
+        if self._catalog is not None:
+            # Basta validar la clave SCIAN más específica que se indicó (clase, rama, subsector o sector)
+            actividad = next((code for code in reversed(parametros[5:9]) if code.strip("0")), "0")
+            self._catalog.check(entidad=parametros[0], municipio=parametros[1], actividad=actividad)
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
-
-        return PaginatedResult(self.BuscarAreaActEstr, params, response)
+        return self._call(endpoint, parametros, self.BuscarAreaActEstr, params, decoder)
 
     def Cuantificar(
             self,
@@ -358,9 +557,11 @@ class DenueInegiClient:
         endpoint = "Cuantificar"
 
         # Aplicando las transformaciones necesarias a los parámetros
-        # Asegurando que las claves estén separadas por coma sin espacios
-        actividad_economica = actividad_economica.replace(" ", "").strip()
-        area_geografica = area_geografica.replace(" ", "").strip()
+        # Asegurando que las claves estén separadas por coma sin espacios y con sus ceros a la izquierda
+        actividad_economica = split_codes(actividad_economica)
+        area_geografica = split_codes(area_geografica, normalize_area)
+        if self._catalog is not None:
+            self._catalog.check(actividad=actividad_economica, area=area_geografica)
 
         parametros = [
             actividad_economica,
@@ -368,6 +569,10 @@ class DenueInegiClient:
             estrato
         ]
 
-        response = make_request(self.URL_BASE, endpoint, parametros, self._token)
+        return self._call(endpoint, parametros)
+
 
-        return Result(response)
+if __name__ == "__main__":
+    # python denue.py extraccion.yaml: extractor masivo desde la línea de comandos (ver cli.py)
+    from cli import main
+    main()
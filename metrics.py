@@ -0,0 +1,226 @@
+import time
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+EVENTS = ("start", "retry", "end", "cache_hit", "no_data", "error")
+
+
+@dataclass
+class RequestEvent:
+    """
+    Evento de una solicitud a la API.
+
+    event es uno de:
+        "start": inicia un intento (attempt 0, 1, ...).
+        "retry": el intento falló y se reintentará después de `wait` segundos.
+        "end": la solicitud terminó con `status` (204 si la API respondió sin datos).
+        "cache_hit": la respuesta se tomó de la caché, sin usar la red.
+        "no_data": la API respondió que la consulta no tiene datos (NoDataResponse).
+        "error": la solicitud falló definitivamente con `error`.
+    """
+    event: str
+    endpoint: str
+    url: str
+    attempt: int = 0
+    status: int | None = None
+    latency: float | None = None
+    bytes: int = 0
+    wait: float | None = None
+    error: Exception | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class Instrumentation:
+    """
+    Punto de registro de callbacks para los eventos de todas las solicitudes de un cliente.
+    Los callbacks se ejecutan en el hilo (o la tarea) que hace la solicitud, así que deben ser rápidos.
+
+    Ejemplo:
+        stats = RequestStats()
+        hooks = Instrumentation(stats)
+        hooks.on("retry", lambda e: print(f"Reintentando {e.endpoint} en {e.wait:.1f} s"))
+        denue_inegi = DenueInegiClient(token, instrumentation=hooks)
+
+    Parámetros:
+        *listeners (callable): Callbacks que reciben todos los eventos, por ejemplo un RequestStats.
+    """
+
+    def __init__(self, *listeners):
+        self._callbacks = []
+        for listener in listeners:
+            self.subscribe(listener)
+
+    def on(self, event, callback, endpoint=None):
+        """Registra `callback(RequestEvent)` para un tipo de evento, opcionalmente de un solo endpoint."""
+        if event not in EVENTS:
+            raise ValueError(f"Invalid event: {event}. Valid events: {EVENTS}")
+        self._callbacks.append((event, endpoint, callback))
+        return callback
+
+    def subscribe(self, listener, endpoint=None):
+        """Registra `listener(RequestEvent)` para todos los eventos."""
+        self._callbacks.append((None, endpoint, listener))
+        return listener
+
+    def emit(self, event, endpoint, url, **fields):
+        request_event = RequestEvent(event, endpoint, url, **fields)
+        for name, only, callback in self._callbacks:
+            if (name is None or name == event) and (only is None or only == endpoint):
+                try:
+                    callback(request_event)
+                except Exception as e:  # un callback con errores no debe interrumpir la descarga
+                    print(f"Error in instrumentation callback {callback!r}: {e}")
+
+
+class _EndpointStats:
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)  # solo para los percentiles
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.no_data = 0
+        self.bytes = 0
+        self.statuses = defaultdict(int)
+
+
+class RequestStats:
+    """
+    Estadísticas en memoria por endpoint: solicitudes, errores, reintentos, aciertos de caché,
+    respuestas sin datos, bytes recibidos, latencia p50/p95/p99 y solicitudes por segundo.
+    Se registra como listener de un Instrumentation.
+
+    Parámetros:
+        window (int, optional): Número de latencias recientes por endpoint con las que se calculan
+            los percentiles. Valor por defecto es 10000.
+    """
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: _EndpointStats(self.window))
+
+    def __call__(self, event):
+        with self._lock:
+            stats = self._endpoints[event.endpoint]
+            if event.event == "end":
+                stats.requests += 1
+                stats.statuses[event.status] += 1
+                stats.bytes += event.bytes
+                if event.latency is not None:
+                    stats.latencies.append(event.latency)
+            elif event.event == "error":
+                stats.requests += 1
+                stats.errors += 1
+            if event.event in ("end", "error") and event.latency is not None:
+                # _sum y _count de Prometheus son acumulados: incluyen los errores y no dependen de window
+                stats.latency_sum += event.latency
+                stats.latency_count += 1
+            elif event.event == "retry":
+                stats.retries += 1
+            elif event.event == "cache_hit":
+                stats.cache_hits += 1
+                stats.bytes += event.bytes
+            elif event.event == "no_data":
+                stats.no_data += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started = time.monotonic()
+
+    def summary(self):
+        """
+        Returns:
+            summary (dict): {endpoint: {"requests", "errors", "error_rate", "retries", "cache_hits",
+                "no_data", "bytes", "throughput", "p50", "p95", "p99", "statuses"}}. Las latencias
+                están en segundos y throughput en solicitudes por segundo.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        summary = {}
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                if stats.latencies:
+                    import numpy as np
+                    p50, p95, p99 = np.percentile(np.fromiter(stats.latencies, float), [50, 95, 99])
+                else:
+                    p50 = p95 = p99 = None
+                summary[endpoint] = {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "error_rate": stats.errors / stats.requests if stats.requests else 0.0,
+                    "retries": stats.retries,
+                    "cache_hits": stats.cache_hits,
+                    "no_data": stats.no_data,
+                    "bytes": stats.bytes,
+                    "throughput": stats.requests / elapsed,
+                    "p50": p50,
+                    "p95": p95,
+                    "p99": p99,
+                    "statuses": dict(stats.statuses),
+                }
+        return summary
+
+    def to_prometheus(self, prefix="denue"):
+        """Estadísticas en el formato de texto de Prometheus (también lo lee el colector de OpenTelemetry)."""
+        counters = [
+            ("requests_total", "requests", "Solicitudes terminadas"),
+            ("errors_total", "errors", "Solicitudes fallidas"),
+            ("retries_total", "retries", "Reintentos"),
+            ("cache_hits_total", "cache_hits", "Respuestas tomadas de la cache"),
+            ("no_data_total", "no_data", "Respuestas sin datos"),
+            ("response_bytes_total", "bytes", "Bytes recibidos"),
+        ]
+        summary = self.summary()
+        lines = []
+        for name, key, help_text in counters:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for endpoint, stats in summary.items():
+                lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"}} {stats[key]}')
+        name = f"{prefix}_request_latency_seconds"
+        lines.append(f"# HELP {name} Latencia de las solicitudes")
+        lines.append(f"# TYPE {name} summary")
+        with self._lock:
+            totals = {endpoint: (stats.latency_sum, stats.latency_count) for endpoint, stats in self._endpoints.items()}
+        for endpoint, stats in summary.items():
+            for quantile in ("p50", "p95", "p99"):
+                if stats[quantile] is not None:
+                    lines.append(f'{name}{{endpoint="{endpoint}",quantile="0.{quantile[1:]}"}} {stats[quantile]:.6f}')
+            latency_sum, latency_count = totals[endpoint]
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {latency_sum:.6f}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {latency_count}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(stats, port=9100, host="127.0.0.1"):
+    """
+    Expone las estadísticas en http://host:port/metrics para Prometheus, en un hilo de fondo.
+
+    Returns:
+        server (ThreadingHTTPServer): Servidor en ejecución; se detiene con server.shutdown().
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = stats.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,4 +1,5 @@
 from enum import Enum
+from math import nan
 
 class Entidad(Enum):
     """
@@ -60,3 +61,55 @@ class Entidad(Enum):
             raise ValueError(f"Invalid type for entidad_federativa: {type(entidad)}")
         return entidad
 
+
+
+# Campos numéricos de las respuestas de la API y su tipo
+NUMERIC_FIELDS = {
+    "Latitud": float,
+    "Longitud": float,
+    "Total": int,
+}
+
+
+def to_number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return nan
+
+
+class Establecimiento:
+    """
+    Registro de un establecimiento del DENUE con atributos fijos (__slots__) y coordenadas
+    numéricas. Los campos que no forman parte del esquema se conservan en `extra`.
+
+    Examples:
+        establecimientos = consulta.records()
+        establecimientos[0].Latitud  # 19.43
+    """
+    __slots__ = (
+        "CLEE", "Id", "Nombre", "Razon_social", "Clase_actividad", "Estrato",
+        "Tipo_vialidad", "Calle", "Num_Exterior", "Num_Interior", "Colonia", "CP",
+        "Ubicacion", "Telefono", "Correo_e", "Sitio_internet", "Tipo",
+        "Longitud", "Latitud", "extra",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__[:-1]:
+            value = fields.pop(name, None)
+            if name in NUMERIC_FIELDS:
+                value = to_number(value, NUMERIC_FIELDS[name])
+            setattr(self, name, value)
+        self.extra = fields
+
+    @classmethod
+    def from_dict(cls, record):
+        return cls(**record)
+
+    def to_dict(self):
+        record = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        record.update(self.extra)
+        return record
+
+    def __repr__(self):
+        return f"Establecimiento(Id={self.Id!r}, Nombre={self.Nombre!r})"
@@ -0,0 +1,395 @@
+import re
+import csv
+import json
+import math
+import unicodedata
+from functools import lru_cache
+from collections import defaultdict
+from denue import DenueInegiClient
+from utils import build_url, NoDataResponse
+from cache import CachedResponse
+from tiling import EARTH_RADIUS, METERS_PER_DEGREE
+
+# Nombres de cada campo en las respuestas de la API y en los archivos de descarga masiva del DENUE
+FIELDS = {
+    "id": ("Id", "id"),
+    "entidad": ("cve_ent", "Entidad_id"),
+    "municipio": ("cve_mun", "Municipio_id"),
+    "localidad": ("cve_loc", "Localidad_id"),
+    "ageb": ("ageb", "AGEB"),
+    "manzana": ("manzana", "Manzana"),
+    "clase": ("codigo_act", "Clase_actividad_id"),
+    "estrato": ("Estrato", "per_ocu"),
+    "latitud": ("Latitud", "latitud"),
+    "longitud": ("Longitud", "longitud"),
+}
+# Campos en los que busca `nombre_o_razon_social`; `condicion` busca además en los de TEXT_FIELDS
+NAME_FIELDS = ("Nombre", "Razon_social", "nom_estab", "raz_social")
+TEXT_FIELDS = NAME_FIELDS + ("Clase_actividad", "Calle", "Colonia", "Ubicacion", "nombre_act", "nom_vial",
+                             "nomb_asent", "entidad", "municipio", "localidad")
+# Ancho de los niveles geográficos (entidad, municipio, localidad, AGEB, manzana) y de la clave SCIAN
+GEO_WIDTHS = (2, 3, 4, 4, 3)
+SCIAN_WIDTHS = (2, 3, 4, 5, 6)
+# Límite inferior de personas ocupadas de cada estrato (1 a 7)
+ESTRATO_LIMITS = (0, 6, 11, 31, 51, 101, 251)
+GRID_SIZE = 0.01  # grados por celda del índice espacial (~1.1 km)
+
+# numpy solo se necesita para construir y consultar un LocalIndex: _load_numpy lo carga la primera
+# vez que se crea uno, para que importar el cliente siga siendo rápido
+np = None
+_EMPTY = None
+
+
+def _load_numpy():
+    global np, _EMPTY
+    if np is not None:
+        return
+    import numpy
+    np = numpy
+    _EMPTY = np.array([], dtype=np.int64)
+
+
+_TOKEN = re.compile(r"[a-z0-9ñ]+")
+_ACCENTS = str.maketrans("áéíóúüàèìòùäëïöâêîôû", "aeiouuaeiouaeioaeiou")
+
+
+def normalize_text(text):
+    """Minúsculas y sin acentos (excepto la ñ), para comparar palabras como lo hace la API."""
+    text = str(text).lower().translate(_ACCENTS)
+    if text.replace("ñ", "").isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text.replace("ñ", "\0"))
+    return "".join(c for c in text if not unicodedata.combining(c)).replace("\0", "ñ")
+
+
+@lru_cache(maxsize=2 ** 16)
+def _tokenize(text):
+    return tuple(_TOKEN.findall(normalize_text(text)))
+
+
+def tokenize(text):
+    return list(_tokenize(str(text)))
+
+
+def _record_tokens(record, fields):
+    # Calle, colonia, clase de actividad y ubicación se repiten mucho: se tokenizan una sola vez (lru_cache)
+    tokens = set()
+    for field in fields:
+        value = record.get(field)
+        if value:
+            tokens.update(_tokenize(str(value)))
+    return tokens
+
+
+def _get(record, field):
+    for key in FIELDS[field]:
+        value = record.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def _estrato(value):
+    # "0 a 5 personas" -> "1", "251 y más personas" -> "7"; también acepta la clave directamente
+    match = re.match(r"\s*(\d+)", value)
+    if match is None:
+        return ""
+    n = int(match.group(1))
+    if len(value.strip()) == 1 and 1 <= n <= 7:
+        return str(n)
+    return str(sum(n >= limit for limit in ESTRATO_LIMITS))
+
+
+def _keys(record):
+    """Claves geográficas jerárquicas, clave SCIAN y estrato de un registro."""
+    clee = str(record.get("CLEE") or "")
+    levels = [_get(record, field) for field in ("entidad", "municipio", "localidad", "ageb", "manzana")]
+    # La CLEE empieza con entidad (2), municipio (3) y clase SCIAN (6)
+    levels[0] = levels[0] or clee[:2]
+    levels[1] = levels[1] or clee[2:5]
+    geo = []
+    for value, width in zip(levels, GEO_WIDTHS):
+        if not value:
+            break
+        geo.append((geo[-1] if geo else "") + value.zfill(width))
+    clase = _get(record, "clase") or clee[5:11]
+    return geo, clase, _estrato(_get(record, "estrato"))
+
+
+class LocalIndex:
+    """
+    Índices en memoria sobre establecimientos ya descargados, para responder consultas sin usar la red:
+    área geográfica (entidad, municipio, localidad, AGEB, manzana), jerarquía SCIAN (sector a clase),
+    estrato, palabras de `condicion` y del nombre, Id y una malla espacial para búsquedas por radio.
+
+    Ejemplo:
+        index = LocalIndex.from_csv("../data/nacional/denue-09-0-0.csv")
+        denue_local = OfflineDenueClient(index)
+
+    Parámetros:
+        records (iterable): Establecimientos (dicts) como los devuelve la API o como vienen en los
+            archivos de descarga masiva del DENUE.
+    """
+
+    def __init__(self, records):
+        _load_numpy()
+        self.records = list(records)
+        geo, scian, estrato = defaultdict(list), defaultdict(list), defaultdict(list)
+        tokens, names, grid = defaultdict(list), defaultdict(list), defaultdict(list)
+        self._ids = {}
+        lats = np.full(len(self.records), np.nan)
+        lons = np.full(len(self.records), np.nan)
+        for position, record in enumerate(self.records):
+            self._ids.setdefault(_get(record, "id"), position)
+            keys, clase, clave_estrato = _keys(record)
+            for key in keys:
+                geo[key].append(position)
+            for width in SCIAN_WIDTHS:
+                if len(clase) >= width:
+                    scian[clase[:width]].append(position)
+            estrato[clave_estrato].append(position)
+            name_tokens = _record_tokens(record, NAME_FIELDS)
+            for token in name_tokens:
+                names[token].append(position)
+            for token in name_tokens.union(_record_tokens(record, TEXT_FIELDS[len(NAME_FIELDS):])):
+                tokens[token].append(position)
+            try:
+                lat, lon = float(_get(record, "latitud")), float(_get(record, "longitud"))
+            except ValueError:
+                continue
+            lats[position], lons[position] = lat, lon
+            grid[(math.floor(lat / GRID_SIZE), math.floor(lon / GRID_SIZE))].append(position)
+        self._geo, self._scian, self._estrato = _freeze(geo), _freeze(scian), _freeze(estrato)
+        self._tokens, self._names, self._grid = _freeze(tokens), _freeze(names), _freeze(grid)
+        self._lats, self._lons = lats, lons
+
+    @classmethod
+    def from_csv(cls, *paths, encoding="utf-8"):
+        """Construye el índice a partir de uno o varios CSV (de download_all_to_csv o de la descarga masiva)."""
+        records = []
+        for path in paths:
+            with open(path, newline="", encoding=encoding) as f:
+                records.extend(csv.DictReader(f))
+        return cls(records)
+
+    @classmethod
+    def from_snapshot(cls, store, entidad=None):
+        """Construye el índice a partir de los establecimientos vigentes de un SnapshotStore."""
+        return cls(store.records(entidad))
+
+    def __len__(self):
+        return len(self.records)
+
+    def all(self):
+        return np.arange(len(self.records))
+
+    def id(self, id_establecimiento):
+        position = self._ids.get(str(id_establecimiento))
+        return np.array([] if position is None else [position], dtype=np.int64)
+
+    def geo(self, *claves):
+        """Establecimientos del área (claves ya concatenadas, ej. "09", "09015", "090150001")."""
+        return _union([self._geo.get(clave, _EMPTY) for clave in claves])
+
+    def scian(self, *claves):
+        """Establecimientos de una o varias claves SCIAN de 2 a 6 dígitos."""
+        return _union([self._scian.get(clave, _EMPTY) for clave in claves])
+
+    def estrato(self, clave):
+        return self._estrato.get(str(clave), _EMPTY)
+
+    def match(self, terms, match_type="any", names=False):
+        """
+        Establecimientos que contienen alguna ("any") o todas ("all") las palabras de `terms`.
+        Un término con varias palabras (ej. "s.a. de c.v.") requiere todas ellas.
+        """
+        index = self._names if names else self._tokens
+        sets = [_intersect([index.get(token, _EMPTY) for token in tokenize(term)] or [_EMPTY]) for term in terms]
+        if not sets:
+            return self.all()
+        return _intersect(sets) if match_type == "all" else _union(sets)
+
+    def phrase(self, text, positions):
+        """Filtra `positions` a los establecimientos que contienen la frase completa."""
+        phrase = " ".join(tokenize(text))
+        keep = [position for position in positions
+                if phrase in " ".join(tokenize(" ".join(str(self.records[position].get(field) or "")
+                                                        for field in TEXT_FIELDS)))]
+        return np.array(keep, dtype=np.int64)
+
+    def near(self, lat, lon, distancia):
+        """Establecimientos a no más de `distancia` metros de (lat, lon), del más cercano al más lejano."""
+        dlat = distancia / METERS_PER_DEGREE
+        dlon = distancia / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        cells = [self._grid.get((i, j), _EMPTY)
+                 for i in range(math.floor((lat - dlat) / GRID_SIZE), math.floor((lat + dlat) / GRID_SIZE) + 1)
+                 for j in range(math.floor((lon - dlon) / GRID_SIZE), math.floor((lon + dlon) / GRID_SIZE) + 1)]
+        candidates = _union(cells)
+        distances = _haversine(lat, lon, self._lats[candidates], self._lons[candidates])
+        inside = distances <= distancia
+        return candidates[inside][np.argsort(distances[inside], kind="stable")]
+
+    def select(self, positions):
+        return [self.records[position] for position in positions]
+
+
+def _freeze(index):
+    return {key: np.array(positions, dtype=np.int64) for key, positions in index.items()}
+
+
+def _union(arrays):
+    arrays = [array for array in arrays if len(array)]
+    if not arrays:
+        return _EMPTY
+    return arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+
+
+def _intersect(arrays):
+    # De la lista más corta a la más larga para descartar candidatos lo antes posible
+    arrays = sorted(arrays, key=len)
+    result = arrays[0]
+    for array in arrays[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, array, assume_unique=True)
+    return result
+
+
+def _haversine(lat, lon, lats, lons):
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    a = (np.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lons - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def _terms(condicion, separators=",;"):
+    """Separa una condición ya codificada para la URL en (términos, match_type)."""
+    if condicion.strip().lower() in ("todos", "0", ""):
+        return [], "any"
+    if ";" in separators and ";" in condicion:
+        return condicion.split(";"), "all"
+    if "," in condicion:
+        return condicion.split(","), "any"
+    return [condicion], "all"
+
+
+class OfflineDenueClient(DenueInegiClient):
+    """
+    Cliente con los mismos métodos que DenueInegiClient que responde desde un LocalIndex, sin red
+    y sin consumir la cuota de la API. Las consultas devuelven los mismos Result y PaginatedResult,
+    así que la paginación, to_csv, to_pandas y download_all funcionan igual.
+
+    La búsqueda de palabras compara palabras completas, sin distinguir mayúsculas ni acentos.
+
+    Ejemplo:
+        denue_local = OfflineDenueClient(LocalIndex.from_snapshot(store))
+        talleres = denue_local.BuscarAreaAct(condicion="taller mecanico", entidad_federativa="09",
+                                             registro_inicial=1, registro_final=1000)
+
+    Parámetros:
+        index (LocalIndex): Índice con los establecimientos descargados.
+        decoder (str, optional): Igual que en DenueInegiClient. Valor por defecto es None.
+        cube (CuantificarCube, optional): Si se especifica, Cuantificar responde desde el cubo de
+            conteos precalculados. Valor por defecto es None.
+    """
+    URL_BASE = "offline://denue/v1/consulta/"
+
+    def __init__(self, index, decoder=None, cube=None):
+        super().__init__(token="offline", decoder=decoder)
+        self.index = index
+        self.cube = cube
+
+    def _open_session(self):
+        return None  # Las consultas se responden desde el índice, sin red
+
+    def _request(self, endpoint, parametros, **kwargs):
+        url = build_url(self.URL_BASE, endpoint, parametros, self._token)
+        data = getattr(self, f"_query_{endpoint}")(*parametros)
+        if not data:
+            return NoDataResponse(url)
+        response = CachedResponse(url, 200, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        response.from_cache = False
+        return response
+
+    def _page(self, positions, registro_inicial, registro_final):
+        inicio = max(int(registro_inicial), 1) - 1
+        return self.index.select(positions[inicio:int(registro_final)])
+
+    def _filter(self, *arrays):
+        return _intersect(list(arrays)) if arrays else self.index.all()
+
+    def _entidad(self, entidad_federativa):
+        return [] if entidad_federativa in ("00", "0") else [self.index.geo(entidad_federativa)]
+
+    def _query_Buscar(self, condicion, coordenadas, distancia):
+        lat, lon = (float(value) for value in coordenadas.split(","))
+        positions = self.index.near(lat, lon, float(distancia))
+        terms, match_type = _terms(condicion)
+        if terms:
+            matched = self.index.match(terms, match_type)
+            positions = positions[np.isin(positions, matched)]
+        return self.index.select(positions)
+
+    def _query_Ficha(self, id_establecimiento):
+        return self.index.select(self.index.id(id_establecimiento))
+
+    def _query_Nombre(self, nombre_o_razon_social, entidad_federativa, registro_inicial, registro_final):
+        filters = self._entidad(entidad_federativa)
+        filters.append(self.index.match([nombre_o_razon_social], "all", names=True))
+        return self._page(self._filter(*filters), registro_inicial, registro_final)
+
+    def _query_BuscarEntidad(self, condicion, entidad_federativa, registro_inicial, registro_final):
+        filters = self._entidad(entidad_federativa)
+        terms, match_type = _terms(condicion)
+        if terms:
+            filters.append(self.index.match(terms, match_type))
+        positions = self._filter(*filters)
+        if len(terms) == 1 and " " in terms[0].strip():
+            # match_type "default": la condición se busca como frase
+            positions = self.index.phrase(terms[0], positions)
+        return self._page(positions, registro_inicial, registro_final)
+
+    def _query_BuscarAreaAct(self, condicion, entidad_federativa, registro_inicial, registro_final):
+        filters = self._entidad(entidad_federativa)
+        terms, match_type = _terms(condicion)
+        if terms:
+            filters.append(self.index.match(terms, match_type))
+        return self._page(self._filter(*filters), registro_inicial, registro_final)
+
+    def _query_BuscarAreaActEstr(self, entidad_federativa, municipio, localidad, ageb, manzana, sector, subsector,
+                                 rama, clase, nombre_del_establecimiento, registro_inicial, registro_final,
+                                 id_establecimiento, estrato):
+        filters = self._entidad(entidad_federativa)
+        # Se filtra por el nivel geográfico más detallado que se especificó
+        clave = entidad_federativa
+        for value in (municipio, localidad, ageb, manzana):
+            if not value.strip("0") or not filters:
+                break
+            clave += value
+            filters[0] = self.index.geo(clave)
+        for value in (clase, rama, subsector, sector):
+            if value.strip("0"):
+                filters.append(self.index.scian(value))
+                break
+        if nombre_del_establecimiento not in ("0", ""):
+            filters.append(self.index.match([nombre_del_establecimiento], "all", names=True))
+        if id_establecimiento not in ("0", ""):
+            filters.append(self.index.id(id_establecimiento))
+        if estrato not in ("0", ""):
+            filters.append(self.index.estrato(estrato))
+        return self._page(self._filter(*filters), registro_inicial, registro_final)
+
+    def _query_Cuantificar(self, actividad_economica, area_geografica, estrato):
+        if self.cube is not None:
+            return self.cube.Cuantificar(actividad_economica, area_geografica, estrato).data
+        filters = [] if estrato in ("0", "") else [self.index.estrato(estrato)]
+        rows = []
+        for actividad in actividad_economica.split(","):
+            for area in area_geografica.split(","):
+                positions = list(filters)
+                if actividad != "0":
+                    positions.append(self.index.scian(actividad))
+                if area not in ("0", "00"):
+                    positions.append(self.index.geo(area))
+                rows.append({"AE": actividad, "AG": area, "Total": int(len(self._filter(*positions)))})
+        return rows
@@ -0,0 +1,153 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests.exceptions
+
+
+class PageSizer:
+    """
+    Tamaño de página adaptativo para las consultas paginadas. Después de cada página se ajusta
+    con su latencia y su tamaño en bytes: crece mientras el servidor responde rápido y baja si
+    la respuesta tarda más que target_latency o pesa más que max_bytes. Un timeout reduce el
+    tamaño a la mitad y una página recortada por la API (menos registros de los pedidos sin ser
+    la última) fija el máximo en lo que devolvió.
+
+    Parámetros:
+        per (int, optional): Tamaño inicial. Valor por defecto es 250.
+        min_per (int, optional): Tamaño mínimo. Valor por defecto es 25.
+        max_per (int, optional): Tamaño máximo. Valor por defecto es 5000.
+        target_latency (float, optional): Segundos por página a los que se apunta. Valor por defecto es 5.
+        max_bytes (int, optional): Tamaño máximo deseado de una respuesta. Valor por defecto es 8 MB.
+        factor (float, optional): Cuánto crece o se reduce la página en cada ajuste. Valor por defecto es 1.5.
+    """
+
+    def __init__(self, per=250, min_per=25, max_per=5000, target_latency=5.0, max_bytes=8 * 1024 ** 2, factor=1.5):
+        self.min_per = max(1, min_per)
+        self.max_per = max(self.min_per, max_per)
+        self.per = min(max(per, self.min_per), self.max_per)
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.factor = factor
+        self.history = deque(maxlen=1000)  # (registros, latencia, bytes, tamaño después del ajuste)
+        self._lock = threading.Lock()
+
+    def _resize(self, per):
+        self.per = int(min(max(per, self.min_per), self.max_per))
+
+    def observe(self, records, latency, size):
+        with self._lock:
+            if latency > self.target_latency or size > self.max_bytes:
+                self._resize(self.per / self.factor)
+            elif latency < self.target_latency / 2 and size < self.max_bytes / 2:
+                self._resize(self.per * self.factor)
+            self.history.append((records, latency, size, self.per))
+
+    def timeout(self):
+        with self._lock:
+            self._resize(self.per / 2)
+
+    def truncated(self, records):
+        """La API devolvió solo `records` registros de una página más grande."""
+        with self._lock:
+            self.max_per = max(self.min_per, records)
+            self._resize(self.per)
+
+
+def _fetch_range(first_call, sizer, start, end):
+    """
+    Descarga el rango start-end (inclusivo) como una o más páginas. Si la solicitud termina por
+    timeout el rango se divide a la mitad y se piden las dos partes; si la página trae menos
+    registros de los pedidos se pide el resto. Solo si el resto no está vacío la página fue recortada
+    por la API (y no era simplemente la última de la consulta).
+
+    Returns:
+        (results, exhausted): Páginas no vacías en orden y si se llegó al final de la consulta.
+    """
+    results = []
+    short = None  # registros de la página anterior si trajo menos de los pedidos
+    while start <= end:
+        requested = end - start + 1
+        began = time.monotonic()
+        try:
+            result = first_call.page(start, end)
+        except requests.exceptions.Timeout:
+            if requested == 1:
+                raise
+            sizer.timeout()
+            middle = start + requested // 2 - 1
+            for part in ((start, middle), (middle + 1, end)):
+                part_results, exhausted = _fetch_range(first_call, sizer, *part)
+                results.extend(part_results)
+                if exhausted:
+                    return results, True
+            return results, False
+        if result.is_empty():
+            return results, True
+        if short is not None:
+            sizer.truncated(short)
+        records = len(result.data)
+        sizer.observe(records, time.monotonic() - began, len(result.raw_response.content))
+        results.append(result)
+        short = records if records < requested else None
+        start += records
+    return results, False
+
+
+def _resume_point(first_call, skip):
+    # Primer registro después de first_call y de los rangos contiguos ya descargados. Los rangos
+    # terminan en el último registro recibido, así que lo que faltó de una página recortada se vuelve a pedir
+    registro_inicial = first_call.params['registro_inicial']
+    start = registro_inicial + len(first_call.data)
+    completed = dict(skip)
+    while start in completed:
+        start = completed[start] + 1
+    return start
+
+
+def fetch_pages_adaptive(first_call, sizer=None, workers=1, delay=1, skip=()):
+    """
+    Igual que fetch_pages, pero el tamaño de cada página lo decide un PageSizer con la latencia y
+    el tamaño de las páginas anteriores. Un timeout no detiene la descarga: el rango se divide a la
+    mitad y se vuelve a pedir. Si la API recorta una página, se pide lo que faltó del rango.
+
+    Parámetros:
+        first_call (PaginatedResult): Primera página de la consulta.
+        sizer (PageSizer, optional): Ajuste del tamaño de página. Por defecto un PageSizer que empieza
+            en el tamaño de first_call.
+        workers (int, optional): Número de páginas que se descargan en paralelo. Valor por defecto es 1.
+        delay (float, optional): Segundos mínimos entre el envío de dos rangos consecutivos.
+            Valor por defecto es 1.
+        skip (set, optional): Rangos (registro_inicial, último registro recibido) contiguos ya
+            descargados (ver DownloadCheckpoint.received); la descarga continúa después del último.
+            Valor por defecto es ().
+    """
+    if first_call.is_empty():
+        return
+    requested = first_call.params['registro_final'] - first_call.params['registro_inicial'] + 1
+    if sizer is None:
+        sizer = PageSizer(per=requested)
+    # Si first_call trae menos de lo pedido puede ser la única página; si la API recorta las
+    # páginas, _fetch_range lo detecta en los rangos siguientes
+    yield first_call
+
+    workers = max(1, workers)
+    pending = deque()
+    start = _resume_point(first_call, skip)
+    last_submit = time.monotonic()  # first_call acaba de descargarse
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while len(pending) < workers:
+                    time.sleep(max(0.0, last_submit + delay - time.monotonic()))
+                    last_submit = time.monotonic()
+                    end = start + sizer.per - 1
+                    pending.append(executor.submit(_fetch_range, first_call, sizer, start, end))
+                    start = end + 1
+                results, exhausted = pending.popleft().result()
+                yield from results
+                if exhausted:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
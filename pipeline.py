@@ -0,0 +1,100 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_EXCEPTION, wait
+from pathlib import Path
+from decoders import get_decoder
+from utils import PaginatedResult, fetch_pages, records_to_columns
+
+
+def process_page(content, path, format="csv", decoder=None):
+    """
+    Decodifica los bytes de una página, convierte los campos numéricos y la escribe en `path`.
+    Se ejecuta en los procesos del pool, así que solo recibe y devuelve objetos simples.
+
+    Returns:
+        n (int): Número de registros escritos.
+    """
+    import pandas as pd
+    records = get_decoder(decoder)(content, 'utf-8')
+    df = pd.DataFrame(records_to_columns(records))
+    if format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return len(records)
+
+
+def raw_pages(first_call):
+    """Copia de first_call cuyas páginas siguientes conservan los bytes de la respuesta sin decodificar."""
+    params = dict(first_call.params, decoder="raw")
+    return PaginatedResult(first_call.method, params, first_call.raw_response, decoder="raw")
+
+
+def _mp_context():
+    # Los hilos de descarga ya están corriendo cuando se crean los procesos: hacer fork de un proceso
+    # con hilos puede heredar locks tomados, así que se usa forkserver (o spawn donde no existe)
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def download_pipeline(first_call, folder, per=250, workers=1, delay=1, processes=None, max_pending=None,
+                      format="csv"):
+    """
+    Descarga todas las páginas de una consulta paginada y reparte el trabajo de CPU (decodificar el
+    JSON, convertir tipos y escribir el archivo) entre varios procesos. Los hilos de descarga solo
+    pasan los bytes de cada respuesta al pool por una cola acotada: si los procesos se atrasan,
+    la descarga espera en lugar de acumular páginas en memoria.
+
+    Cada página se escribe en su propio archivo (part-00000.csv, part-00001.csv, ...) dentro de
+    `folder`, que se puede leer como un solo conjunto de datos, por ejemplo con
+    pd.concat(map(pd.read_csv, sorted(folder.glob("part-*.csv")))).
+
+    Parámetros:
+        first_call (PaginatedResult): Primera página de la consulta.
+        folder (str | Path): Carpeta de salida.
+        per (int, optional): Tamaño de cada página. Valor por defecto es 250.
+        workers (int, optional): Páginas que se descargan en paralelo. Valor por defecto es 1.
+        delay (float, optional): Segundos mínimos entre solicitudes. Valor por defecto es 1.
+        processes (int, optional): Procesos del pool. Valor por defecto es el número de CPUs.
+        max_pending (int, optional): Páginas descargadas que pueden esperar a ser procesadas.
+            Valor por defecto es 2 * processes.
+        format (str, optional): "csv" o "parquet" (requiere pyarrow). Valor por defecto es "csv".
+
+    Returns:
+        files (list[Path]): Archivos escritos, en el orden de las páginas.
+    """
+    if format not in ("csv", "parquet"):
+        raise ValueError(f"Invalid format: {format}. Valid formats: ('csv', 'parquet')")
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    slots = threading.BoundedSemaphore(max_pending or 2 * processes)
+    decoder = first_call.params.get("decoder") or first_call.method.__self__._decoder
+    files, futures, errors = [], [], []
+
+    def done(future):
+        slots.release()
+        if not future.cancelled() and future.exception() is not None:
+            errors.append(future.exception())
+
+    print("Descargando todos los datos, por favor espere..")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=_mp_context()) as executor:
+        try:
+            for number, page in enumerate(fetch_pages(raw_pages(first_call), per=per, workers=workers, delay=delay)):
+                slots.acquire()  # contrapresión: se espera a que el pool libere un lugar
+                path = folder / f"part-{number:05d}.{format}"
+                future = executor.submit(process_page, page.data, path, format, decoder)
+                future.add_done_callback(done)
+                futures.append(future)
+                files.append(path)
+                if errors:
+                    raise errors[0]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            total = sum(future.result() for future in futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    print(f"Descarga terminada: {total} registros en {len(files)} archivos en {folder.resolve()}")
+    return files
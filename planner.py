@@ -0,0 +1,177 @@
+import math
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from models import Entidad
+from writers import CsvPageWriter
+import catalog
+
+# Sectores del SCIAN México (31-33 y 48-49 se consultan por separado)
+SECTORES = list(catalog.SECTORES)
+ESTRATOS = ["1", "2", "3", "4", "5", "6", "7"]
+ENTIDADES = [entidad.code for entidad in Entidad if entidad is not Entidad.ENTIDAD_FEDERATIVA_NO_ESPECIFICADA]
+
+
+@dataclass
+class Shard:
+    """Parte de una descarga: una combinación entidad/sector/estrato con su total según Cuantificar."""
+    entidad: str
+    sector: str = "0"
+    estrato: str = "0"
+    total: int = 0
+    per: int = 0
+    downloaded: int = 0
+    error: Exception | None = field(default=None, repr=False)
+
+    @property
+    def name(self):
+        return f"{self.entidad}-{self.sector}-{self.estrato}"
+
+    @property
+    def complete(self):
+        return self.error is None and self.downloaded == self.total
+
+    def ranges(self):
+        """Rangos registro_inicial-registro_final que cubren exactamente el total del shard."""
+        return [(inicio, min(inicio + self.per - 1, self.total)) for inicio in range(1, self.total + 1, self.per)]
+
+
+def count(client, actividades, areas, estrato="0"):
+    """
+    Cuenta los establecimientos de cada combinación actividad × área con Cuantificar.
+    Se hace una sola consulta con las claves separadas por coma y, si la respuesta no trae el
+    desglose por clave, se consulta cada combinación por separado. Una consulta de una sola
+    combinación toma el Total de la respuesta sin importar qué claves devuelva la API.
+
+    Returns:
+        counts (dict): {(actividad, area): total}
+
+    Raises:
+        ValueError: Si la respuesta no trae el total de alguna combinación.
+    """
+    result = client.Cuantificar(",".join(actividades), ",".join(areas), estrato)
+    expected = [(actividad, area) for actividad in actividades for area in areas]
+    if len(expected) == 1:
+        # La API no siempre repite la clave consultada (por ejemplo con actividad "0")
+        if len(result.data) > 1:
+            raise ValueError(f"Cuantificar devolvió {len(result.data)} conteos para {expected[0]}")
+        return {expected[0]: int(result.data[0]["Total"]) if result.data else 0}
+    counts = {}
+    for row in result.data:
+        try:
+            counts[(str(row["AE"]), str(row["AG"]))] = int(row["Total"])
+        except (KeyError, TypeError, ValueError):
+            break
+    if not set(counts) & set(expected):
+        counts = {}
+        for actividad in actividades:
+            for area in areas:
+                counts.update(count(client, [actividad], [area], estrato))
+    missing = [key for key in expected if key not in counts]
+    if missing:
+        raise ValueError(f"Cuantificar no devolvió el total de {missing}")
+    return {key: counts[key] for key in expected}
+
+
+def _page_size(total, max_per):
+    # Páginas del mismo tamaño, lo más grandes posible sin pasar de max_per
+    pages = max(1, math.ceil(total / max_per))
+    return math.ceil(total / pages)
+
+
+def plan(client, entidades=None, actividad="0", max_shard=50_000, max_per=1000):
+    """
+    Divide una descarga de BuscarAreaActEstr en shards balanceados usando los conteos de Cuantificar:
+    primero por entidad, luego por sector las entidades con más de max_shard establecimientos y
+    finalmente por estrato los sectores que aún lo excedan. Si se indica un sector, las entidades
+    que excedan max_shard se dividen directamente por estrato.
+
+    Parámetros:
+        client (DenueInegiClient): Cliente para las consultas de conteo.
+        entidades (list, optional): Claves de entidad. Valor por defecto son las 32 entidades.
+        actividad (str, optional): Sector a descargar ("0" para todos). Valor por defecto es "0".
+        max_shard (int, optional): Tamaño máximo deseado de un shard. Valor por defecto es 50000.
+        max_per (int, optional): Tamaño máximo de página. Valor por defecto es 1000.
+
+    Returns:
+        shards (list[Shard]): Shards con su total y tamaño de página, del más grande al más chico.
+    """
+    entidades = [Entidad.normalize(entidad) for entidad in (entidades or ENTIDADES)]
+    shards = []
+    by_entidad = count(client, [actividad], entidades)
+    for entidad in entidades:
+        total = by_entidad.get((actividad, entidad), 0)
+        if total <= max_shard:
+            shards.append(Shard(entidad, actividad, total=total))
+            continue
+        if actividad == "0":
+            sectores, by_sector = SECTORES, count(client, SECTORES, [entidad])
+        else:
+            # Con un sector fijo solo queda dividir por estrato
+            sectores, by_sector = [actividad], {(actividad, entidad): total}
+        for sector in sectores:
+            total = by_sector.get((sector, entidad), 0)
+            if total <= max_shard:
+                shards.append(Shard(entidad, sector, total=total))
+                continue
+            by_estrato = {estrato: count(client, [sector], [entidad], estrato).get((sector, entidad), 0)
+                          for estrato in ESTRATOS}
+            shards.extend(Shard(entidad, sector, estrato, total=total) for estrato, total in by_estrato.items())
+    shards = [shard for shard in shards if shard.total > 0]
+    for shard in shards:
+        shard.per = _page_size(shard.total, max_per)
+    shards.sort(key=lambda shard: shard.total, reverse=True)
+    return shards
+
+
+def run(client, shards, folder=".", workers=4):
+    """
+    Descarga los shards en paralelo, cada uno a su propio CSV (denue-<entidad>-<sector>-<estrato>.csv),
+    mostrando el avance exacto contra los totales de Cuantificar. Los shards más grandes se
+    empiezan primero para que la carga quede balanceada.
+
+    Parámetros:
+        client (DenueInegiClient): Cliente para las consultas. Conviene que pool_maxsize >= workers.
+        shards (list[Shard]): Resultado de plan().
+        folder (str | Path, optional): Carpeta de salida. Valor por defecto es ".".
+        workers (int, optional): Número de shards que se descargan simultáneamente. Valor por defecto es 4.
+
+    Returns:
+        shards (list[Shard]): Los mismos shards, con `downloaded` y `error` actualizados. Un shard
+            está completo si descargó exactamente los registros que indicó Cuantificar.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    expected = sum(shard.total for shard in shards)
+    progress = {"downloaded": 0}
+    lock = threading.Lock()
+
+    def download(shard):
+        writer = CsvPageWriter(folder / f"denue-{shard.name}.csv")
+        try:
+            for inicio, fin in shard.ranges():
+                result = client.BuscarAreaActEstr(entidad_federativa=shard.entidad, sector=shard.sector,
+                                                  estrato=shard.estrato, registro_inicial=inicio, registro_final=fin)
+                if result.is_empty():
+                    break
+                writer.write(result.data)
+                shard.downloaded += len(result.data)
+                with lock:
+                    progress["downloaded"] += len(result.data)
+                    downloaded = progress["downloaded"]
+                print(f"\r{downloaded}/{expected} registros ({downloaded / max(expected, 1):.1%})", end="")
+        except Exception as e:
+            shard.error = e
+        finally:
+            writer.close()
+
+    print(f"Descargando {expected} registros en {len(shards)} shards, por favor espere..")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(download, sorted(shards, key=lambda shard: shard.total, reverse=True)))
+
+    incomplete = [shard for shard in shards if not shard.complete]
+    print(f"\nDescarga terminada: {len(shards) - len(incomplete)}/{len(shards)} shards completos.")
+    for shard in incomplete:
+        print(f"Shard {shard.name}: {shard.downloaded} de {shard.total} registros. {shard.error or ''}")
+    return shards
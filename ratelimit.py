@@ -0,0 +1,131 @@
+import time
+import random
+import threading
+import email.utils
+
+
+class RateLimiter:
+    """
+    Limitador de tasa tipo token bucket que se comparte entre hilos y tareas de asyncio.
+
+    Con adaptive=True la tasa se ajusta sola (AIMD): sube poco a poco mientras las respuestas son
+    rápidas y correctas, y se reduce a la mitad ante errores 429/5xx, timeouts o cuando la latencia
+    promedio del servidor supera latency_target.
+
+    Ejemplo:
+        limiter = RateLimiter(rate=2, burst=4, adaptive=True, max_rate=10)
+        denue_inegi = DenueInegiClient(token, rate_limiter=limiter)
+
+    Parámetros:
+        rate (float, optional): Solicitudes por segundo. Valor por defecto es 1.
+        burst (int, optional): Número de solicitudes que se pueden enviar de golpe. Valor por defecto es 1.
+        adaptive (bool, optional): Ajustar la tasa según la latencia y los errores. Valor por defecto es False.
+        min_rate (float, optional): Tasa mínima en modo adaptativo. Valor por defecto es 0.1.
+        max_rate (float, optional): Tasa máxima en modo adaptativo. Valor por defecto es 4 veces rate.
+        latency_target (float, optional): Latencia promedio (segundos) a partir de la cual se frena.
+            Valor por defecto es 2.
+    """
+
+    def __init__(self, rate=1.0, burst=1, adaptive=False, min_rate=0.1, max_rate=None, latency_target=2.0):
+        self.rate = float(rate)
+        self.burst = burst
+        self.adaptive = adaptive
+        self.min_rate = min_rate
+        # Sin un techo por encima de rate, el modo adaptativo solo podría bajar la tasa
+        self.max_rate = max_rate if max_rate is not None else 4 * self.rate
+        self.latency_target = latency_target
+        self.increase = 0.05 * self.max_rate
+        self.latency = None
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Reserva un token y devuelve cuántos segundos hay que esperar para usarlo
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """Bloquea el hilo actual hasta que se pueda enviar la siguiente solicitud."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Igual que acquire, pero sin bloquear el event loop."""
+        wait = self._reserve()
+        if wait > 0:
+            import asyncio
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Detiene todas las solicitudes durante `seconds` segundos (por ejemplo, por un Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def record(self, latency, error=False):
+        """Registra el resultado de una solicitud para ajustar la tasa en modo adaptativo."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            now = time.monotonic()
+            if error or self.latency > self.latency_target:
+                # Una reducción por segundo como máximo, para no desplomar la tasa con una ráfaga de errores
+                if now - self._last_decrease >= 1.0:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._last_decrease = now
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class RetryPolicy:
+    """
+    Política de reintentos con espera exponencial y jitter ("full jitter") que respeta el
+    encabezado Retry-After de las respuestas 429/503.
+
+    Parámetros:
+        max_retries (int, optional): Número máximo de reintentos. Valor por defecto es 3.
+        backoff_factor (float, optional): Espera base en segundos; el reintento n espera hasta
+            backoff_factor * 2**n. Valor por defecto es 0.5.
+        max_backoff (float, optional): Espera máxima en segundos. Valor por defecto es 60.
+        statuses (tuple, optional): Códigos HTTP que se reintentan. Valor por defecto es (429, 500, 502, 503, 504).
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=60.0, statuses=(429, 500, 502, 503, 504)):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def should_retry(self, attempt):
+        return attempt < self.max_retries
+
+    def delay(self, attempt, response=None):
+        """Segundos a esperar antes del reintento número `attempt` (empezando en 0)."""
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Convierte un encabezado Retry-After (segundos o fecha HTTP) a segundos de espera."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
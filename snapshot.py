@@ -0,0 +1,173 @@
+import json
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+from models import Entidad
+from planner import ENTIDADES, count
+from utils import fetch_pages
+
+
+def record_hash(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Copia local del DENUE en SQLite, indexada por Id de establecimiento y particionada por entidad,
+    que se actualiza de forma incremental: cada sincronización solo escribe los establecimientos
+    nuevos, los modificados y las bajas (tombstones), y deja registro de cada cambio.
+
+    Ejemplo:
+        store = SnapshotStore("denue.sqlite")
+        stats = store.sync(denue_inegi, entidades=["09", "15"])
+        cambios = store.changes(since=stats["sync_id"] - 1)
+
+    Parámetros:
+        path (str | Path, optional): Archivo SQLite. Valor por defecto es "denue_snapshot.sqlite".
+    """
+
+    def __init__(self, path="denue_snapshot.sqlite"):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS establecimientos (
+                id TEXT PRIMARY KEY, entidad TEXT, hash TEXT, data TEXT, deleted INTEGER DEFAULT 0, sync_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS establecimientos_entidad ON establecimientos (entidad, deleted);
+            CREATE TABLE IF NOT EXISTS changes (
+                sync_id INTEGER, id TEXT, entidad TEXT, op TEXT, data TEXT, ts REAL
+            );
+            CREATE INDEX IF NOT EXISTS changes_sync ON changes (sync_id);
+            CREATE TABLE IF NOT EXISTS syncs (
+                sync_id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL, finished REAL, stats TEXT
+            );
+        """)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def sync(self, client, entidades=None, per=1000, workers=1, delay=0):
+        """
+        Vuelve a descargar cada entidad con BuscarAreaActEstr y aplica solo las diferencias.
+        Cada entidad se aplica en una transacción: si su descarga falla, esa entidad queda como
+        estaba y no se marcan bajas. Las bajas solo se marcan si se descargaron exactamente los
+        establecimientos que indica Cuantificar; si la descarga terminó antes (por ejemplo, una
+        página profunda respondió sin datos) se aplican las altas y cambios, no se marcan bajas y
+        la entidad se reporta como fallida.
+
+        Parámetros:
+            client (DenueInegiClient): Cliente para las consultas.
+            entidades (list, optional): Claves de entidad. Valor por defecto son las 32 entidades.
+            per (int, optional): Tamaño de página. Valor por defecto es 1000.
+            workers (int, optional): Páginas que se descargan en paralelo. Valor por defecto es 1.
+            delay (float, optional): Segundos mínimos entre solicitudes. Valor por defecto es 0.
+
+        Returns:
+            stats (dict): sync_id y número de altas, cambios, bajas y registros sin cambios, y las
+                entidades que fallaron.
+        """
+        entidades = [Entidad.normalize(entidad) for entidad in (entidades or ENTIDADES)]
+        cursor = self._conn.execute("INSERT INTO syncs (started) VALUES (?)", (time.time(),))
+        sync_id = cursor.lastrowid
+        self._conn.commit()
+        stats = {"sync_id": sync_id, "insert": 0, "update": 0, "delete": 0, "unchanged": 0, "failed": {}}
+
+        for entidad in entidades:
+            print(f"Sincronizando entidad {entidad}..")
+            try:
+                expected = count(client, ["0"], [entidad]).get(("0", entidad))
+                first = client.BuscarAreaActEstr(entidad_federativa=entidad, registro_inicial=1, registro_final=per)
+                pages = fetch_pages(first, per=per - 1, workers=workers, delay=delay)
+                shard_stats, seen = self._apply(sync_id, entidad, (record for page in pages for record in page.data),
+                                                expected)
+            except Exception as e:
+                self._conn.rollback()
+                stats["failed"][entidad] = str(e)
+                print(f"Error en la entidad {entidad}:\n{e}")
+                continue
+            for op, n in shard_stats.items():
+                stats[op] += n
+            if seen != expected:
+                stats["failed"][entidad] = f"Se descargaron {seen} de {expected} establecimientos; no se marcaron bajas"
+                print(f"Descarga incompleta de la entidad {entidad}: {seen} de {expected} establecimientos")
+
+        self._conn.execute("UPDATE syncs SET finished = ?, stats = ? WHERE sync_id = ?",
+                           (time.time(), json.dumps(stats), sync_id))
+        self._conn.commit()
+        print(f"Altas: {stats['insert']}, cambios: {stats['update']}, bajas: {stats['delete']}, "
+              f"sin cambios: {stats['unchanged']}")
+        return stats
+
+    def _apply(self, sync_id, entidad, records, expected=None):
+        # Las bajas solo se marcan si se descargaron los `expected` establecimientos de la entidad
+        stats = {"insert": 0, "update": 0, "delete": 0, "unchanged": 0}
+        known = dict(self._conn.execute(
+            "SELECT id, hash FROM establecimientos WHERE entidad = ? AND deleted = 0", (entidad,)))
+        deleted = {row[0] for row in self._conn.execute(
+            "SELECT id FROM establecimientos WHERE entidad = ? AND deleted = 1", (entidad,))}
+        seen = set()
+        now = time.time()
+        for record in records:
+            id_establecimiento = str(record.get("Id"))
+            if id_establecimiento in seen:
+                continue
+            seen.add(id_establecimiento)
+            digest = record_hash(record)
+            if known.get(id_establecimiento) == digest:
+                stats["unchanged"] += 1
+                continue
+            op = "update" if id_establecimiento in known else "insert"
+            data = json.dumps(record, ensure_ascii=False)
+            if op == "insert" and id_establecimiento not in deleted:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO establecimientos (id, entidad, hash, data, deleted, sync_id) VALUES (?, ?, ?, ?, 0, ?)",
+                    (id_establecimiento, entidad, digest, data, sync_id))
+            else:
+                self._conn.execute(
+                    "UPDATE establecimientos SET entidad = ?, hash = ?, data = ?, deleted = 0, sync_id = ? WHERE id = ?",
+                    (entidad, digest, data, sync_id, id_establecimiento))
+            self._conn.execute("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?)",
+                               (sync_id, id_establecimiento, entidad, op, data, now))
+            stats[op] += 1
+
+        for id_establecimiento in (known.keys() - seen if len(seen) == expected else ()):
+            self._conn.execute("UPDATE establecimientos SET deleted = 1, sync_id = ? WHERE id = ?",
+                               (sync_id, id_establecimiento))
+            self._conn.execute("INSERT INTO changes VALUES (?, ?, ?, 'delete', NULL, ?)",
+                               (sync_id, id_establecimiento, entidad, now))
+            stats["delete"] += 1
+        self._conn.commit()
+        return stats, len(seen)
+
+    def changes(self, since=0, entidad=None):
+        """
+        Cambios registrados después de la sincronización `since`, en orden.
+
+        Returns:
+            changes (list[dict]): {"sync_id", "id", "entidad", "op", "data"}; op es "insert", "update"
+                o "delete" y data es el registro (None en las bajas).
+        """
+        query = "SELECT sync_id, id, entidad, op, data FROM changes WHERE sync_id > ?"
+        args = [since]
+        if entidad is not None:
+            query += " AND entidad = ?"
+            args.append(Entidad.normalize(entidad))
+        rows = self._conn.execute(query + " ORDER BY rowid", args)
+        return [{"sync_id": sync_id, "id": id_establecimiento, "entidad": entidad, "op": op,
+                 "data": json.loads(data) if data else None}
+                for sync_id, id_establecimiento, entidad, op, data in rows]
+
+    def records(self, entidad=None):
+        """Genera los establecimientos vigentes (dicts), opcionalmente de una sola entidad."""
+        query = "SELECT data FROM establecimientos WHERE deleted = 0"
+        args = []
+        if entidad is not None:
+            query += " AND entidad = ?"
+            args.append(Entidad.normalize(entidad))
+        for (data,) in self._conn.execute(query, args):
+            yield json.loads(data)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM establecimientos WHERE deleted = 0").fetchone()[0]
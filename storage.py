@@ -0,0 +1,235 @@
+import datetime as dt
+import csv
+from pathlib import Path
+import writers
+from utils import Result, download_all_to_feather
+from writers import FeatherPageWriter, hive_partitioning, _require_pyarrow
+
+# pyarrow es opcional y tarda en importarse: _load_pyarrow lo carga la primera vez que se
+# guarda o abre un archivo Feather
+pa = None
+pc = None
+pa_csv = None
+ds = None
+pq = None
+
+
+def _load_pyarrow():
+    global pa, pc, pa_csv, ds, pq
+    if pa is not None:
+        return
+    _require_pyarrow()
+    import pyarrow.csv
+    pa, pc, ds, pq = writers.pa, writers.pc, writers.ds, writers.pq
+    pa_csv = pyarrow.csv
+
+
+def _tables(source, batch_size):
+    # Lotes de una fuente (CSV, Parquet, Result, DataFrame o pa.Table) sin leerla completa
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.suffix.lower() == ".csv":
+            with open(path, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f))
+            # Todo como texto: cast_table convierte los tipos igual que para las páginas de la API
+            convert = pa_csv.ConvertOptions(column_types={name: pa.string() for name in header},
+                                            strings_can_be_null=False)
+            read = pa_csv.ReadOptions(block_size=batch_size * 512)
+            for batch in pa_csv.open_csv(path, read_options=read, convert_options=convert):
+                yield pa.Table.from_batches([batch])
+        else:
+            dataset = ds.dataset(path, format="parquet", partitioning=hive_partitioning(path))
+            for batch in dataset.to_batches(batch_size=batch_size):
+                yield pa.Table.from_batches([batch])
+    elif isinstance(source, Result):
+        yield source.to_arrow()
+    elif isinstance(source, pa.Table):
+        yield source
+    else:  # pd.DataFrame
+        yield pa.Table.from_pandas(source, preserve_index=False)
+
+
+def save_feather(source, path, batch_size=65_536):
+    """
+    Convierte un extracto del DENUE a un archivo Feather (Arrow IPC) sin compresión con columnas
+    tipadas, que open_feather puede abrir con memory map. Los CSV y los datasets Parquet se
+    convierten por lotes, así que la memoria no depende del tamaño del archivo.
+
+    Ejemplo:
+        save_feather("denue_inegi_09_.csv", "denue_09.feather")
+        save_feather(client.BuscarEntidad(...), "entidad.feather")
+
+    Parámetros:
+        source: Ruta de un CSV (de download_all_to_csv o de la descarga masiva), de un archivo o
+            dataset Parquet, un Result, un pd.DataFrame o una pa.Table.
+        path (str | Path): Archivo de salida.
+        batch_size (int, optional): Registros por lote. Valor por defecto es 65536.
+
+    Returns:
+        path (Path): Ruta del archivo guardado.
+    """
+    _load_pyarrow()
+    writer = FeatherPageWriter(path)
+    try:
+        for table in _tables(source, batch_size):
+            writer.write_table(table)
+    finally:
+        writer.close()
+    return Path(path).resolve()
+
+
+def open_feather(path):
+    """
+    Abre un archivo Feather sin copiarlo a memoria (ver MappedResult).
+
+    Ejemplo:
+        datos = open_feather("denue_09.feather")
+        comercio = datos.select("Id", "Nombre", "Estrato").filter(Estrato=["0 a 5 personas", "6 a 10 personas"])
+        df = comercio.to_pandas()
+    """
+    return MappedResult.open(path)
+
+
+class MappedResult(Result):
+    """
+    Resultado respaldado por un archivo Feather (Arrow IPC) sin compresión abierto con memory
+    map. Abrirlo no lee los datos: las columnas apuntan directamente a las páginas del archivo,
+    que el sistema operativo carga del disco solo cuando se usan y comparte entre todos los
+    procesos que abren el mismo archivo. select, slice y filter devuelven otro MappedResult; select
+    y slice no copian datos y filter solo materializa las filas que cumplen la condición.
+
+    Tiene la misma interfaz que los demás resultados (data, to_pandas, to_csv, to_parquet,
+    to_columns, records, is_empty), además de to_arrow, que devuelve la tabla sin copiarla.
+
+    Parámetros:
+        table (pa.Table): Tabla con los datos.
+        path (Path, optional): Archivo del que proviene. Valor por defecto es None.
+    """
+
+    def __init__(self, table, path=None):
+        _load_pyarrow()
+        self.timestamp = dt.datetime.now()
+        self.raw_response = None
+        self.table = table
+        self.path = path
+        self.file_path = None
+        self.params = {}
+
+    @classmethod
+    def open(cls, path):
+        _load_pyarrow()
+        path = Path(path)
+        source = pa.memory_map(str(path), "r")
+        return cls(pa.ipc.open_file(source).read_all(), path)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __repr__(self):
+        return f"MappedResult({self.path or 'tabla'}, {len(self)} registros, {self.table.num_columns} columnas)"
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    @property
+    def schema(self):
+        return self.table.schema
+
+    @property
+    def data(self):
+        """Registros como lista de dicts. Materializa todas las filas; conviene filtrar antes."""
+        return self.table.to_pylist()
+
+    def make_file_path(self):
+        timestamp = self.timestamp.strftime("%Y%m%d-%H%M%S")
+        name = self.path.stem if self.path else "Consulta"
+        return f"{timestamp}-{name}-{len(self)}.csv"
+
+    def column(self, name):
+        """Columna como pa.ChunkedArray, sin copiarla."""
+        return self.table.column(name)
+
+    def select(self, *columns):
+        return MappedResult(self.table.select(list(columns)), self.path)
+
+    def slice(self, offset=0, length=None):
+        return MappedResult(self.table.slice(offset, length), self.path)
+
+    def head(self, n=5):
+        return self.slice(0, n)
+
+    def filter(self, expression=None, **equals):
+        """
+        Filas que cumplen la condición. La condición se evalúa sobre la tabla mapeada, pero el resultado
+        ya no apunta al archivo: las filas que la cumplen se copian a memoria con todas sus columnas,
+        así que conviene aplicar select antes si solo se necesitan algunas.
+
+        Ejemplo:
+            datos.filter(Clase_actividad="Comercio al por menor en tiendas de abarrotes, ultramarinos y misceláneas")
+            datos.filter(Estrato=["0 a 5 personas", "6 a 10 personas"], Cod_postal="06000")
+            datos.filter((pc.field("Latitud") > 19.40) & (pc.field("Latitud") < 19.45))
+
+        Parámetros:
+            expression (pc.Expression, optional): Condición de pyarrow.compute.
+            **equals: columna=valor, o columna=[valores] para cualquiera de varios valores.
+        """
+        conditions = [] if expression is None else [expression]
+        for name, value in equals.items():
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(pc.field(name).isin(list(value)))
+            else:
+                conditions.append(pc.field(name) == value)
+        if not conditions:
+            return self
+        condition = conditions[0]
+        for other in conditions[1:]:
+            condition = condition & other
+        return MappedResult(self.table.filter(condition), self.path)
+
+    def iter_batches(self, max_chunksize=None):
+        """Genera la tabla por lotes (pa.RecordBatch), sin copiarla."""
+        yield from self.table.to_batches(max_chunksize)
+
+    def iter_records(self, max_chunksize=10_000):
+        for batch in self.iter_batches(max_chunksize):
+            yield from batch.to_pylist()
+
+    def to_arrow(self):
+        return self.table
+
+    def to_pandas(self, **kwargs):
+        """DataFrame con los datos; Clase_actividad y Estrato quedan como columnas categóricas."""
+        return self.table.to_pandas(**kwargs)
+
+    def to_columns(self):
+        return {name: self.table.column(name).to_numpy() for name in self.columns}
+
+    def to_parquet(self, outfile=None, folder=None, partition_by=None, echo=True, **kwargs):
+        if partition_by:
+            return super().to_parquet(outfile, folder, partition_by, echo, **kwargs)
+        if not outfile:
+            outfile = Path(self.make_file_path()).with_suffix(".parquet")
+            if folder:
+                outfile = Path(folder)/outfile
+        self.file_path = outfile
+        pq.write_table(self.table, outfile, **kwargs)
+        outfile = Path(outfile).resolve()
+        if echo:
+            print(f"Archivo guardado en {outfile}")
+        return outfile
+
+    def is_empty(self):
+        return len(self) == 0
+
+
+def download_mapped(first_call, outfile=None, folder=None, **kwargs):
+    """
+    Descarga todas las páginas de una consulta paginada a un archivo Feather (ver
+    download_all) y lo abre con memory map.
+
+    Returns:
+        result (MappedResult): Datos descargados, o None si la consulta no tiene resultados.
+    """
+    outfile = download_all_to_feather(first_call, outfile, folder, **kwargs)
+    return open_feather(outfile) if outfile else None
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from denue import DenueInegiClient
+from stub_server import StubDenueServer
+
+
+@pytest.fixture
+def stub():
+    with StubDenueServer(total=1000) as stub:
+        yield stub
+
+
+@pytest.fixture
+def client(stub):
+    # Sin reintentos: las fallas que inyecta el stub deben llegar a la descarga
+    with DenueInegiClient("token", max_retries=0) as client:
+        client.URL_BASE = stub.url_base
+        yield client
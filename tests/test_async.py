@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+import requests.exceptions
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from async_denue import AsyncDenueInegiClient, _is_no_data_error, aiter_pages, async_make_request, gather
+from ratelimit import RetryPolicy
+from utils import NoDataResponse
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.records = []
+
+    async def acquire_async(self):
+        pass
+
+    def record(self, latency, error=False):
+        self.records.append(error)
+
+    def pause(self, seconds):
+        pass
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_no_data_reply_is_detected(stub):
+    # El stub responde "HTTP/1.1 000" fuera de rango, igual que la API cuando no hay datos
+    url = f"{stub.url_base}BuscarEntidad/todos/09/2001/2010/token"
+
+    async def main():
+        async with aiohttp.ClientSession() as session:
+            with pytest.raises(aiohttp.ClientError) as error:
+                async with session.get(url) as response:
+                    await response.read()
+            assert _is_no_data_error(error.value)
+            return await async_make_request(session, url)
+
+    response = run(main())
+    assert isinstance(response, NoDataResponse)
+
+
+def test_empty_page_ends_iteration(stub):
+    async def main():
+        async with AsyncDenueInegiClient("token") as client:
+            client.URL_BASE = stub.url_base
+            first = await client.BuscarEntidad(registro_inicial=1, registro_final=300)
+            return [page async for page in aiter_pages(first, per=299)], await first.page(2001, 2010)
+
+    pages, empty = run(main())
+    assert [len(page.data) for page in pages] == [300, 300, 300, 100]
+    assert empty.is_empty()
+
+
+def test_client_error_is_recorded_in_limiter(stub):
+    stub.fail(1, status=400)
+    limiter = RecordingLimiter()
+    url = f"{stub.url_base}BuscarEntidad/todos/09/1/10/token"
+
+    async def main():
+        async with aiohttp.ClientSession() as session:
+            await async_make_request(session, url, rate_limiter=limiter, retry=RetryPolicy(3))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        run(main())
+    assert limiter.records == [True]  # 4xx no se reintenta, pero cuenta como error una sola vez
+
+
+def test_close_is_awaitable(stub):
+    async def main():
+        client = AsyncDenueInegiClient("token")
+        client.URL_BASE = stub.url_base
+        results = await gather((client.Cuantificar("46", area) for area in ("09", "15")), limit=2)
+        await client.close()
+        return results, client._session
+
+    results, session = run(main())
+    assert len(results) == 2 and session is None
@@ -0,0 +1,92 @@
+import os
+import time
+
+import pytest
+
+from cache import CacheMissError, ResponseCache, cache_key
+from denue import DenueInegiClient
+
+
+@pytest.fixture
+def make_client(stub, tmp_path):
+    clients = []
+
+    def make(**kwargs):
+        cache = ResponseCache(tmp_path / "cache.sqlite", **kwargs)
+        client = DenueInegiClient("token", max_retries=0, cache=cache)
+        client.URL_BASE = stub.url_base
+        clients.append(client)
+        return client, cache
+
+    yield make
+    for client in clients:
+        client._cache.close()
+        client.close()
+
+
+def test_token_is_not_part_of_the_key():
+    url = "https://www.inegi.org.mx/app/api/denue/v1/consulta/Cuantificar/46/09/0/"
+    assert cache_key(url + "token-a") == cache_key(url + "token-b") == "Cuantificar/46/09/0"
+
+
+def test_repeated_query_is_served_from_cache(stub, make_client):
+    client, cache = make_client()
+    first = client.Cuantificar("46", "09")
+    second = client.Cuantificar("46", "09")
+
+    assert stub.requests == 1
+    assert second.data == first.data
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_downloaded_again(stub, make_client):
+    client, cache = make_client(ttl=0.05)
+    client.Cuantificar("46", "09")
+    time.sleep(0.1)
+    client.Cuantificar("46", "09")
+
+    assert stub.requests == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    # Contenido aleatorio: comprimido ocupa lo mismo, así que caben exactamente dos entradas
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_size=2500)
+    cache.set("a", 200, os.urandom(1000))
+    time.sleep(0.01)
+    cache.set("b", 200, os.urandom(1000))
+    time.sleep(0.01)
+    assert cache.get("a") is not None  # "a" pasa a ser la más reciente
+    time.sleep(0.01)
+    cache.set("c", 200, os.urandom(1000))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["size"] <= 2500
+    cache.close()
+
+
+def test_cache_only_raises_on_miss(stub, make_client):
+    client, cache = make_client(mode="cache-only")
+    with pytest.raises(CacheMissError):
+        client.Cuantificar("46", "09")
+    assert stub.requests == 0
+
+
+def test_cache_only_serves_stored_responses(stub, make_client):
+    client, _ = make_client()
+    client.Cuantificar("46", "09")
+    offline, _ = make_client(mode="cache-only")
+    assert offline.Cuantificar("46", "09").data
+    assert stub.requests == 1
+
+
+def test_refresh_always_downloads_and_updates(stub, make_client):
+    client, _ = make_client()
+    client.Cuantificar("46", "09")
+    refresher, cache = make_client(mode="refresh")
+    refresher.Cuantificar("46", "09")
+    refresher.Cuantificar("46", "09")
+
+    assert stub.requests == 3
+    assert cache.stats()["hits"] == 0 and cache.stats()["entries"] == 1
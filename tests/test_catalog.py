@@ -0,0 +1,17 @@
+from catalog import Catalog
+
+
+def test_municipio_gaps_are_rejected():
+    catalog = Catalog()
+    assert not catalog.is_valid_municipio("09001")
+    assert catalog.is_valid_municipio("09", "2")
+    assert not catalog.is_valid_municipio("03004")
+    assert not catalog.is_valid_municipio("07", "095")
+    assert catalog.is_valid_municipio("07125")
+
+
+def test_expand_area_skips_gaps():
+    municipios = Catalog().expand_area("09", "municipio")
+    assert municipios[0] == "09002" and municipios[-1] == "09017"
+    assert len(municipios) == 16
+    assert Catalog().expand_area("03", "municipio") == ["03001", "03002", "03003", "03008", "03009"]
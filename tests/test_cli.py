@@ -0,0 +1,103 @@
+import csv
+import json
+
+import pytest
+
+from cli import STATE_FILE, expand_jobs, load_spec, main, run
+from denue import DenueInegiClient
+
+
+def make_spec(tmp_path, **extra):
+    spec = {
+        "folder": str(tmp_path / "extractos"),
+        "per": 249,
+        "concurrency": 4,
+        "parallel": 2,
+        "max_retries": 0,
+        "queries": [
+            {"name": "todos", "endpoint": "BuscarEntidad", "entidades": ["09", "15"]},
+            {"name": "comercio", "endpoint": "BuscarAreaActEstr", "params": {"sector": "46"}, "per": 499},
+        ],
+    }
+    spec.update(extra)
+    return spec
+
+
+def test_load_spec_json_and_yaml(tmp_path):
+    spec = make_spec(tmp_path)
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    assert load_spec(path) == spec
+
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "spec.yaml"
+    path.write_text(yaml.safe_dump(spec), encoding="utf-8")
+    assert load_spec(path) == spec
+
+
+def test_expand_jobs(tmp_path):
+    jobs = expand_jobs(make_spec(tmp_path))
+
+    assert [(job.name, job.endpoint, job.per) for job in jobs] == [
+        ("todos-09", "BuscarEntidad", 249), ("todos-15", "BuscarEntidad", 249),
+        ("comercio", "BuscarAreaActEstr", 499),
+    ]
+    assert jobs[1].params == {"entidad_federativa": "15"}
+    assert len(expand_jobs({"queries": [{"endpoint": "BuscarEntidad", "entidades": "todas"}]})) == 32
+
+
+@pytest.mark.parametrize("query, message", [
+    ({"endpoint": "Ficha"}, "Invalid endpoint"),
+    ({"endpoint": "BuscarEntidad", "format": "xlsx"}, "Invalid format"),
+])
+def test_expand_jobs_rejects_invalid_queries(query, message):
+    with pytest.raises(ValueError, match=message):
+        expand_jobs({"queries": [query]})
+
+
+def test_expand_jobs_rejects_duplicated_names():
+    query = {"name": "talleres", "endpoint": "BuscarEntidad"}
+    with pytest.raises(ValueError, match="Duplicated"):
+        expand_jobs({"queries": [query, query]})
+
+
+def test_run_downloads_every_job(stub, tmp_path):
+    summary = run(make_spec(tmp_path), "token", url_base=stub.url_base)
+
+    assert [(job["name"], job["status"], job["records"], job["total"]) for job in summary["jobs"]] == [
+        ("todos-09", "completo", 1000, 1000), ("todos-15", "completo", 1000, 1000),
+        ("comercio", "completo", 1000, 1000),
+    ]
+    assert DenueInegiClient.URL_BASE.startswith("https://www.inegi.org.mx")
+
+
+def test_completed_jobs_are_not_downloaded_again(stub, tmp_path):
+    spec = make_spec(tmp_path)
+    run(spec, "token", url_base=stub.url_base)
+    requests = stub.requests
+    summary = run(spec, "token", url_base=stub.url_base)
+
+    assert all(job["status"] == "completo" for job in summary["jobs"])
+    assert stub.requests == requests
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(stub, tmp_path):
+    spec = make_spec(tmp_path, queries=[{"name": "todos", "endpoint": "BuscarEntidad"}])
+    stub.fail(501, status=500)
+    summary = run(spec, "token", url_base=stub.url_base)
+    assert summary["jobs"][0]["status"] != "completo"
+    state = json.loads((tmp_path / "extractos" / STATE_FILE).read_text(encoding="utf-8"))
+    assert state["todos"]["status"] == summary["jobs"][0]["status"]
+
+    summary = run(spec, "token", url_base=stub.url_base)
+    job = summary["jobs"][0]
+    assert (job["status"], job["records"]) == ("completo", 1000)
+    with open(job["outfile"], newline="", encoding="utf-8") as file:
+        assert [int(row["Id"]) for row in csv.DictReader(file)] == list(range(1, 1001))
+
+
+def test_main_sets_url_base_only_on_the_client(stub, tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(make_spec(tmp_path)), encoding="utf-8")
+    main([str(path), "--token", "token", "--url-base", stub.url_base])
+    assert DenueInegiClient.URL_BASE.startswith("https://www.inegi.org.mx")
@@ -0,0 +1,81 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from coalesce import RequestCoalescer
+from denue import DenueInegiClient
+from stub_server import StubDenueServer
+
+
+@pytest.fixture
+def slow_stub():
+    # La latencia mantiene la primera solicitud en curso mientras llegan las demás
+    with StubDenueServer(total=1000, latency=0.2) as stub:
+        yield stub
+
+
+def test_concurrent_calls_share_one_request(slow_stub):
+    coalescer = RequestCoalescer(ttl=0)
+    with DenueInegiClient("token", coalescer=coalescer) as client:
+        client.URL_BASE = slow_stub.url_base
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: client.Cuantificar("46", "09"), range(10)))
+
+    assert slow_stub.requests == 1
+    assert all(result is results[0] for result in results)
+    stats = coalescer.stats()
+    assert stats["requests"] == 10
+    assert stats["coalesced"] == 9
+    assert stats["network"] == 1
+
+
+def test_different_queries_are_not_coalesced(slow_stub):
+    coalescer = RequestCoalescer()
+    with DenueInegiClient("token", coalescer=coalescer) as client:
+        client.URL_BASE = slow_stub.url_base
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda area: client.Cuantificar("46", area), ["09", "15", "09", "15"]))
+
+    assert slow_stub.requests == 2
+
+
+def test_recent_results_come_from_memory(slow_stub):
+    coalescer = RequestCoalescer(ttl=60)
+    with DenueInegiClient("token", coalescer=coalescer) as client:
+        client.URL_BASE = slow_stub.url_base
+        first = client.Cuantificar("46", "09")
+        assert client.Cuantificar("46", "09") is first
+
+    assert slow_stub.requests == 1
+    assert coalescer.stats()["memory_hits"] == 1
+
+
+def test_failures_reach_every_waiter(slow_stub):
+    coalescer = RequestCoalescer()
+    slow_stub.fail(1, status=400)
+    with DenueInegiClient("token", max_retries=0, coalescer=coalescer) as client:
+        client.URL_BASE = slow_stub.url_base
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(client.BuscarEntidad, registro_inicial=1, registro_final=10) for _ in range(5)]
+        errors = [future.exception() for future in futures]
+
+    assert slow_stub.requests == 1
+    assert all(error is not None for error in errors)
+    assert coalescer.stats()["entries"] == 0
+
+
+def test_async_tasks_share_one_request(slow_stub):
+    async_denue = pytest.importorskip("async_denue")
+    pytest.importorskip("aiohttp")
+    coalescer = RequestCoalescer(ttl=0)
+
+    async def main():
+        async with async_denue.AsyncDenueInegiClient("token", coalescer=coalescer) as client:
+            client.URL_BASE = slow_stub.url_base
+            return await asyncio.gather(*(client.Cuantificar("46", "09") for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert slow_stub.requests == 1
+    assert all(result is results[0] for result in results)
+    assert coalescer.stats()["coalesced"] == 9
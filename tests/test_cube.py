@@ -0,0 +1,80 @@
+import itertools
+
+import pytest
+
+from stub_server import make_record
+
+pytest.importorskip("pandas")
+
+from cube import CuantificarCube
+from offline import LocalIndex, OfflineDenueClient
+
+ENTIDADES = ("09", "15")
+MUNICIPIOS = ("001", "002", "015")
+CLASES = ("461110", "461121", "811111", "722511")
+
+
+def make_records(n=300):
+    records = []
+    for i in range(1, n + 1):
+        entidad, municipio = ENTIDADES[i % 2], MUNICIPIOS[i % 3]
+        clase = CLASES[i % 4]
+        records.append(dict(make_record(i), CLEE=f"{entidad}{municipio}{clase}{i:06d}000000U0",
+                            Localidad_id=f"{i % 5 + 1:04d}", Estrato=str(i % 7 + 1)))
+    return records
+
+
+RECORDS = make_records()
+
+
+def brute_force(actividad, area, estrato="0"):
+    def matches(record):
+        clee = record["CLEE"]
+        geo = clee[:5] + record["Localidad_id"]
+        return ((actividad == "0" or clee[5:11].startswith(actividad))
+                and (area == "0" or geo.startswith(area))
+                and (estrato == "0" or record["Estrato"] == estrato))
+    return sum(map(matches, RECORDS))
+
+
+@pytest.fixture(scope="module")
+def cube():
+    return CuantificarCube(RECORDS)
+
+
+def test_counts_match_the_records_at_every_level(cube):
+    actividades = ["0", "46", "81", "461", "4611", "46111", "461110", "722511"]
+    areas = ["0", "09", "15", "09001", "15015", "090010001", "150020002"]
+    rows = cube.Cuantificar(",".join(actividades), ",".join(areas)).data
+    assert [(row["AE"], row["AG"]) for row in rows] == list(itertools.product(actividades, areas))
+    assert [row["Total"] for row in rows] == [brute_force(*key) for key in itertools.product(actividades, areas)]
+    assert cube.total == len(RECORDS)
+
+
+def test_counts_by_estrato(cube):
+    for estrato in ("1", "4", "7"):
+        assert cube.Cuantificar("46", "09", estrato).data[0]["Total"] == brute_force("46", "09", estrato)
+
+
+def test_unknown_combinations_count_zero(cube):
+    assert cube.Cuantificar("31", "32").data == [{"AE": "31", "AG": "32", "Total": 0}]
+
+
+def test_matrix_and_drill_down(cube):
+    matrix = cube.matrix("46,81", "09,15")
+    assert matrix.loc["46", "15"] == brute_force("46", "15")
+
+    drill = cube.drill_down(actividad="46", area="09")
+    assert list(drill.index) == ["461"]
+    assert list(drill.columns) == ["09001", "09002", "09015"]
+    assert drill.loc["461", "09015"] == brute_force("461", "09015")
+    assert cube.children("09015") == sorted({record["CLEE"][:5] + record["Localidad_id"] for record in RECORDS
+                                             if record["CLEE"].startswith("09015")})
+    assert len(cube.children("09015")) == 5
+
+
+def test_offline_client_answers_from_the_cube(cube):
+    index = LocalIndex(RECORDS)
+    with OfflineDenueClient(index, cube=cube) as with_cube, OfflineDenueClient(index) as without_cube:
+        assert (with_cube.Cuantificar("46,81", "09,15001").data
+                == without_cube.Cuantificar("46,81", "09,15001").data)
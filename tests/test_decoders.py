@@ -0,0 +1,88 @@
+import importlib
+import importlib.util
+import json
+import math
+
+import pytest
+
+import decoders
+from models import Establecimiento
+from stub_server import make_record
+from utils import NoDataResponse, Result, records_to_columns
+
+np = pytest.importorskip("numpy")
+
+CONTENT = json.dumps([make_record(1), make_record(2)], ensure_ascii=False).encode("utf-8")
+
+
+@pytest.fixture
+def without_optional_decoders(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name in ("orjson", "msgspec") else find_spec(name, *args))
+    importlib.reload(decoders)
+    yield
+    monkeypatch.undo()
+    importlib.reload(decoders)
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_backends_decode_the_same_data(name):
+    if name != "json":
+        pytest.importorskip(name)
+    decode = decoders.get_decoder(name)
+    assert decode(CONTENT) == json.loads(CONTENT)
+    # Las respuestas que no vienen en UTF-8 se convierten antes de decodificar
+    assert decode('[{"Nombre": "PANADERÍA"}]'.encode("latin-1"), "latin-1") == [{"Nombre": "PANADERÍA"}]
+
+
+def test_default_falls_back_to_json(without_optional_decoders):
+    assert decoders.get_decoder() is decoders.json_decode
+    with pytest.raises(ImportError):
+        decoders.get_decoder("orjson")
+
+
+def test_unknown_decoder_is_rejected():
+    with pytest.raises(ValueError):
+        decoders.get_decoder("yaml")
+
+
+def test_raw_decoder_keeps_bytes():
+    assert decoders.raw_decode(CONTENT) == CONTENT
+    assert Result(NoDataResponse(), decoder="raw").is_empty()
+
+
+def test_records_to_columns_converts_numeric_fields():
+    data = json.loads(CONTENT)
+    data[1]["Latitud"] = ""
+    columns = records_to_columns(data)
+
+    assert columns["Id"] == ["1", "2"]
+    assert columns["Longitud"].dtype == np.float64
+    assert columns["Latitud"][0] == float(data[0]["Latitud"]) and math.isnan(columns["Latitud"][1])
+
+
+def test_records_to_columns_with_different_keys():
+    columns = records_to_columns([{"Id": "1", "Total": "5"}, {"Id": "2", "Nombre": "X"}])
+    assert columns["Nombre"] == [None, "X"]
+    assert columns["Total"].dtype == np.float64 and math.isnan(columns["Total"][1])
+    assert records_to_columns([]) == {}
+
+
+def test_to_columns_counts_as_integers():
+    response = NoDataResponse()
+    response._content = b'[{"AE": "46", "AG": "09", "Total": "1234"}]'
+    columns = Result(response).to_columns()
+    assert columns["Total"].dtype == np.int64 and columns["Total"][0] == 1234
+
+
+def test_establecimiento_has_numeric_coordinates_and_keeps_extra_fields():
+    record = dict(make_record(7), Latitud="19.43", Longitud="sin dato", Nuevo="x")
+    establecimiento = Establecimiento.from_dict(record)
+
+    assert establecimiento.Id == "7"
+    assert establecimiento.Latitud == 19.43 and math.isnan(establecimiento.Longitud)
+    assert establecimiento.extra == {"Nuevo": "x"}
+    assert establecimiento.to_dict()["Nuevo"] == "x"
+    with pytest.raises(AttributeError):
+        establecimiento.otro = 1
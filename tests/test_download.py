@@ -0,0 +1,52 @@
+import csv
+
+from utils import DownloadCheckpoint, download_all
+
+
+def read_ids(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [int(row["Id"]) for row in csv.DictReader(f)]
+
+
+def test_download_all(client, tmp_path):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    outfile = download_all(first, tmp_path / "todo.csv", per=99, workers=3, delay=0)
+    assert read_ids(outfile) == list(range(1, 1001))
+    assert not list(tmp_path.glob(".denue-checkpoint-*"))
+
+
+def test_resume_after_failure(client, stub, tmp_path):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    stub.fail(501, status=400)
+    outfile = download_all(first, tmp_path / "todo.csv", per=99, delay=0)
+
+    # La descarga se detuvo en 501: queda el archivo parcial y el punto de control
+    assert read_ids(outfile) == list(range(1, 501))
+    checkpoint = DownloadCheckpoint(first, 99, tmp_path)
+    assert checkpoint.completed() == {(n, n + 99) for n in range(1, 501, 100)}
+
+    requests = stub.requests
+    outfile = download_all(first, tmp_path / "todo.csv", per=99, delay=0)
+    assert read_ids(outfile) == list(range(1, 1001))
+    assert stub.requests - requests == 6  # 501-1000 y la página vacía que termina la descarga
+    assert not checkpoint.path.exists()
+
+
+def test_resume_discards_corrupted_pages(client, stub, tmp_path):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    stub.fail(501, status=400)
+    download_all(first, tmp_path / "todo.csv", per=99, delay=0)
+
+    # Se altera la última página escrita: su checksum ya no coincide y se vuelve a descargar
+    checkpoint = DownloadCheckpoint(first, 99, tmp_path)
+    with open(checkpoint.data_path, "r+b") as f:
+        f.seek(-10, 2)
+        f.write(b"XXXXXXXXXX")
+    resumed = DownloadCheckpoint(first, 99, tmp_path)
+    assert resumed.completed() == {(n, n + 99) for n in range(1, 401, 100)}
+    assert resumed.offset() < checkpoint.data_path.stat().st_size
+
+    requests = stub.requests
+    outfile = download_all(first, tmp_path / "todo.csv", per=99, delay=0)
+    assert read_ids(outfile) == list(range(1, 1001))
+    assert stub.requests - requests == 7
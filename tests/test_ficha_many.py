@@ -0,0 +1,39 @@
+import requests.exceptions
+
+
+def ids(result):
+    return [record["Id"] for record in result.data]
+
+
+def test_results_follow_input_order_without_duplicates(client, stub):
+    result = client.Ficha_many([5, "3", 5, 9, 3], workers=4)
+
+    assert ids(result) == ["5", "3", "9"]
+    assert result.failures == {}
+    assert stub.requests == 3
+
+
+def test_store_skips_known_ids(client, stub):
+    store = {}
+    client.Ficha_many(["1", "2"], store=store)
+    result = client.Ficha_many(["1", "2", "3"], store=store)
+
+    assert ids(result) == ["1", "2", "3"]
+    assert set(store) == {"1", "2", "3"}
+    assert stub.requests == 3
+
+
+def test_failures_are_reported_and_not_stored(client, stub):
+    stub.fail(2, status=500)
+    store = {}
+    result = client.Ficha_many(["1", "2", "3"], store=store)
+
+    assert ids(result) == ["1", "3"]
+    assert isinstance(result.failures["2"], requests.exceptions.HTTPError)
+    assert "2" not in store
+
+
+def test_unknown_ids_return_no_records(client):
+    result = client.Ficha_many(["1", "5000"])
+    assert ids(result) == ["1"]
+    assert result.failures == {}
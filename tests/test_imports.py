@@ -0,0 +1,39 @@
+import importlib.util
+import subprocess
+import sys
+
+import pytest
+
+from bench_import import HEAVY_MODULES, ROOT, heavy_modules
+
+
+def loaded_after(code, modules):
+    """Módulos de `modules` cargados después de correr `code` en un proceso nuevo."""
+    code += f"\nimport sys; print(','.join(m for m in {tuple(modules)!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in output.stdout.strip().split(",") if name]
+
+
+@pytest.mark.parametrize("module", ["denue", "utils", "writers", "storage", "pipeline", "metrics", "offline"])
+def test_import_does_not_load_heavy_modules(module):
+    assert heavy_modules(module) == []
+
+
+def test_client_import_skips_asyncio_and_http_server():
+    assert loaded_after("import denue", ("asyncio", "http.server")) == []
+
+
+def test_heavy_modules_load_on_first_use():
+    pytest.importorskip("pandas")
+    code = (
+        "from utils import NoDataResponse, Result\n"
+        "response = NoDataResponse()\n"
+        "response._content = b'[{\"Id\": \"1\", \"Latitud\": \"19.4\"}]'\n"
+        "result = Result(response)\n"
+        "assert result.data[0]['Id'] == '1'\n"
+        "result.to_pandas()"
+    )
+    loaded = loaded_after(code, HEAVY_MODULES)
+    assert "pandas" in loaded and "numpy" in loaded
+    if importlib.util.find_spec("orjson") is not None:
+        assert "orjson" in loaded  # el decoder por defecto se importa con la primera respuesta
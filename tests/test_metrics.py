@@ -0,0 +1,43 @@
+import pytest
+
+from denue import DenueInegiClient
+from metrics import Instrumentation, RequestEvent, RequestStats
+
+
+def prometheus_values(text):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+            if not line.startswith("#")}
+
+
+def test_prometheus_sum_and_count_are_cumulative():
+    pytest.importorskip("numpy")
+    stats = RequestStats(window=3)
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5):
+        stats(RequestEvent("end", "Cuantificar", "url", status=200, latency=latency))
+    stats(RequestEvent("error", "Cuantificar", "url", latency=1.0, error=ValueError()))
+
+    values = prometheus_values(stats.to_prometheus())
+    name = 'denue_request_latency_seconds'
+    assert values[f'{name}_sum{{endpoint="Cuantificar"}}'] == pytest.approx(2.5)
+    assert values[f'{name}_count{{endpoint="Cuantificar"}}'] == 6
+    # Los percentiles solo usan las últimas `window` latencias de respuestas exitosas
+    assert values[f'{name}{{endpoint="Cuantificar",quantile="0.50"}}'] == pytest.approx(0.4)
+    assert values['denue_errors_total{endpoint="Cuantificar"}'] == 1
+
+
+def test_events_from_the_client(stub):
+    pytest.importorskip("numpy")
+    stats = RequestStats()
+    stub.fail(11, status=400)
+    with DenueInegiClient("token", max_retries=0, instrumentation=Instrumentation(stats)) as client:
+        client.URL_BASE = stub.url_base
+        client.BuscarEntidad(registro_inicial=1, registro_final=10)
+        client.BuscarEntidad(registro_inicial=2001, registro_final=2010)
+        with pytest.raises(Exception):
+            client.BuscarEntidad(registro_inicial=11, registro_final=20)
+
+    summary = stats.summary()["BuscarEntidad"]
+    assert (summary["requests"], summary["errors"], summary["no_data"]) == (3, 1, 1)
+    assert summary["statuses"] == {200: 1, 204: 1}
+    values = prometheus_values(stats.to_prometheus())
+    assert values['denue_request_latency_seconds_count{endpoint="BuscarEntidad"}'] == 3
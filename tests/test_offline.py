@@ -0,0 +1,63 @@
+import pytest
+
+from bench_import import heavy_modules
+from stub_server import make_record
+
+pytest.importorskip("numpy")
+
+from offline import LocalIndex, OfflineDenueClient
+
+
+def record(i, clee, estrato, nombre, lat, lon):
+    return dict(make_record(i), CLEE=clee, Estrato=estrato, Nombre=nombre, Latitud=str(lat), Longitud=str(lon))
+
+
+RECORDS = [
+    record(1, "09015811111000011000000000U1", "0 a 5 personas", "TALLER MECÁNICO EL GÜERO", 19.4300, -99.1300),
+    record(2, "09015461110000021000000000U2", "6 a 10 personas", "ABARROTES LUPITA", 19.4310, -99.1310),
+    record(3, "09016811111000031000000000U3", "11 a 30 personas", "TALLER DIAZ", 19.5000, -99.2000),
+    record(4, "15001811111000041000000000U4", "0 a 5 personas", "REFACCIONES PEÑA", 19.3000, -99.6000),
+]
+
+
+@pytest.fixture
+def offline():
+    with OfflineDenueClient(LocalIndex(RECORDS)) as client:
+        yield client
+
+
+def ids(result):
+    return [record["Id"] for record in result.data]
+
+
+def test_import_does_not_load_numpy():
+    assert "numpy" not in heavy_modules("offline")
+
+
+def test_area_activity_and_estrato_filters(offline):
+    assert ids(offline.BuscarAreaActEstr(entidad_federativa="09", municipio="015", sector="81",
+                                         registro_final=10)) == ["1"]
+    assert ids(offline.BuscarAreaActEstr(entidad_federativa="09", estrato="2", registro_final=10)) == ["2"]
+    assert ids(offline.BuscarAreaActEstr(clase="811111", registro_final=10)) == ["1", "3", "4"]
+
+
+def test_pages_follow_registro_inicial(offline):
+    assert ids(offline.BuscarEntidad(entidad_federativa="09", registro_inicial=2, registro_final=10)) == ["2", "3"]
+    assert offline.BuscarEntidad(entidad_federativa="09", registro_inicial=4, registro_final=10).is_empty()
+
+
+def test_name_search_ignores_case_and_accents(offline):
+    assert ids(offline.Nombre("guero", registro_final=10)) == ["1"]
+    assert ids(offline.Nombre("Peña", registro_final=10)) == ["4"]
+    assert ids(offline.Nombre("taller", entidad_federativa="09", registro_final=10)) == ["1", "3"]
+
+
+def test_ficha_and_radius_search(offline):
+    assert ids(offline.Ficha("3")) == ["3"]
+    assert offline.Ficha("99").is_empty()
+    assert ids(offline.Buscar("todos", (19.4311, -99.1311), 500)) == ["2", "1"]  # del más cercano al más lejano
+
+
+def test_counts(offline):
+    rows = offline.Cuantificar("81", "09,15").data
+    assert [(row["AE"], row["AG"], row["Total"]) for row in rows] == [("81", "09", 2), ("81", "15", 1)]
@@ -0,0 +1,83 @@
+import csv
+
+import pytest
+
+import utils
+from denue import DenueInegiClient
+from pager import PageSizer, fetch_pages_adaptive
+from stub_server import StubDenueServer
+from utils import DownloadCheckpoint, download_all
+from writers import CsvPageWriter
+
+
+def ids(pages):
+    return [int(record["Id"]) for page in pages for record in page.data]
+
+
+def test_split_on_timeout():
+    # Cada registro tarda 1 ms: las páginas de más de ~300 registros superan el timeout de lectura
+    with StubDenueServer(total=1500, record_latency=0.001) as stub, \
+            DenueInegiClient("token", max_retries=0, timeout=(5, 0.3)) as client:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+        sizer = PageSizer(per=800, min_per=10)
+        pages = list(fetch_pages_adaptive(first, sizer, delay=0))
+
+    # Los rangos que no respondieron a tiempo se dividieron hasta caber en el timeout
+    assert ids(pages) == list(range(1, 1501))
+    assert all(len(page.data) <= 300 for page in pages)
+
+
+def test_api_truncation_caps_page_size():
+    with StubDenueServer(total=3000, max_per=400) as stub, DenueInegiClient("token", max_retries=0) as client:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+        sizer = PageSizer(per=1000)
+        pages = list(fetch_pages_adaptive(first, sizer, workers=3, delay=0))
+
+    assert ids(pages) == list(range(1, 3001))
+    assert sizer.max_per == 400
+
+
+def test_last_short_page_is_not_truncation(client):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    sizer = PageSizer(per=300)
+    pages = list(fetch_pages_adaptive(first, sizer, workers=3, delay=0))
+
+    # La última página (901-1000 de un rango de 300) es corta solo porque ahí terminan los datos
+    assert ids(pages) == list(range(1, 1001))
+    assert sizer.max_per == 5000
+
+
+class CrashingWriter(CsvPageWriter):
+    """Simula que el proceso muere antes de escribir la página número `crash_at`."""
+    crash_at = 3
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pages = 0
+
+    def write(self, records):
+        self.pages += 1
+        if self.pages == self.crash_at:
+            raise KeyboardInterrupt
+        return super().write(records)
+
+
+def test_resume_after_truncated_page(tmp_path, monkeypatch):
+    with StubDenueServer(total=3000, max_per=400) as stub, DenueInegiClient("token", max_retries=0) as client:
+        client.URL_BASE = stub.url_base
+        first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+        # 101-1100 llega recortada a 101-500; el proceso muere antes de escribir el resto (501-1100)
+        with monkeypatch.context() as patch:
+            patch.setitem(utils.WRITERS, "csv", CrashingWriter)
+            with pytest.raises(KeyboardInterrupt):
+                download_all(first, folder=tmp_path, per=PageSizer(per=1000), delay=0)
+        checkpoint = DownloadCheckpoint(first, "auto", tmp_path)
+        assert checkpoint.completed() == {(1, 100), (101, 1100)}
+        assert checkpoint.received() == {(1, 100), (101, 500)}
+
+        outfile = download_all(first, folder=tmp_path, per=PageSizer(per=1000), delay=0)
+
+    with open(outfile, newline="", encoding="utf-8") as file:
+        assert [int(row["Id"]) for row in csv.DictReader(file)] == list(range(1, 3001))
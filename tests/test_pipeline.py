@@ -0,0 +1,41 @@
+import csv
+
+import pytest
+
+from pipeline import download_pipeline, raw_pages
+from utils import DownloadCheckpoint
+
+pytest.importorskip("pandas")
+
+
+def test_decoder_override_applies_to_following_pages(client):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100, decoder="raw")
+    second = first.next_page()
+
+    assert isinstance(first.data, bytes) and isinstance(second.data, bytes)
+    assert isinstance(client.BuscarEntidad(registro_inicial=1, registro_final=100).data, list)
+    assert client.BuscarEntidad(registro_inicial=2001, registro_final=2100, decoder="raw").is_empty()
+
+
+def test_raw_pages_keep_the_client_untouched(client):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    raw = raw_pages(first)
+
+    assert raw.method == first.method
+    assert isinstance(raw.data, bytes) and isinstance(raw.next_page().data, bytes)
+    assert isinstance(first.next_page().data, list)
+    assert client._decoder is None
+    # El decoder no cambia la consulta, así que los puntos de control son los mismos
+    assert DownloadCheckpoint.make_query(raw, 100) == DownloadCheckpoint.make_query(first, 100)
+
+
+def test_download_pipeline_writes_every_page(client, tmp_path):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    files = download_pipeline(first, tmp_path, per=249, workers=2, delay=0, processes=2)
+
+    assert [path.name for path in files] == [f"part-0000{i}.csv" for i in range(5)]  # 1-100 y cuatro páginas de 250
+    ids = []
+    for path in files:
+        with open(path, newline="", encoding="utf-8") as file:
+            ids.extend(int(row["Id"]) for row in csv.DictReader(file))
+    assert ids == list(range(1, 1001))
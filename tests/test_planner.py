@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from planner import SECTORES, Shard, count, plan, run
+
+
+class CountingClient:
+    """Responde Cuantificar con el desglose por clave, como la API cuando se consultan varias claves."""
+
+    def __init__(self, totals, echo=True):
+        self.totals = totals  # {(actividad, area, estrato): total}
+        self.echo = echo
+        self.calls = []
+
+    def Cuantificar(self, actividades, areas, estrato="0"):
+        self.calls.append((actividades, areas, estrato))
+        rows = []
+        for actividad in actividades.split(","):
+            for area in areas.split(","):
+                if (actividad, area, estrato) in self.totals:
+                    rows.append({"AE": actividad if self.echo else "", "AG": area if self.echo else "",
+                                 "Total": str(self.totals[(actividad, area, estrato)])})
+        return SimpleNamespace(data=rows)
+
+
+def test_single_combination_uses_total_directly():
+    client = CountingClient({("0", "09", "0"): 450_000}, echo=False)
+    assert count(client, ["0"], ["09"]) == {("0", "09"): 450_000}
+    assert count(client, ["0"], ["15"]) == {("0", "15"): 0}  # sin datos
+
+
+def test_breakdown_by_key():
+    client = CountingClient({("46", "09", "0"): 10, ("46", "15", "0"): 20})
+    assert count(client, ["46"], ["09", "15"]) == {("46", "09"): 10, ("46", "15"): 20}
+    assert len(client.calls) == 1
+
+
+def test_missing_key_raises():
+    client = CountingClient({("46", "09", "0"): 10})
+    with pytest.raises(ValueError, match="15"):
+        count(client, ["46"], ["09", "15"])
+
+
+def test_without_breakdown_each_combination_is_counted(client, stub):
+    # El stub devuelve un solo total para "46,47"; se cuenta cada combinación por separado
+    assert count(client, ["46", "47"], ["09"]) == {("46", "09"): 1000, ("47", "09"): 1000}
+    assert stub.requests == 3
+
+
+def test_plan_splits_large_entidades_by_sector_and_estrato():
+    totals = {("0", "09", "0"): 150, ("0", "15", "0"): 40}
+    totals.update({(sector, "09", "0"): 0 for sector in SECTORES})
+    totals[("46", "09", "0")] = 90
+    totals[("43", "09", "0")] = 40
+    totals.update({("46", "09", estrato): 45 for estrato in ("1", "2")})
+    client = CountingClient(totals)
+
+    shards = plan(client, entidades=["09", "15"], max_shard=50, max_per=20)
+
+    assert [(shard.name, shard.total, shard.per) for shard in shards] == [
+        ("09-46-1", 45, 15), ("09-46-2", 45, 15), ("09-43-0", 40, 20), ("15-0-0", 40, 20),
+    ]
+
+
+def test_run_downloads_each_shard_completely(client, tmp_path):
+    shards = [Shard("09", total=250, per=100), Shard("15", total=30, per=100)]
+    run(client, shards, folder=tmp_path, workers=2)
+
+    assert all(shard.complete for shard in shards)
+    with open(tmp_path / "denue-09-0-0.csv", encoding="utf-8") as file:
+        assert len(file.readlines()) == 251
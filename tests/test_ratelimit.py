@@ -0,0 +1,65 @@
+import email.utils
+import time
+
+import pytest
+
+from ratelimit import RateLimiter, RetryPolicy, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_adaptive_rate_grows_up_to_max_rate():
+    limiter = RateLimiter(rate=2, adaptive=True)
+    assert limiter.max_rate == 8
+    for _ in range(200):
+        limiter.record(0.1)
+    assert limiter.rate == 8
+
+
+def test_errors_halve_the_rate_once_per_second():
+    limiter = RateLimiter(rate=8, adaptive=True, min_rate=1)
+    limiter.record(0.1, error=True)
+    limiter.record(0.1, error=True)  # misma ráfaga: no se vuelve a reducir
+    assert limiter.rate == 4
+    limiter._last_decrease -= 1.0
+    limiter.record(0.1, error=True)
+    assert limiter.rate == 2
+    limiter._last_decrease -= 1.0
+    limiter.record(0.1, error=True)
+    limiter._last_decrease -= 1.0
+    limiter.record(0.1, error=True)
+    assert limiter.rate == 1  # nunca baja de min_rate
+
+
+def test_slow_responses_reduce_the_rate():
+    limiter = RateLimiter(rate=4, adaptive=True, latency_target=1.0)
+    limiter.record(3.0)
+    assert limiter.rate == 2
+
+
+def test_static_limiter_ignores_records():
+    limiter = RateLimiter(rate=2)
+    limiter.record(10.0, error=True)
+    assert limiter.rate == 2
+
+
+def test_retry_after_seconds_is_respected():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=60)
+    assert policy.delay(0, FakeResponse({"Retry-After": "7"})) == 7
+    assert policy.delay(0, FakeResponse({"Retry-After": "3600"})) == 60
+
+
+def test_retry_after_http_date():
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert parse_retry_after(retry_at) == pytest.approx(30, abs=2)
+    assert parse_retry_after("no es una fecha") is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_without_retry_after_is_bounded():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3)
+    assert all(0 <= policy.delay(1, FakeResponse({})) <= 1.0 for _ in range(50))
+    assert all(0 <= policy.delay(10) <= 3 for _ in range(50))
@@ -0,0 +1,69 @@
+import pytest
+
+from snapshot import SnapshotStore
+from stub_server import make_record
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(tmp_path / "denue.sqlite")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def records(stub):
+    stub.records = [make_record(i) for i in range(1, 251)]
+    return stub.records
+
+
+def ops(store, sync_id):
+    changes = store.changes(since=sync_id - 1)
+    return {op: sorted(int(change["id"]) for change in changes if change["op"] == op)
+            for op in ("insert", "update", "delete")}
+
+
+def test_first_sync_inserts_everything(client, store, records):
+    stats = store.sync(client, entidades=["09"], per=100)
+    assert (stats["insert"], stats["update"], stats["delete"], stats["failed"]) == (250, 0, 0, {})
+    assert len(store) == 250
+
+
+def test_sync_writes_only_differences(client, stub, store, records):
+    store.sync(client, entidades=["09"], per=100)
+
+    records[9] = dict(records[9], Nombre="NUEVO NOMBRE")   # Id 10 cambia
+    del records[19]                                        # Id 20 desaparece
+    records.append(make_record(251))                       # Id 251 es nuevo
+    stats = store.sync(client, entidades=["09"], per=100)
+
+    assert (stats["insert"], stats["update"], stats["delete"], stats["unchanged"]) == (1, 1, 1, 248)
+    assert ops(store, stats["sync_id"]) == {"insert": [251], "update": [10], "delete": [20]}
+    assert len(store) == 250
+    current = {record["Id"]: record for record in store.records("09")}
+    assert current["10"]["Nombre"] == "NUEVO NOMBRE"
+    assert "20" not in current
+
+
+def test_deleted_record_can_come_back(client, stub, store, records):
+    store.sync(client, entidades=["09"], per=100)
+    removed = records.pop(0)
+    store.sync(client, entidades=["09"], per=100)
+    records.insert(0, removed)
+    stats = store.sync(client, entidades=["09"], per=100)
+
+    assert ops(store, stats["sync_id"]) == {"insert": [1], "update": [], "delete": []}
+    assert len(store) == 250
+
+
+def test_partial_crawl_marks_no_deletes(client, stub, store, records):
+    store.sync(client, entidades=["09"], per=100)
+
+    records[0] = dict(records[0], Nombre="NUEVO NOMBRE")
+    stub.fail(101, status=0)  # la segunda página responde "sin datos" y la descarga termina ahí
+    stats = store.sync(client, entidades=["09"], per=100)
+
+    assert "09" in stats["failed"]
+    assert stats["delete"] == 0
+    assert ops(store, stats["sync_id"]) == {"insert": [], "update": [1], "delete": []}
+    assert len(store) == 250
@@ -0,0 +1,52 @@
+import pytest
+
+from stub_server import make_record
+
+pa = pytest.importorskip("pyarrow")
+
+from storage import MappedResult, download_mapped, open_feather, save_feather
+from utils import RecordsResult
+
+
+@pytest.fixture
+def records():
+    records = [make_record(i) for i in range(1, 201)]
+    for record in records[::4]:
+        record["Estrato"] = "6 a 10 personas"
+    return records
+
+
+def test_feather_round_trip(records, tmp_path):
+    path = save_feather(RecordsResult(records), tmp_path / "denue.feather", batch_size=64)
+    datos = open_feather(path)
+
+    assert isinstance(datos, MappedResult) and len(datos) == 200
+    assert datos.schema.field("Latitud").type == pa.float64()
+    assert pa.types.is_dictionary(datos.schema.field("Estrato").type)
+    restored = datos.data
+    assert [record["Id"] for record in restored] == [record["Id"] for record in records]
+    assert restored[10]["Latitud"] == float(records[10]["Latitud"])
+    assert restored[0]["Nombre"] == records[0]["Nombre"]
+
+
+def test_select_slice_and_filter(records, tmp_path):
+    datos = open_feather(save_feather(RecordsResult(records), tmp_path / "denue.feather"))
+
+    chicos = datos.select("Id", "Estrato").filter(Estrato="6 a 10 personas")
+    assert chicos.columns == ["Id", "Estrato"]
+    assert [record["Id"] for record in chicos.data] == [str(i) for i in range(1, 201, 4)]
+    assert len(datos.slice(190)) == 10
+    assert datos.filter(Id=["1", "2", "999"]).to_pandas()["Id"].tolist() == ["1", "2"]
+
+
+def test_csv_is_converted_in_batches(records, tmp_path):
+    csv_path = RecordsResult(records).to_csv(tmp_path / "denue.csv", echo=False)
+    datos = open_feather(save_feather(csv_path, tmp_path / "denue.feather", batch_size=50))
+    assert datos.to_arrow().column("Id").to_pylist() == [str(i) for i in range(1, 201)]
+
+
+def test_download_mapped(client, tmp_path):
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    datos = download_mapped(first, tmp_path / "denue.feather", per=299, delay=0)
+    assert len(datos) == 1000
+    assert datos.column("Longitud").type == pa.float64()
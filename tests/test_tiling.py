@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from tiling import Area, RecordIndex, Tile, haversine, hex_cover, split
+
+BOX = (19.30, -99.25, 19.50, -99.05)
+
+
+def covered(point, tiles):
+    return any(haversine(point[0], point[1], tile.lat, tile.lon) <= tile.radius for tile in tiles)
+
+
+def grid(lat_min, lon_min, lat_max, lon_max, n=25):
+    return [(lat_min + (lat_max - lat_min) * i / n, lon_min + (lon_max - lon_min) * j / n)
+            for i in range(n + 1) for j in range(n + 1)]
+
+
+def test_hex_cover_spacing():
+    radius = 2000
+    tiles = hex_cover(BOX, radius)
+    rows = sorted({round(tile.lat, 9) for tile in tiles})
+
+    # Filas separadas 1.5·r y centros de una misma fila separados √3·r
+    for lat1, lat2 in zip(rows, rows[1:]):
+        assert haversine(lat1, 0, lat2, 0) == pytest.approx(1.5 * radius, rel=5e-3)
+    row = sorted((tile for tile in tiles if round(tile.lat, 9) == rows[1]), key=lambda tile: tile.lon)
+    for a, b in zip(row, row[1:]):
+        assert haversine(a.lat, a.lon, b.lat, b.lon) == pytest.approx(math.sqrt(3) * radius, rel=5e-3)
+
+
+def test_hex_cover_leaves_no_gaps():
+    tiles = hex_cover(BOX, 2000)
+    assert all(tile.radius == 2000 for tile in tiles)
+    assert all(covered(point, tiles) for point in grid(*BOX))
+
+
+def test_polygon_cover_only_keeps_intersecting_tiles():
+    triangle = Area([(19.30, -99.25), (19.30, -99.05), (19.50, -99.25)])
+    tiles = hex_cover(triangle, 2000)
+    assert len(tiles) < len(hex_cover(BOX, 2000))
+    assert all(triangle.intersects(tile) for tile in tiles)
+
+
+def test_split_into_seven_half_circles():
+    tile = Tile(19.43, -99.13, 4000)
+    children = split(tile)
+
+    assert len(children) == 7
+    assert all(child.radius == 2000 and child.depth == 1 for child in children)
+    assert (children[0].lat, children[0].lon) == (tile.lat, tile.lon)
+    for child in children[1:]:
+        assert haversine(tile.lat, tile.lon, child.lat, child.lon) == pytest.approx(4000 * math.sqrt(3) / 2, rel=5e-3)
+    # Los hijos cubren todo el círculo original (se prueba un poco dentro del borde)
+    points = [(tile.lat + 3900 * math.sin(math.radians(a)) / 111_320,
+               tile.lon + 3900 * math.cos(math.radians(a)) / (111_320 * math.cos(math.radians(tile.lat))))
+              for a in range(0, 360, 5)]
+    assert all(covered(point, children) for point in points)
+
+
+def test_record_index_deduplicates_by_id():
+    index = RecordIndex()
+    index.add([{"Id": "1", "Nombre": "A"}, {"Id": "2", "Nombre": "B"}])
+    index.add([{"Id": "1", "Nombre": "A"}])
+    assert len(index) == 2
+
+
+def test_record_index_keeps_distinct_records_without_id():
+    index = RecordIndex()
+    index.add([{"Nombre": "A"}, {"Nombre": "B"}, {"Id": "", "Nombre": "C"}])
+    index.add([{"Nombre": "A"}])
+    assert sorted(record["Nombre"] for record in index.values()) == ["A", "B", "C"]
+
+
+def test_record_index_clips_to_area():
+    index = RecordIndex(Area(BOX))
+    index.add([
+        {"Id": "1", "Latitud": "19.40", "Longitud": "-99.10"},
+        {"Id": "2", "Latitud": "20.00", "Longitud": "-99.10"},
+        {"Id": "3", "Latitud": "", "Longitud": ""},
+    ])
+    assert sorted(record["Id"] for record in index.values()) == ["1", "3"]
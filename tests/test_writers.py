@@ -0,0 +1,104 @@
+import csv
+
+import pytest
+
+from stub_server import make_record
+from writers import CsvPageWriter
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return list(csv.DictReader(file))
+
+
+def test_csv_pages_are_appended_and_resumed(tmp_path):
+    path = tmp_path / "denue.csv"
+    writer = CsvPageWriter(path)
+    _, offset = writer.write([make_record(1), make_record(2)])
+    writer.write([make_record(3)])
+    writer.close()
+
+    # Al reanudar se descarta lo escrito después del offset y se conserva el encabezado
+    writer = CsvPageWriter(path, offset=offset, columns=list(make_record(1)))
+    writer.write([make_record(4)])
+    writer.close()
+    assert [row["Id"] for row in read_csv(path)] == ["1", "2", "4"]
+
+
+def test_missing_columns_are_left_empty(tmp_path):
+    path = tmp_path / "denue.csv"
+    writer = CsvPageWriter(path)
+    writer.write([{"Id": "1", "Nombre": "A"}, {"Id": "2"}])
+    writer.close()
+    assert read_csv(path)[1] == {"Id": "2", "Nombre": ""}
+
+
+def test_unexpected_columns_raise(tmp_path):
+    writer = CsvPageWriter(tmp_path / "denue.csv")
+    writer.write([{"Id": "1", "Nombre": "A"}])
+    with pytest.raises(ValueError, match="Telefono"):
+        writer.write([{"Id": "2", "Nombre": "B", "Telefono": "555"}])
+    writer.close()
+
+
+def with_clee(i, entidad, sector):
+    return dict(make_record(i), CLEE=f"{entidad}015{sector}1111{i:06d}000000U0")
+
+
+def test_partitioned_parquet_layout_and_types(tmp_path):
+    pytest.importorskip("pyarrow")
+    from writers import PartitionedParquetWriter, read_parquet
+
+    records = [with_clee(i, ("09", "15")[i % 2], ("46", "81")[i % 3 == 0]) for i in range(1, 101)]
+    writer = PartitionedParquetWriter(tmp_path / "denue", partition_by=("entidad", "sector"), row_group_size=10)
+    for start in range(0, 100, 25):
+        writer.write(records[start:start + 25])
+    writer.close()
+
+    root = tmp_path / "denue"
+    folders = sorted(path.parent.relative_to(root).as_posix() for path in root.rglob("*.parquet"))
+    assert folders == ["entidad=09/sector=46", "entidad=09/sector=81", "entidad=15/sector=46", "entidad=15/sector=81"]
+
+    df = read_parquet(root, filters=[("entidad", "=", "09")])
+    assert sorted(df["Id"].astype(int)) == list(range(2, 101, 2))
+    assert df["Latitud"].dtype == "float64"
+    assert set(df["entidad"]) == {"09"}  # la clave de partición conserva el cero a la izquierda
+
+
+def test_partitioned_parquet_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from writers import PartitionedParquetWriter
+
+    writer = PartitionedParquetWriter(tmp_path / "denue", row_group_size=40)
+    for start in range(1, 101, 10):
+        writer.write([with_clee(i, "09", "46") for i in range(start, start + 10)])
+    writer.close()
+
+    metadata = pq.ParquetFile(tmp_path / "denue" / "entidad=09" / "part-0.parquet").metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [40, 40, 20]
+
+
+def test_records_without_partition_key_go_to_default_partition(tmp_path):
+    pytest.importorskip("pyarrow")
+    from writers import PartitionedParquetWriter
+
+    writer = PartitionedParquetWriter(tmp_path / "denue")
+    writer.write([make_record(1), with_clee(2, "09", "46")])
+    writer.close()
+    assert (tmp_path / "denue" / "entidad=__HIVE_DEFAULT_PARTITION__" / "part-0.parquet").exists()
+    with pytest.raises(ValueError):
+        PartitionedParquetWriter(tmp_path / "otro", partition_by=("municipio",))
+
+
+def test_download_all_to_partitioned_parquet(client, stub, tmp_path):
+    pytest.importorskip("pyarrow")
+    from writers import read_parquet
+
+    stub.records = [with_clee(i, ("09", "15")[i % 2], "46") for i in range(1, 301)]
+    first = client.BuscarEntidad(registro_inicial=1, registro_final=100)
+    outfile = first.to_parquet(outfile=tmp_path / "denue", download_all=True, partition_by=("entidad",),
+                               per=99, delay=0)
+
+    df = read_parquet(outfile)
+    assert sorted(df["Id"].astype(int)) == list(range(1, 301))
+    assert sorted(set(df["entidad"])) == ["09", "15"]
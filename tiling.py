@@ -0,0 +1,171 @@
+import math
+from dataclasses import dataclass
+
+EARTH_RADIUS = 6_371_008.8  # metros
+METERS_PER_DEGREE = 111_320.0
+MAX_DISTANCIA = 5000  # distancia máxima que acepta Buscar
+
+
+@dataclass(frozen=True)
+class Tile:
+    """Círculo de búsqueda para Buscar: centro (latitud, longitud) y radio en metros."""
+    lat: float
+    lon: float
+    radius: float
+    depth: int = 0
+
+    @property
+    def coordenadas(self):
+        return (round(self.lat, 6), round(self.lon, 6))
+
+    @property
+    def distancia(self):
+        return int(math.ceil(self.radius))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distancia en metros entre dos puntos (latitud, longitud) en grados."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+class Area:
+    """
+    Área a cubrir: una caja (lat_min, lon_min, lat_max, lon_max) o un polígono, lista de vértices
+    (latitud, longitud).
+    """
+
+    def __init__(self, area):
+        if len(area) == 4 and all(isinstance(v, (int, float)) for v in area):
+            lat_min, lon_min, lat_max, lon_max = area
+            self.polygon = [(lat_min, lon_min), (lat_min, lon_max), (lat_max, lon_max), (lat_max, lon_min)]
+        else:
+            self.polygon = [(float(lat), float(lon)) for lat, lon in area]
+        if len(self.polygon) < 3:
+            raise ValueError("Area must be a bounding box or a polygon with at least 3 vertices")
+        lats = [lat for lat, _ in self.polygon]
+        lons = [lon for _, lon in self.polygon]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+
+    def contains(self, lat, lon):
+        """Prueba punto en polígono (ray casting)."""
+        inside = False
+        points = self.polygon
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:] + points[:1]):
+            if (lon1 > lon) != (lon2 > lon):
+                lat_cross = lat1 + (lon - lon1) * (lat2 - lat1) / (lon2 - lon1)
+                if lat < lat_cross:
+                    inside = not inside
+        return inside
+
+    def intersects(self, tile):
+        """Indica si el círculo de `tile` toca el área."""
+        if self.contains(tile.lat, tile.lon):
+            return True
+        points = self.polygon
+        for a, b in zip(points, points[1:] + points[:1]):
+            if _distance_to_segment(tile.lat, tile.lon, a, b) <= tile.radius:
+                return True
+        return False
+
+
+def _distance_to_segment(lat, lon, a, b):
+    # Proyección equirectangular local: suficiente para distancias de unos cuantos kilómetros
+    scale = math.cos(math.radians(lat))
+    ax, ay = (a[1] - lon) * scale * METERS_PER_DEGREE, (a[0] - lat) * METERS_PER_DEGREE
+    bx, by = (b[1] - lon) * scale * METERS_PER_DEGREE, (b[0] - lat) * METERS_PER_DEGREE
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length))
+    return math.hypot(ax + t * dx, ay + t * dy)
+
+
+def _offset(lat, lon, north, east):
+    """Punto desplazado `north` y `east` metros."""
+    return (lat + north / METERS_PER_DEGREE,
+            lon + east / (METERS_PER_DEGREE * math.cos(math.radians(lat))))
+
+
+def hex_cover(area, radius=MAX_DISTANCIA):
+    """
+    Cubre el área con círculos de radio `radius` centrados en una malla hexagonal: cada círculo es
+    el circunscrito de un hexágono, así que no quedan huecos y el traslape es el mínimo posible.
+    Solo se conservan los círculos que tocan el área.
+
+    Parámetros:
+        area (tuple | list | Area): Caja (lat_min, lon_min, lat_max, lon_max) o polígono [(lat, lon), ...].
+        radius (float, optional): Radio de cada círculo en metros (máximo 5000). Valor por defecto es 5000.
+
+    Returns:
+        tiles (list[Tile]): Círculos de búsqueda.
+    """
+    area = area if isinstance(area, Area) else Area(area)
+    lat_min, lon_min, lat_max, lon_max = area.bbox
+    dx = math.sqrt(3) * radius  # separación entre centros de una misma fila
+    dy = 1.5 * radius           # separación entre filas
+    tiles = []
+    row = 0
+    lat = _offset(lat_min, lon_min, -radius / 2, 0)[0]
+    while lat <= _offset(lat_max, lon_min, radius, 0)[0]:
+        lon = _offset(lat, lon_min, 0, -dx if row % 2 else -dx / 2)[1]
+        lon_end = _offset(lat, lon_max, 0, dx)[1]
+        while lon <= lon_end:
+            tile = Tile(lat, lon, radius)
+            if area.intersects(tile):
+                tiles.append(tile)
+            lon = _offset(lat, lon, 0, dx)[1]
+        lat = _offset(lat, lon_min, dy, 0)[0]
+        row += 1
+    return tiles
+
+
+def split(tile):
+    """
+    Divide un círculo en 7 círculos de la mitad del radio (uno al centro y seis alrededor a
+    distancia radio·√3/2), que lo cubren por completo.
+    """
+    radius = tile.radius / 2
+    children = [Tile(tile.lat, tile.lon, radius, tile.depth + 1)]
+    distance = tile.radius * math.sqrt(3) / 2
+    for k in range(6):
+        angle = math.radians(30 + 60 * k)
+        lat, lon = _offset(tile.lat, tile.lon, distance * math.sin(angle), distance * math.cos(angle))
+        children.append(Tile(lat, lon, radius, tile.depth + 1))
+    return children
+
+
+class RecordIndex:
+    """
+    Índice de establecimientos por Id para eliminar los repetidos entre círculos que se traslapan.
+    Los registros sin Id se comparan completos, así que solo se descartan si son idénticos.
+
+    Parámetros:
+        area (Area, optional): Si se especifica, solo se conservan los establecimientos dentro del área.
+    """
+
+    def __init__(self, area=None):
+        self.area = area
+        self.records = {}
+
+    def add(self, records):
+        for record in records:
+            key = record.get("Id") or tuple(sorted(record.items()))
+            if key in self.records:
+                continue
+            if self.area is not None:
+                try:
+                    inside = self.area.contains(float(record["Latitud"]), float(record["Longitud"]))
+                except (KeyError, TypeError, ValueError):
+                    inside = True  # sin coordenadas válidas no se puede descartar
+                if not inside:
+                    continue
+            self.records[key] = record
+
+    def __len__(self):
+        return len(self.records)
+
+    def values(self):
+        return list(self.records.values())
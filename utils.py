@@ -1,80 +1,295 @@
 import os
 import time
 import json
+import shutil
+import hashlib
 import datetime as dt
 from requests import Response
-import requests.exceptions
 from urllib.parse import urlencode, quote
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from itertools import chain
-from functools import wraps
-import pandas as pd
-
-
-def download_all_to_csv(first_call, outfile=None, folder=None, per=250):
+from functools import wraps, partial
+from operator import itemgetter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import requests.exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from writers import WRITERS, FeatherPageWriter, PartitionedParquetWriter, to_arrow_table, write_parquet
+from decoders import get_decoder
+from pager import PageSizer, fetch_pages_adaptive
+from models import Establecimiento, NUMERIC_FIELDS, to_number
+
+
+def fetch_pages(first_call, per=250, workers=1, delay=1, skip=()):
+    """
+    Genera, en orden, las páginas no vacías de una consulta paginada a partir de first_call.
+
+    Las páginas siguientes se piden en una ventana de hasta `workers` rangos
+    registro_inicial/registro_final simultáneos. La descarga termina en cuanto se recibe
+    una página vacía (NoDataResponse) y las solicitudes pendientes posteriores se descartan.
+
+    Parámetros:
+        first_call (PaginatedResult): Primera página de la consulta.
+        per (int, optional): Tamaño de cada página. Valor por defecto es 250.
+        workers (int, optional): Número de páginas que se descargan en paralelo. Valor por defecto es 1.
+        delay (float, optional): Segundos mínimos entre el envío de dos solicitudes consecutivas.
+            Valor por defecto es 1.
+        skip (set, optional): Rangos (registro_inicial, registro_final) ya descargados que no se
+            vuelven a pedir. Valor por defecto es ().
+    """
+    if first_call.is_empty():
+        return
+    yield first_call
+
+    def ranges():
+        registro_inicial = first_call.params['registro_final'] + 1
+        while True:
+            if (registro_inicial, registro_inicial + per) not in skip:
+                yield registro_inicial, registro_inicial + per
+            registro_inicial += per + 1
+
+    workers = max(1, workers)
+    pending = deque()
+    next_range = ranges()
+    last_submit = time.monotonic()  # first_call acaba de descargarse
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while len(pending) < workers:
+                    time.sleep(max(0.0, last_submit + delay - time.monotonic()))
+                    last_submit = time.monotonic()
+                    pending.append(executor.submit(first_call.page, *next(next_range)))
+                result = pending.popleft().result()
+                if result.is_empty():
+                    return
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _json_default(value):
+    # Entidad y otros Enum se guardan por su valor
+    return getattr(value, 'value', str(value))
+
+
+class DownloadCheckpoint:
+    """
+    Punto de control durable de una descarga completa. Las páginas se escriben directamente a un
+    archivo de datos dentro de una carpeta junto al archivo de salida, con un manifiesto
+    (manifest.json) que registra los parámetros de la consulta, los rangos
+    registro_inicial-registro_final completados y el checksum SHA-256 de los bytes de cada página.
+    Si la descarga falla, repetir la misma llamada a to_csv(download_all=True) solo descarga los
+    rangos faltantes y continúa el archivo de datos a partir de la última página válida.
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, first_call, per, folder, format="csv", load=True):
+        self.query = self.make_query(first_call, per, format)
+        self.path = self.path_for(first_call, per, folder, format)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.path / f"data.{format}"
+        self.pages = {}
+        self.columns = None
+        if load:
+            self._load()
+
+    @staticmethod
+    def make_query(first_call, per, format="csv"):
+        # El decoder no cambia los datos descargados, así que no forma parte de la consulta
+        params = {k: v for k, v in first_call.params.items()
+                  if k not in ('registro_inicial', 'registro_final', 'decoder')}
+        return {
+            "endpoint": first_call.method.__name__,
+            "params": params,
+            "registro_inicial": first_call.params['registro_inicial'],
+            "per": per,
+            "format": format,
+        }
+
+    @classmethod
+    def path_for(cls, first_call, per, folder, format="csv"):
+        """Carpeta del punto de control de una descarga, sin crearla."""
+        query_json = json.dumps(cls.make_query(first_call, per, format), sort_keys=True, default=_json_default)
+        key = hashlib.sha1(query_json.encode('utf-8')).hexdigest()[:16]
+        return Path(folder) / f".denue-checkpoint-{key}"
+
+    def _load(self):
+        manifest = self.path / self.MANIFEST
+        if not manifest.exists() or not self.data_path.exists():
+            return
+        manifest = json.loads(manifest.read_text(encoding='utf-8'))
+        pages = sorted(manifest.get("pages", {}).items(), key=lambda item: int(item[0].split("-")[0]))
+        # Solo se conserva el prefijo de páginas cuyos bytes siguen intactos en el archivo de datos
+        with open(self.data_path, 'rb') as f:
+            start = 0
+            for page_range, page in pages:
+                chunk = f.read(page["offset"] - start)
+                if hashlib.sha256(chunk).hexdigest() != page["sha256"]:
+                    break
+                self.pages[page_range] = page
+                start = page["offset"]
+        self.columns = manifest.get("columns")
+
+    def _save(self):
+        manifest = {"query": self.query, "columns": self.columns, "pages": self.pages}
+        tmp = self.path / (self.MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, default=_json_default), encoding='utf-8')
+        os.replace(tmp, self.path / self.MANIFEST)
+
+    def completed(self):
+        """Rangos (registro_inicial, registro_final) ya descargados."""
+        return {tuple(int(n) for n in page_range.split("-")) for page_range in self.pages}
+
+    def received(self):
+        """
+        Rangos (registro_inicial, último registro recibido) ya descargados. Difieren de completed()
+        en las páginas que la API recortó: el resto del rango pedido todavía falta.
+        """
+        return {(int(page_range.split("-")[0]), int(page_range.split("-")[0]) + page["records"] - 1)
+                for page_range, page in self.pages.items()}
+
+    def offset(self):
+        """Posición del archivo de datos después de la última página válida."""
+        return max((page["offset"] for page in self.pages.values()), default=0)
+
+    def records(self):
+        return sum(page["records"] for page in self.pages.values())
+
+    def last_registro(self):
+        return max(int(page_range.split("-")[1]) for page_range in self.pages)
+
+    def add(self, result, sha256, offset, columns):
+        page_range = f"{result.params['registro_inicial']}-{result.params['registro_final']}"
+        self.pages[page_range] = {"records": len(result.data), "sha256": sha256, "offset": offset}
+        self.columns = columns
+        self._save()
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def download_all(first_call, outfile=None, folder=None, per=250, workers=1, delay=1, resume=True, format="csv",
+                 partition_by=None):
+    """
+    Descarga todas las páginas de una consulta paginada escribiéndolas una por una al archivo de
+    salida, de modo que la memoria utilizada no depende del tamaño total de la consulta.
+
+    Parámetros:
+        first_call (PaginatedResult): Primera página de la consulta.
+        outfile (str | Path, optional): Archivo de salida. Si no se especifica se genera un nombre
+            a partir de la consulta.
+        folder (str | Path, optional): Carpeta para el archivo generado y el punto de control.
+        per (int | str | PageSizer, optional): Tamaño de cada página. Con "auto" o un PageSizer el
+            tamaño se ajusta con la latencia de las páginas anteriores y los rangos que fallan por
+            timeout se dividen en lugar de detener la descarga (ver fetch_pages_adaptive).
+            Valor por defecto es 250.
+        workers (int, optional): Número de páginas que se descargan en paralelo. Valor por defecto es 1.
+        delay (float, optional): Segundos mínimos entre solicitudes. Valor por defecto es 1.
+        resume (bool, optional): Guardar un punto de control para reanudar la descarga si se
+            interrumpe. Valor por defecto es True.
+        format (str, optional): "csv", "parquet" o "feather" (estos dos requieren pyarrow y no son
+            reanudables). Valor por defecto es "csv".
+        partition_by (tuple, optional): Solo con format="parquet": escribe un dataset particionado
+            al estilo Hive por estas claves, ej. ("entidad",) o ("entidad", "sector"). outfile es
+            entonces una carpeta. Valor por defecto es None.
+
+    Returns:
+        outfile (Path): Ruta del archivo guardado, o None si la consulta no tiene resultados.
+    """
+    Writer = WRITERS[format]
+    if partition_by:
+        if format != "parquet":
+            raise ValueError("partition_by solo se puede usar con format='parquet'")
+        Writer = partial(PartitionedParquetWriter, partition_by=partition_by)
+    resume = resume and WRITERS[format].resumable
+    adaptive = per == "auto" or isinstance(per, PageSizer)
+    if adaptive:
+        sizer = per if isinstance(per, PageSizer) else None
+        per = "auto"  # así se identifica la consulta en el punto de control
 
     with TemporaryDirectory() as td:
+        checkpoint_folder = td
+        if resume:
+            checkpoint_folder = folder or (Path(outfile).parent if outfile else '.')
+        checkpoint = DownloadCheckpoint(first_call, per, checkpoint_folder, format, load=resume)
+        completed = checkpoint.completed()
+        if completed:
+            print(f"Reanudando descarga: {len(completed)} páginas ya descargadas en {checkpoint.path}")
+
+        writer = Writer(checkpoint.data_path, checkpoint.offset(), checkpoint.columns)
         page=1
+        finished = False
         try:
             print(f"Descargando, por favor espere..")
-            result = first_call
-
-            if result.is_empty():
+            if first_call.is_empty():
                 print("No se encontraron resultados para esta consulta.")
+            if adaptive:
+                pages = fetch_pages_adaptive(first_call, sizer, workers=workers, delay=delay,
+                                             skip=checkpoint.received())
             else:
-                result.to_csv(folder=td,echo=False)
-                file_path = result.file_path
-                page += 1
-                print("[■", end="")
-            while page > 1:
-                time.sleep(1)
-
-                print("■",end="")
-                result = result.next_page(per)
-                if result.is_empty():
-                    print("]\nDescarga exitosa!")
-                    break
-                result.to_csv(folder=td, echo=False)
-                file_path = result.file_path
+                pages = fetch_pages(first_call, per=per, workers=workers, delay=delay, skip=completed)
+            for result in pages:
+                page_range = (result.params['registro_inicial'], result.params['registro_final'])
+                if page_range in completed:
+                    continue
+                print("[■" if page == 1 else "■", end="")
+                sha256, offset = writer.write(result.data)
+                checkpoint.add(result, sha256, offset, writer.columns)
                 page += 1
+            if page > 1:
+                print("]\nDescarga exitosa!")
+            finished = True
         except requests.exceptions.RequestException as e:
             print(f"An error occurred on page {page}:\n{e}")
 
         except Exception as e:
             print(f"Broad exception on page {page}:\n{e}")
 
+        finally:
+            writer.close()
 
-        files = [Path(td)/f for f in os.listdir(td)]
-        files.sort(key=lambda f:int(f.stem.split("-")[-2]))
+        if not finished and resume:
+            print(f"Descarga incompleta. Vuelve a ejecutar la misma consulta para continuar desde {checkpoint.path}")
 
-        dfs = [pd.read_csv(f) for f in files]
+        if not checkpoint.pages:
+            checkpoint.remove()
+            return None
 
-        df = pd.concat(dfs,axis="rows")
         if not outfile:
-            file_name_split = [f.rstrip(".csv").split("-") for f in os.listdir(td)]
-            get_page_intervals = [f[-2:] for f in file_name_split]
-
-            page_intervals = list(chain.from_iterable(get_page_intervals))
-
-            min_index = min(page_intervals,key=lambda x: int(x))
-            max_index = max(page_intervals,key=lambda x: int(x))
-
-            full_df_filename = list(filter(lambda x: x[-1]==max_index,file_name_split))[0]
-            full_df_filename[-2] = min_index
-            full_df_filename = "-".join(full_df_filename)+".csv"
-            folder = folder if folder else ''
-            outfile = Path(full_df_filename)
+            file_name_split = first_call.make_file_path().split(".")[0].split("-")
+            file_name_split[-1] = str(checkpoint.last_registro())
+            outfile = Path("-".join(file_name_split) + f".{format}")
             if folder:
                 outfile = Path(folder)/outfile
-        print(f"Total: {len(df)} registros")
-        df.to_csv(outfile,index=False)
+        print(f"Total: {checkpoint.records()} registros")
+        if finished:
+            shutil.move(checkpoint.data_path, outfile)
+            checkpoint.remove()
+        elif checkpoint.data_path.is_dir():
+            shutil.copytree(checkpoint.data_path, outfile, dirs_exist_ok=True)
+        else:
+            shutil.copyfile(checkpoint.data_path, outfile)
 
     outfile = Path(outfile).resolve()
     print(f"Archivo guardado en {outfile}")
     return outfile
 
 
+def download_all_to_csv(first_call, outfile=None, folder=None, **kwargs):
+    return download_all(first_call, outfile, folder, format="csv", **kwargs)
+
+
+def download_all_to_parquet(first_call, outfile=None, folder=None, **kwargs):
+    return download_all(first_call, outfile, folder, format="parquet", **kwargs)
+
+
+def download_all_to_feather(first_call, outfile=None, folder=None, **kwargs):
+    return download_all(first_call, outfile, folder, format="feather", **kwargs)
+
+
 
 def inspect_response(func):
     @wraps(func)
@@ -90,36 +305,133 @@ def inspect_response(func):
 def url_encode_param(param):
     return quote(param, safe='')
 
-#@inspect_response
-def make_request(base_url,endpoint,params,token, **kwargs):
+def make_session(pool_connections=1, pool_maxsize=10, max_retries=3, backoff_factor=0.5):
+    """
+    Crea una sesión de requests con un pool de conexiones persistentes (keep-alive).
+
+    Parámetros:
+        pool_connections (int, optional): Número de hosts distintos cuyos pools se conservan.
+            Valor por defecto es 1 (solo www.inegi.org.mx).
+        pool_maxsize (int, optional): Número máximo de conexiones abiertas por host.
+            Valor por defecto es 10.
+        max_retries (int, optional): Reintentos ante errores de conexión y respuestas 429/5xx.
+            Valor por defecto es 3.
+        backoff_factor (float, optional): Factor de espera exponencial entre reintentos.
+            Valor por defecto es 0.5.
+
+    Returns:
+        session (requests.Session): Sesión lista para usarse en make_request.
+    """
+    # read=False: la API responde "HTTP/1.1 000" cuando no hay datos y ese error debe
+    # llegar intacto a make_request en lugar de reintentarse.
+    retries = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=False,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def build_url(base_url, endpoint, params, token, query=None):
     encoded_params = [url_encode_param(param) for param in params]
-    #encoded_params = params
     parametros_url = "/".join(encoded_params)
     # Construyendo la URL
     url = f"{base_url}{endpoint}/{parametros_url}/{token}"
 
     # Handle optional query string parameters (if any)
-    query_string_params = kwargs.pop('query', None)
-    if query_string_params:
-        url += f'?{urlencode(query_string_params)}'
+    if query:
+        url += f'?{urlencode(query)}'
+    return url
+
+NON_STANDARD_NO_DATA_EXCEPTION = "('Connection aborted.', BadStatusLine('HTTP/1.1 000 \\r\\n'))"
+
+#@inspect_response
+def make_request(base_url,endpoint,params,token, session=None, rate_limiter=None, retry=None, cache=None,
+                 instrumentation=None, **kwargs):
+    url = build_url(base_url, endpoint, params, token, kwargs.pop('query', None))
+
+    def emit(event, **fields):
+        if instrumentation is not None:
+            instrumentation.emit(event, endpoint, url, **fields)
+
+    if cache is not None:
+        cached = cache.lookup(url)
+        if cached is not None:
+            emit("cache_hit", status=cached.status_code, bytes=len(cached.content))
+            return cached
+    getter = session.get if session is not None else requests.get
+
+    def record(start, error=False):
+        latency = time.monotonic() - start
+        if rate_limiter is not None:
+            rate_limiter.record(latency, error)
+        return latency
+
+    def backoff(attempt, latency, response=None, error=None):
+        # Devuelve True si se debe reintentar, después de esperar lo indicado por la política
+        if retry is None or not retry.should_retry(attempt):
+            return False
+        wait = retry.delay(attempt, response)
+        emit("retry", attempt=attempt, status=getattr(response, 'status_code', None), latency=latency,
+             wait=wait, error=error)
+        if rate_limiter is not None and response is not None and response.status_code == 429:
+            rate_limiter.pause(wait)  # el resto de los hilos también debe esperar
+        time.sleep(wait)
+        return True
 
     # Realizando la solicitud a la API
-    response = None
-    try:
-        #print(f"Requesting {url}")
-        response = requests.get(url, **kwargs)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
-    except requests.exceptions.Timeout as e:
-        timeout = kwargs.get('timeout', 'not specified')  # Get timeout value from kwargs or default to 'not specified'
-        print(f'The request timed out after {timeout} seconds: {e}')
-        raise requests.exceptions.Timeout
-    except requests.exceptions.RequestException as e:
-        non_standard_no_data_exception = "('Connection aborted.', BadStatusLine('HTTP/1.1 000 \\r\\n'))"
-        if non_standard_no_data_exception == str(e):
-            return NoDataResponse(url)
-        else:
-            print(f'An error other than non_standard_no_data_exception {non_standard_no_data_exception} occurred: {e}')
-            raise requests.exceptions.RequestException
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        emit("start", attempt=attempt)
+        start = time.monotonic()
+        latency = None  # se registra una sola vez por intento
+        try:
+            response = getter(url, **kwargs)
+            if retry is not None and response.status_code in retry.statuses:
+                latency = record(start, error=True)
+                if backoff(attempt, latency, response):
+                    attempt += 1
+                    continue
+            response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
+        except requests.exceptions.Timeout as e:
+            latency = record(start, error=True)
+            if backoff(attempt, latency, error=e):
+                attempt += 1
+                continue
+            emit("error", attempt=attempt, latency=latency, error=e)
+            timeout = kwargs.get('timeout', 'not specified')  # Get timeout value from kwargs or default to 'not specified'
+            print(f'The request timed out after {timeout} seconds: {e}')
+            raise
+        except requests.exceptions.RequestException as e:
+            if NON_STANDARD_NO_DATA_EXCEPTION == str(e):
+                latency = record(start)
+                response = NoDataResponse(url)
+                emit("no_data", attempt=attempt, status=response.status_code, latency=latency)
+                break
+            if latency is None:
+                latency = record(start, error=True)
+            if isinstance(e, requests.exceptions.ConnectionError) and backoff(attempt, latency, error=e):
+                attempt += 1
+                continue
+            emit("error", attempt=attempt, status=getattr(e.response, 'status_code', None), latency=latency, error=e)
+            print(f'An error other than non_standard_no_data_exception {NON_STANDARD_NO_DATA_EXCEPTION} occurred: {e}')
+            raise
+        latency = record(start)
+        break
+
+    emit("end", attempt=attempt, status=response.status_code, latency=latency, bytes=len(response.content))
+    if cache is not None:
+        cache.store(url, response)
     return response
 
 
@@ -131,11 +443,42 @@ class NoDataResponse(Response):
         self.headers['Content-Type'] = 'application/json; charset=utf-8'
         self._content = b'[]'  # Empty content
 
+def to_array(values, kind=float):
+    """Convierte una columna de texto a un arreglo numérico; los valores vacíos o inválidos quedan como NaN."""
+    import numpy as np
+    try:
+        return np.array(values, dtype=np.float64 if kind is float else np.int64)
+    except (TypeError, ValueError):
+        return np.array([to_number(value, float) for value in values], dtype=np.float64)
+
+
+def records_to_columns(data):
+    """Convierte una lista de registros (dicts) a {columna: valores}, con los campos numéricos como arreglos."""
+    if not data:
+        return {}
+    keys = list(data[0])
+    columns = None
+    # Todos los registros de una respuesta suelen tener las mismas llaves que el primero
+    if len(keys) > 1 and all(len(record) == len(keys) for record in data):
+        try:
+            columns = dict(zip(keys, map(list, zip(*map(itemgetter(*keys), data)))))
+        except KeyError:
+            pass
+    if columns is None:
+        keys = list(dict.fromkeys(key for record in data for key in record))
+        columns = {key: [r.get(key) for r in data] for key in keys}
+    for key, kind in NUMERIC_FIELDS.items():
+        if key in columns:
+            columns[key] = to_array(columns[key], kind)
+    return columns
+
+
 class Result:
-    def __init__(self, response:Response|NoDataResponse, encoding='utf-8'):
+    def __init__(self, response:Response|NoDataResponse, encoding='utf-8', decoder=None):
         self.timestamp = dt.datetime.now()
         self.raw_response = response
-        self.data = json.loads(response.content.decode(encoding))
+        decode = get_decoder(decoder)
+        self.data = decode(response.content, encoding)
         self.file_path = None
         self.params = {} #TODO params from url
 
@@ -165,15 +508,107 @@ class Result:
 
 
     def to_pandas(self, **kwargs):
-        df = pd.DataFrame(self.data, **kwargs)
+        import pandas as pd  # se importa solo cuando se usa: las consultas simples no cargan pandas
+        df = pd.DataFrame(self.to_columns(), **kwargs)
         return df
 
+    def to_arrow(self):
+        """
+        Devuelve los datos como pa.Table con columnas tipadas: Latitud y Longitud float64, Total int64,
+        Clase_actividad y Estrato categóricas (diccionario) y el resto texto. Requiere pyarrow.
+        """
+        return to_arrow_table(self.data)
+
+    def to_parquet(self, outfile=None, folder=None, partition_by=None, echo=True, **kwargs):
+        """
+        Guarda los datos en Parquet con columnas tipadas (ver to_arrow). Requiere pyarrow.
+
+        Parámetros:
+            outfile (str | Path, optional): Archivo de salida. Si no se especifica se genera un nombre
+                a partir de la consulta.
+            folder (str | Path, optional): Carpeta para el archivo generado.
+            partition_by (tuple, optional): Escribe un dataset particionado al estilo Hive por estas
+                claves, ej. ("entidad",) o ("entidad", "sector"); outfile es entonces una carpeta.
+                Valor por defecto es None.
+            **kwargs: Se pasan a pyarrow.parquet.write_table (ej. compression="zstd").
+        """
+        if not outfile:
+            outfile = Path(self.make_file_path()).with_suffix(".parquet")
+            if folder:
+                outfile = Path(folder)/outfile
+        self.file_path = outfile
+        if partition_by:
+            writer = PartitionedParquetWriter(outfile, partition_by=partition_by)
+            writer.write(self.data)
+            writer.close()
+        else:
+            write_parquet(self.data, outfile, **kwargs)
+        outfile = Path(outfile).resolve()
+        if echo:
+            print(f"Archivo guardado en {outfile}")
+        return outfile
+
+    def to_feather(self, outfile=None, folder=None, echo=True):
+        """
+        Guarda los datos en un archivo Feather (Arrow IPC) sin compresión con columnas tipadas (ver
+        to_arrow), que storage.open_feather abre con memory map. Requiere pyarrow.
+        """
+        if not outfile:
+            outfile = Path(self.make_file_path()).with_suffix(".feather")
+            if folder:
+                outfile = Path(folder)/outfile
+        self.file_path = outfile
+        writer = FeatherPageWriter(outfile)
+        writer.write(self.data)
+        writer.close()
+        outfile = Path(outfile).resolve()
+        if echo:
+            print(f"Archivo guardado en {outfile}")
+        return outfile
+
+    def to_columns(self):
+        """
+        Devuelve los datos en formato columnar: un dict {columna: valores}. Latitud y Longitud se
+        convierten a arreglos float64 y Total (Cuantificar) a enteros.
+        """
+        return records_to_columns(self.data)
+
+    def records(self):
+        """Devuelve los datos como objetos Establecimiento con coordenadas numéricas."""
+        return [Establecimiento.from_dict(record) for record in self.data]
+
     def is_empty(self):
         return not bool(self.data)
 
+class RecordsResult(Result):
+    """
+    Resultado que combina los registros de varias consultas (por ejemplo, Ficha_many).
+
+    Parámetros:
+        data (list): Registros combinados.
+        name (str, optional): Nombre de la consulta, se usa para el nombre del archivo. Valor por defecto es "Consulta".
+        failures (dict, optional): {clave: excepción} de las consultas que fallaron. Valor por defecto es {}.
+    """
+    def __init__(self, data, name="Consulta", failures=None):
+        self.timestamp = dt.datetime.now()
+        self.raw_response = None
+        self.data = data
+        self.name = name
+        self.failures = failures or {}
+        self.file_path = None
+        self.params = {}
+
+    def make_file_path(self):
+        timestamp = self.timestamp.strftime("%Y%m%d-%H%M%S")
+        return f"{timestamp}-{self.name}-{len(self.data)}.csv"
+
+    def iter_records(self):
+        yield from self.data
+
+
 class PaginatedResult(Result):
-    def __init__(self, method, params, response):
-        super().__init__(response, encoding='utf-8')
+    def __init__(self, method, params, response, decoder=None):
+        super().__init__(response, encoding='utf-8', decoder=decoder)
         self.method = method
         self.params = params
 
@@ -183,27 +618,72 @@ class PaginatedResult(Result):
         file_path = '-'.join(path_parts) + '.csv'
         return file_path
 
+    def page(self, registro_inicial, registro_final):
+        """Descarga el rango registro_inicial-registro_final de esta consulta sin modificar self.params."""
+        params = dict(self.params, registro_inicial=registro_inicial, registro_final=registro_final)
+        return self.method(**params)
+
     def next_page(self, per='default'):
-        # Update the parameters for the next page
         # Assume page is controlled by registro_inicial and registro_final
         if per == 'default':
             per = self.params['registro_final'] - self.params['registro_inicial']
-        self.params['registro_inicial'] = self.params['registro_final'] + 1
-        self.params['registro_final'] = self.params['registro_inicial'] + per
-        # Call the method to fetch the next page
-        next_result = self.method(**self.params)
-        return next_result
+        registro_inicial = self.params['registro_final'] + 1
+        # Call the method to fetch the next page (self.params is left untouched)
+        return self.page(registro_inicial, registro_inicial + per)
+
+    def iter_pages(self, per='default'):
+        """
+        Genera esta página y las siguientes, descargándolas solo conforme se piden. Termina en la
+        primera página vacía. No modifica este resultado, así que se puede recorrer varias veces.
+
+        Ejemplo:
+            for pagina in itertools.islice(consulta.iter_pages(per=250), 10):
+                ...
+
+        Parámetros:
+            per (int, optional): Tamaño de las páginas siguientes. Por defecto es el de esta página.
+        """
+        result = self
+        while not result.is_empty():
+            yield result
+            result = result.next_page(per)
+
+    def iter_records(self, per='default'):
+        """
+        Genera uno por uno los establecimientos (dicts) de todas las páginas de la consulta,
+        descargando cada página solo cuando se necesita.
+
+        Parámetros:
+            per (int, optional): Tamaño de las páginas siguientes. Por defecto es el de esta página.
+        """
+        for page in self.iter_pages(per):
+            yield from page.data
 
     def to_csv(self, outfile=None, folder=None, download_all=False, **kwargs):
         if download_all:
-            outfile = download_all_to_csv(self, outfile, **kwargs)
+            outfile = download_all_to_csv(self, outfile, folder, **kwargs)
         else:
             outfile = super().to_csv(outfile, folder, **kwargs)
 
         return outfile
 
+    def to_parquet(self, outfile=None, folder=None, download_all=False, **kwargs):
+        if download_all:
+            outfile = download_all_to_parquet(self, outfile, folder, **kwargs)
+        else:
+            outfile = super().to_parquet(outfile, folder, **kwargs)
+
+        return outfile
+
+    def to_feather(self, outfile=None, folder=None, download_all=False, **kwargs):
+        if download_all:
+            outfile = download_all_to_feather(self, outfile, folder, **kwargs)
+        else:
+            outfile = super().to_feather(outfile, folder, **kwargs)
+
+        return outfile
 
-    def __next__(self):
-        self.next_page()
+    def __iter__(self):
+        return self.iter_pages()
 
 
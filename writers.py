@@ -0,0 +1,373 @@
+import io
+import os
+import csv
+import hashlib
+from collections import defaultdict
+from pathlib import Path
+
+# pyarrow es opcional y tarda en importarse: _require_pyarrow lo carga la primera vez que se
+# escribe o lee Parquet o Feather
+pa = None
+pc = None
+ds = None
+pq = None
+
+
+class CsvPageWriter:
+    """
+    Escribe las páginas de una descarga directamente al final de un archivo CSV, sin
+    mantener en memoria más que la página actual.
+
+    Parámetros:
+        path (str | Path): Archivo CSV de salida.
+        offset (int, optional): Byte a partir del cual se continúa escribiendo. Lo que haya después
+            se descarta (se usa al reanudar una descarga). Valor por defecto es 0.
+        columns (list, optional): Columnas del archivo si ya tiene encabezado. Valor por defecto es None.
+    """
+    resumable = True
+
+    def __init__(self, path, offset=0, columns=None):
+        self.path = path
+        self.columns = columns if offset else None
+        self._file = open(path, 'r+b' if offset else 'wb')
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def write(self, records):
+        """
+        Agrega los registros (lista de dicts) al archivo. Las columnas se fijan con el primer registro;
+        un registro con columnas que no están en el encabezado lanza ValueError.
+
+        Returns:
+            (sha256, offset): Checksum de los bytes escritos y posición del archivo al terminar.
+        """
+        buffer = io.StringIO()
+        if self.columns is None:
+            self.columns = list(records[0].keys()) if records else []
+            csv.writer(buffer, lineterminator="\n").writerow(self.columns)
+        known = set(self.columns)
+        for record in records:
+            unexpected = record.keys() - known
+            if unexpected:
+                raise ValueError(f"Columnas que no están en el encabezado de {self.path}: {sorted(unexpected)}")
+        writer = csv.DictWriter(buffer, self.columns, restval="", lineterminator="\n")
+        writer.writerows(records)
+        chunk = buffer.getvalue().encode('utf-8')
+        self._file.write(chunk)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return hashlib.sha256(chunk).hexdigest(), self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+# Tipos de las columnas en Arrow/Parquet; las demás columnas son texto
+FLOAT_FIELDS = ("Latitud", "Longitud")
+INT_FIELDS = ("Total",)
+CATEGORICAL_FIELDS = ("Clase_actividad", "Estrato")
+
+
+# Claves de partición: se toman de las columnas de los archivos de descarga masiva del DENUE o,
+# en las respuestas de la API, de la CLEE (entidad 2 dígitos, municipio 3, clase SCIAN 6)
+def _entidad(record):
+    if record.get("cve_ent"):
+        return str(record["cve_ent"]).zfill(2)
+    return str(record.get("CLEE") or "")[:2]
+
+
+def _sector(record):
+    if record.get("codigo_act"):
+        return str(record["codigo_act"])[:2]
+    return str(record.get("CLEE") or "")[5:7]
+
+
+PARTITION_KEYS = {"entidad": _entidad, "sector": _sector}
+
+
+def _require_pyarrow():
+    global pa, pc, ds, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Para escribir Parquet o Arrow se requiere pyarrow: pip install pyarrow") from None
+    pa, pc, ds, pq = pyarrow, pyarrow.compute, pyarrow.dataset, pyarrow.parquet
+
+
+def _number(value, kind):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def arrow_schema(columns):
+    """
+    Esquema de Arrow con tipos: coordenadas float64, Total int64, Clase_actividad y Estrato como
+    categóricas (diccionario) y el resto texto.
+    """
+    _require_pyarrow()
+    fields = []
+    for column in columns:
+        if column in FLOAT_FIELDS:
+            fields.append((column, pa.float64()))
+        elif column in INT_FIELDS:
+            fields.append((column, pa.int64()))
+        elif column in CATEGORICAL_FIELDS:
+            fields.append((column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append((column, pa.string()))
+    return pa.schema(fields)
+
+
+class DictionaryEncoder:
+    """
+    Codifica columnas de texto como diccionario conservando un solo diccionario que solo crece
+    entre páginas: los valores nuevos se agregan al final. Así cada página de un archivo Feather
+    se escribe como un delta del diccionario en lugar de reemplazarlo.
+    """
+
+    def __init__(self):
+        _require_pyarrow()
+        self.dictionary = pa.array([], pa.string())
+
+    def encode(self, array):
+        indices = pc.index_in(array, value_set=self.dictionary)
+        new = pc.filter(array, pc.and_(pc.is_null(indices), pc.is_valid(array)))
+        if len(new):
+            self.dictionary = pa.concat_arrays([self.dictionary, pc.unique(new)])
+            indices = pc.index_in(array, value_set=self.dictionary)
+        return pa.DictionaryArray.from_arrays(indices.cast(pa.int32()), self.dictionary)
+
+
+def _parse_numbers(array, kind):
+    # Las celdas vacías del CSV o de la API se convierten en nulos; si hay texto no numérico se
+    # convierte valor por valor igual que en to_arrow_table
+    try:
+        return pc.cast(pc.if_else(pc.equal(pc.utf8_trim_whitespace(array), ""), None, array), kind)
+    except pa.ArrowInvalid:
+        python = float if kind == pa.float64() else int
+        return pa.array([_number(value, python) for value in array.to_pylist()], kind)
+
+
+def cast_table(table, schema, encoders=None):
+    """
+    Convierte una pa.Table (con columnas de texto, como las lee pyarrow.csv, o ya tipadas) al
+    esquema de arrow_schema. Las columnas que falten se llenan con nulos.
+
+    Parámetros:
+        encoders (dict, optional): {columna: DictionaryEncoder} para las columnas categóricas que
+            deben compartir diccionario con páginas anteriores (ver FeatherPageWriter).
+    """
+    arrays = []
+    for field in schema:
+        if field.name in table.column_names:
+            array = table.column(field.name).combine_chunks()
+        else:
+            array = pa.nulls(len(table), pa.string())
+        if pa.types.is_dictionary(array.type):
+            array = array.cast(array.type.value_type)
+        if field.type in (pa.float64(), pa.int64()):
+            array = _parse_numbers(array, field.type) if pa.types.is_string(array.type) else array.cast(field.type)
+        else:
+            array = array.cast(pa.string())
+            if pa.types.is_dictionary(field.type):
+                array = encoders[field.name].encode(array) if encoders else array.dictionary_encode()
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def to_arrow_table(records, schema=None, encoders=None):
+    """Convierte una lista de registros (dicts) a una pa.Table con el esquema de arrow_schema."""
+    _require_pyarrow()
+    if schema is None:
+        schema = arrow_schema(list(dict.fromkeys(key for record in records for key in record)))
+    arrays = []
+    for field in schema:
+        values = [record.get(field.name) for record in records]
+        if field.type == pa.float64():
+            arrays.append(pa.array([_number(value, float) for value in values], pa.float64()))
+        elif field.type == pa.int64():
+            arrays.append(pa.array([_number(value, int) for value in values], pa.int64()))
+        else:
+            array = pa.array([None if value is None else str(value) for value in values], pa.string())
+            if pa.types.is_dictionary(field.type):
+                array = encoders[field.name].encode(array) if encoders else array.dictionary_encode()
+            arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(records, path, **kwargs):
+    """Guarda los registros en un archivo Parquet con columnas tipadas; kwargs se pasan a pq.write_table."""
+    _require_pyarrow()
+    pq.write_table(to_arrow_table(records), path, **kwargs)
+
+
+class ParquetPageWriter:
+    """
+    Escribe cada página de una descarga como un row group de un archivo Parquet con columnas
+    tipadas (ver arrow_schema). Requiere pyarrow. Un archivo Parquet no se puede continuar
+    después de una interrupción, así que las descargas a Parquet no son reanudables.
+
+    Parámetros:
+        path (str | Path): Archivo Parquet de salida.
+    """
+    resumable = False
+
+    def __init__(self, path, offset=0, columns=None):
+        _require_pyarrow()
+        self.path = path
+        self.columns = None
+        self._writer = None
+
+    def write(self, records):
+        if self._writer is None:
+            self.columns = list(records[0].keys()) if records else []
+            self._writer = pq.ParquetWriter(self.path, arrow_schema(self.columns))
+        self._writer.write_table(to_arrow_table(records, self._writer.schema))
+        return None, None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class PartitionedParquetWriter:
+    """
+    Escribe las páginas de una descarga como un dataset Parquet particionado al estilo Hive
+    (<path>/entidad=09/sector=46/part-0.parquet). Los registros de cada partición se acumulan
+    hasta row_group_size antes de escribirse, así que la memoria máxima es del orden de
+    row_group_size por partición abierta. Requiere pyarrow; no es reanudable.
+
+    Parámetros:
+        path (str | Path): Carpeta del dataset.
+        partition_by (tuple, optional): Claves de PARTITION_KEYS. Valor por defecto es ("entidad",).
+        row_group_size (int, optional): Registros por row group. Valor por defecto es 50000.
+    """
+    resumable = False
+
+    def __init__(self, path, offset=0, columns=None, partition_by=("entidad",), row_group_size=50_000):
+        _require_pyarrow()
+        for key in partition_by:
+            if key not in PARTITION_KEYS:
+                raise ValueError(f"Invalid partition key: {key}. Valid keys: {tuple(PARTITION_KEYS)}")
+        self.path = Path(path)
+        self.partition_by = tuple(partition_by)
+        self.row_group_size = row_group_size
+        self.columns = None
+        self._schema = None
+        self._buffers = defaultdict(list)
+        self._writers = {}
+
+    def write(self, records):
+        if self._schema is None:
+            self.columns = list(records[0].keys()) if records else []
+            self._schema = arrow_schema(self.columns)
+        keys = [PARTITION_KEYS[name] for name in self.partition_by]
+        for record in records:
+            self._buffers[tuple(key(record) or "__HIVE_DEFAULT_PARTITION__" for key in keys)].append(record)
+        for partition in [p for p, buffer in self._buffers.items() if len(buffer) >= self.row_group_size]:
+            self._flush(partition)
+        return None, None
+
+    def _flush(self, partition):
+        records = self._buffers.pop(partition, None)
+        if not records:
+            return
+        writer = self._writers.get(partition)
+        if writer is None:
+            folder = self.path.joinpath(*(f"{name}={value}" for name, value in zip(self.partition_by, partition)))
+            folder.mkdir(parents=True, exist_ok=True)
+            writer = self._writers[partition] = pq.ParquetWriter(folder / "part-0.parquet", self._schema)
+        writer.write_table(to_arrow_table(records, self._schema))
+
+    def close(self):
+        for partition in list(self._buffers):
+            self._flush(partition)
+        for writer in self._writers.values():
+            writer.close()
+
+
+def hive_partitioning(path):
+    """Particionado Hive de un dataset de PartitionedParquetWriter con las claves como texto (None si es un archivo)."""
+    _require_pyarrow()
+    path = Path(path)
+    if not path.is_dir():
+        return None
+    keys = [part.split("=")[0] for part in next(path.rglob("*.parquet")).relative_to(path).parts[:-1]]
+    return ds.partitioning(pa.schema([(key, pa.string()) for key in keys]), flavor="hive")
+
+
+def read_parquet(path, columns=None, filters=None):
+    """
+    Lee un archivo Parquet o un dataset particionado escrito por PartitionedParquetWriter. Las
+    claves de partición se leen como texto para conservar los ceros a la izquierda ("09").
+
+    Ejemplo:
+        df = read_parquet("denue", columns=["Id", "Latitud", "Longitud"], filters=[("entidad", "=", "09")])
+
+    Parámetros:
+        path (str | Path): Archivo o carpeta del dataset.
+        columns (list, optional): Columnas a leer. Por defecto todas.
+        filters (list, optional): Filtros de pyarrow, ej. [("entidad", "in", ["09", "15"])].
+    """
+    _require_pyarrow()
+    path = Path(path)
+    table = pq.read_table(path, columns=columns, filters=filters, partitioning=hive_partitioning(path))
+    return table.to_pandas()
+
+
+class FeatherPageWriter:
+    """
+    Escribe las páginas de una descarga en un archivo Feather v2 (formato Arrow IPC) sin
+    compresión, con las columnas tipadas de arrow_schema. Sin compresión el archivo se puede
+    abrir con memory map (ver storage.open_feather): varios procesos comparten la misma copia en la caché de páginas del
+    sistema operativo y solo se leen del disco las columnas y filas que se usan. Requiere pyarrow;
+    no es reanudable.
+
+    Parámetros:
+        path (str | Path): Archivo .feather de salida.
+    """
+    resumable = False
+
+    def __init__(self, path, offset=0, columns=None):
+        _require_pyarrow()
+        self.path = path
+        self.columns = None
+        self._schema = None
+        self._writer = None
+        self._encoders = {}
+
+    def _open(self, columns):
+        self.columns = columns
+        schema = arrow_schema(columns)
+        self._encoders = {field.name: DictionaryEncoder() for field in schema if pa.types.is_dictionary(field.type)}
+        # Los diccionarios de las columnas categóricas crecen entre páginas y se escriben como deltas
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        self._schema = schema
+        self._writer = pa.ipc.new_file(str(self.path), schema, options=options)
+
+    def write(self, records):
+        if self._writer is None:
+            self._open(list(records[0].keys()) if records else [])
+        self._writer.write_table(to_arrow_table(records, self._schema, self._encoders))
+        return None, None
+
+    def write_table(self, table):
+        """Agrega una pa.Table (por ejemplo un lote leído de un CSV o de un dataset Parquet)."""
+        if self._writer is None:
+            self._open(table.column_names)
+        self._writer.write_table(cast_table(table, self._schema, self._encoders))
+
+    def close(self):
+        if self._writer is None:
+            self._open([])
+        self._writer.close()
+
+
+WRITERS = {"csv": CsvPageWriter, "parquet": ParquetPageWriter, "feather": FeatherPageWriter}